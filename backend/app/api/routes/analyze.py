@@ -2,13 +2,21 @@
 Analysis routes for MR summarization.
 Complete implementation with GitLab + OpenAI + Cache integration.
 """
+import asyncio
+import json
+from typing import Any, Callable, Dict, Optional
+
 from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db
 from app.core.dependencies import get_current_user
 from app.models.user import User
 from app.schemas.analyze import AnalyzeRequest, AnalyzeResponse, MRHeader
+from app.services.diff_compressor import get_diff_compressor
 from app.services.gitlab_service import create_gitlab_service
 from app.services.mr_analysis_service import create_mr_analysis_service
 from app.services.openai_service import get_openai_service
@@ -16,6 +24,12 @@ from app.services import scan_service
 
 router = APIRouter()
 
+# Receives a named event and its JSON-serializable payload
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+# Streaming analyses in flight (strong references until they finish)
+_analysis_tasks = set()
+
 
 @router.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_mr(
@@ -28,18 +42,142 @@ async def analyze_mr(
 
     Flow:
     1. Parse and validate MR URL
-    2. Fetch MR metadata from GitLab (get SHA)
+    2. Fetch MR metadata from GitLab (get SHA); repeated opens are served
+       from a short-lived ETag metadata cache
     3. Check cache validity (compare SHAs)
     4. If cache HIT: Return cached summary (instant!)
     5. If cache MISS:
+       - If an outdated scan exists and the MR wasn't rebased, update its
+         summary from the diff, commits and notes since its SHA (falls
+         back to a full run; at most INCREMENTAL_SUMMARY_MAX_UPDATES in a row)
        - Fetch full MR data from GitLab
        - Filter changes (remove lock files)
        - Generate AI summary
        - Store in database
        - Return new summary
+       Concurrent misses for the same MR version (in this process or in
+       other workers) are coalesced into a single generation.
 
     Requires authentication (user must be logged in).
     """
+    return await _run_analysis(request, db, current_user)
+
+
+@router.post("/analyze/stream")
+async def analyze_mr_stream(
+    request: AnalyzeRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Analyzes a GitLab MR and streams progress as Server-Sent Events.
+
+    Same flow as POST /analyze, but the client sees results as they
+    become available instead of waiting for the whole summary:
+
+    - header:   MR header and cache status, right after the cache check
+    - progress: {"completed", "total", "filepath"} as MAP-phase file
+                summaries complete (large MRs only)
+    - token:    {"text"} summary deltas as the model streams them
+    - reset:    {} discard the streamed text; a full summary follows
+                (an incremental update failed after it started streaming)
+    - done:     the final AnalyzeResponse (authoritative summary text)
+    - error:    {"status_code", "detail"} if analysis fails after the
+                stream has started
+
+    Errors before the first event (invalid URL, MR not found) are returned
+    as regular HTTP errors. If the client disconnects, generation still
+    finishes and the summary is stored.
+
+    Requires authentication (user must be logged in).
+    """
+    events: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data: Dict[str, Any]):
+        events.put_nowait((event, data))
+
+    async def run():
+        # Own session: the request's dependencies are closed once the
+        # streaming response starts
+        async with AsyncSessionLocal() as db:
+            try:
+                response = await _run_analysis(request, db, current_user, emit)
+                emit("done", response.model_dump())
+            except HTTPException as e:
+                emit("error", {"status_code": e.status_code, "detail": e.detail})
+            except Exception as e:
+                print(f"[ERROR] Streaming analysis failed: {e}")
+                emit("error", {
+                    "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    "detail": "Failed to analyze merge request.",
+                })
+
+    # Keep a reference so the analysis can outlive a disconnected client
+    task = asyncio.create_task(run())
+    _analysis_tasks.add(task)
+    task.add_done_callback(_analysis_tasks.discard)
+
+    # Wait for the first event so early failures keep their HTTP status
+    first_event = await events.get()
+    if first_event[0] == "error":
+        raise HTTPException(
+            status_code=first_event[1]["status_code"],
+            detail=first_event[1]["detail"],
+        )
+
+    async def event_stream():
+        event, data = first_event
+        while True:
+            yield _format_sse(event, data)
+            if event in ("done", "error"):
+                break
+            event, data = await events.get()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+        },
+    )
+
+
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """
+    Format one Server-Sent Event.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        SSE frame string
+    """
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def _run_analysis(
+    request: AnalyzeRequest,
+    db: AsyncSession,
+    current_user: User,
+    emit: Optional[EventCallback] = None,
+) -> AnalyzeResponse:
+    """
+    Run the analysis flow shared by the plain and streaming endpoints.
+
+    Args:
+        request: Analyze request
+        db: Database session
+        current_user: Authenticated user
+        emit: Optional event callback (header, progress and token events)
+
+    Returns:
+        AnalyzeResponse
+
+    Raises:
+        HTTPException: If the URL is invalid, the MR can't be fetched or
+                       the summary can't be generated
+    """
     print(f"\n[INFO] Analyzing MR: {request.url}")
 
     # Step 1: Create services
@@ -59,15 +197,17 @@ async def analyze_mr(
     project_path, mr_iid = parsed
     print(f"[INFO] Project: {project_path}, MR: !{mr_iid}")
 
-    # Step 3: Fetch MR metadata (to get SHA and basic info)
+    # Step 3: Resolve the MR once (metadata gives us SHA and basic info)
     print("[INFO] Fetching MR metadata...")
-    metadata = await analysis_service.fetch_mr_metadata(project_path, mr_iid)
-    if not metadata:
+    mr_context = await analysis_service.open_merge_request(project_path, mr_iid)
+    if not mr_context:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Merge request not found or you don't have access to it."
         )
 
+    metadata = mr_context.metadata
+
     current_sha = metadata["sha"]
     project_id = metadata["project_id"]
     print(f"[INFO] Current SHA: {current_sha}")
@@ -78,16 +218,39 @@ async def analyze_mr(
         project_id, mr_iid, current_sha
     )
 
+    if not is_valid and mr_context.from_cache:
+        # Metadata came from the short-lived metadata cache; confirm the
+        # head SHA with GitLab (a cheap 304 if unchanged) before regenerating
+        print("[INFO] Revalidating cached MR metadata...")
+        mr_context = await analysis_service.open_merge_request(
+            project_path, mr_iid, revalidate=True
+        )
+        if not mr_context:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Merge request not found or you don't have access to it."
+            )
+
+        metadata = mr_context.metadata
+        current_sha = metadata["sha"]
+        is_valid, cached_scan = await analysis_service.check_cache(
+            project_id, mr_iid, current_sha
+        )
+
     if is_valid and cached_scan:
         # Cache HIT - return cached result
         print("[INFO] Cache HIT! Returning cached summary")
+        mr_header = MRHeader(
+            title=cached_scan["title"],
+            author=metadata["author"],
+            status=metadata["state"],
+            url=request.url,
+        )
+        if emit:
+            emit("header", {"mr_header": mr_header.model_dump(), "cached": True})
+
         return AnalyzeResponse(
-            mr_header=MRHeader(
-                title=cached_scan["title"],
-                author=metadata["author"],
-                status=metadata["state"],
-                url=request.url,
-            ),
+            mr_header=mr_header,
             summary_markdown=cached_scan["summary_markdown"],
             cached=True,
             scanned_at=cached_scan["scanned_at"],
@@ -96,60 +259,135 @@ async def analyze_mr(
     # Cache MISS - generate new summary
     print("[INFO] Cache MISS! Generating new summary...")
 
-    # Step 5: Fetch full MR data
-    print("[INFO] Fetching complete MR data...")
-    full_data = await analysis_service.fetch_full_mr_data(project_path, mr_iid)
-    if not full_data:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to fetch merge request data from GitLab."
-        )
-
-    # Step 6: Prepare data for analysis (filter changes, etc.)
-    print("[INFO] Preparing data for AI analysis...")
-    prepared_data = await analysis_service.prepare_data_for_analysis(full_data)
-
-    # Step 7: Generate AI summary
-    print("[INFO] Generating AI summary...")
-    summary = await openai_service.generate_summary(
-        title=prepared_data["title"],
-        description=prepared_data["description"],
-        changes=prepared_data["changes"],
-        notes=prepared_data["notes"],
-        commits=prepared_data["commits"],
+    mr_header = MRHeader(
+        title=metadata["title"],
+        author=metadata["author"],
+        status=metadata["state"],
+        url=request.url,
     )
 
-    if not summary:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to generate summary. Please try again."
+    on_token = None
+    on_progress = None
+    if emit:
+        emit("header", {"mr_header": mr_header.model_dump(), "cached": False})
+
+        def on_token(text: str):
+            emit("token", {"text": text})
+
+        def on_progress(completed: int, total: int, filepath: Optional[str]):
+            emit("progress", {"completed": completed, "total": total, "filepath": filepath})
+
+    async def generate():
+        summary = None
+        incremental_updates = 0
+
+        # Step 5a: Outdated scan - try updating it from the delta since its SHA.
+        # Updates build on each other, so after INCREMENTAL_SUMMARY_MAX_UPDATES
+        # in a row the summary is regenerated from the whole MR instead
+        if cached_scan and settings.INCREMENTAL_SUMMARY_ENABLED:
+            delta = None
+            if cached_scan["incremental_updates"] >= settings.INCREMENTAL_SUMMARY_MAX_UPDATES:
+                print(f"[INFO] {cached_scan['incremental_updates']} incremental updates in a row, regenerating")
+            else:
+                print("[INFO] Fetching changes since last analyzed commit...")
+                delta = await analysis_service.fetch_incremental_data(
+                    mr_context, cached_scan["last_commit_sha"], cached_scan["scanned_at"]
+                )
+            if delta:
+                if settings.DIFF_COMPRESSION_ENABLED:
+                    delta["changes"] = await get_diff_compressor().compress_async(delta["changes"])
+
+                # Track streamed text, so a failed attempt can be retracted
+                streamed = False
+
+                def on_incremental_token(text: str):
+                    nonlocal streamed
+                    streamed = True
+                    on_token(text)
+
+                print("[INFO] Generating incremental AI summary...")
+                summary = await openai_service.generate_incremental_summary(
+                    previous_summary=cached_scan["summary_markdown"],
+                    title=metadata["title"],
+                    description=metadata["description"],
+                    changes=delta["changes"],
+                    notes=delta["notes"],
+                    commits=delta["commits"],
+                    on_token=on_incremental_token if on_token else None,
+                )
+                if summary:
+                    incremental_updates = cached_scan["incremental_updates"] + 1
+                elif streamed:
+                    # The full summary streams next; drop the partial text
+                    emit("reset", {})
+
+        if not summary:
+            # Step 5b: Fetch full MR data
+            print("[INFO] Fetching complete MR data...")
+            full_data = await analysis_service.fetch_full_mr_data(mr_context)
+            if not full_data:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Failed to fetch merge request data from GitLab."
+                )
+
+            # Step 6: Prepare data for analysis (filter changes, etc.)
+            print("[INFO] Preparing data for AI analysis...")
+            prepared_data = await analysis_service.prepare_data_for_analysis(full_data)
+
+            # Step 6b: Compress diffs (context, whitespace, moves, duplicates)
+            if settings.DIFF_COMPRESSION_ENABLED:
+                prepared_data["changes"] = await get_diff_compressor().compress_async(
+                    prepared_data["changes"]
+                )
+
+            # Step 7: Generate AI summary
+            print("[INFO] Generating AI summary...")
+            summary = await openai_service.generate_summary(
+                title=prepared_data["title"],
+                description=prepared_data["description"],
+                changes=prepared_data["changes"],
+                notes=prepared_data["notes"],
+                commits=prepared_data["commits"],
+                on_token=on_token,
+                on_progress=on_progress,
+            )
+
+        if not summary:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to generate summary. Please try again."
+            )
+
+        print("[INFO] Summary generated successfully!")
+
+        # Step 8: Store in database
+        print("[INFO] Storing summary in database...")
+        scan = await scan_service.upsert_scan(
+            db=db,
+            project_id=project_id,
+            mr_iid=mr_iid,
+            mr_url=request.url,
+            title=metadata["title"],
+            last_commit_sha=current_sha,
+            summary_markdown=summary,
+            incremental_updates=incremental_updates,
         )
 
-    print("[INFO] Summary generated successfully!")
+        print(f"[INFO] Analysis complete! Scan ID: {scan.id}")
+        return {"summary_markdown": summary, "scanned_at": scan.scanned_at}
 
-    # Step 8: Store in database
-    print("[INFO] Storing summary in database...")
-    scan = await scan_service.upsert_scan(
-        db=db,
-        project_id=project_id,
-        mr_iid=mr_iid,
-        mr_url=request.url,
-        title=metadata["title"],
-        last_commit_sha=current_sha,
-        summary_markdown=summary,
+    # Concurrent requests for the same MR version share one generation
+    result, shared = await analysis_service.generate_once(
+        project_id, mr_iid, current_sha, generate
     )
-
-    print(f"[INFO] Analysis complete! Scan ID: {scan.id}")
+    if shared:
+        print("[INFO] Reusing summary generated by a concurrent request")
 
     # Step 9: Return result
     return AnalyzeResponse(
-        mr_header=MRHeader(
-            title=metadata["title"],
-            author=metadata["author"],
-            status=metadata["state"],
-            url=request.url,
-        ),
-        summary_markdown=summary,
-        cached=False,
-        scanned_at=scan.scanned_at,
+        mr_header=mr_header,
+        summary_markdown=result["summary_markdown"],
+        cached=shared,
+        scanned_at=result["scanned_at"],
     )
@@ -0,0 +1,127 @@
+"""
+File filter routes for per-project analysis rules.
+"""
+from typing import Optional
+
+import requests
+from fastapi import APIRouter, HTTPException, Depends
+from gitlab.const import AccessLevel
+from gitlab.exceptions import GitlabError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.dependencies import get_current_user
+from app.models.user import User
+from app.schemas.file_filter import FileFilterRuleItem, FileFilterRules, FileFilterRulesUpdate
+from app.services.gitlab_service import create_gitlab_service
+from app.services import file_filter_service
+
+router = APIRouter()
+
+
+async def _check_project_access(
+    project_id: int, current_user: User, min_access_level: Optional[int] = None
+):
+    """
+    Check the user's access to a project on GitLab.
+
+    Instance administrators pass the role check without being members.
+
+    Args:
+        project_id: GitLab project ID
+        current_user: Authenticated user
+        min_access_level: Role required on the project (GitLab access
+                          level), or None if seeing the project is enough
+
+    Raises:
+        HTTPException: 404 if the user can't see the project, 403 if the
+                       user's role is below min_access_level, 502 if
+                       GitLab failed or couldn't be reached
+    """
+    gitlab_service = create_gitlab_service(current_user.access_token)
+    try:
+        project = await gitlab_service.get_project(project_id)
+        if min_access_level is None or _access_level(project) >= min_access_level:
+            return
+        is_admin = await gitlab_service.is_admin()
+    except GitlabError as e:
+        if e.response_code in (401, 403, 404):
+            raise HTTPException(
+                status_code=404,
+                detail=f"Project {project_id} not found or you don't have access to it."
+            )
+        raise HTTPException(status_code=502, detail="GitLab request failed. Please try again.")
+    except requests.RequestException:
+        raise HTTPException(status_code=502, detail="Couldn't reach GitLab. Please try again.")
+
+    if not is_admin:
+        raise HTTPException(
+            status_code=403,
+            detail="Changing file filters requires the Maintainer role on the project."
+        )
+
+
+def _access_level(project) -> int:
+    """The user's highest access level on a project (direct or via its group)."""
+    permissions = getattr(project, "permissions", None) or {}
+    levels = [
+        (permissions.get(scope) or {}).get("access_level") or 0
+        for scope in ("project_access", "group_access")
+    ]
+    return max(levels)
+
+
+@router.get("/projects/{project_id}/file-filters", response_model=FileFilterRules)
+async def get_file_filters(
+    project_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the file filter rules of a project.
+
+    Rules apply in order after the built-in skip list (lock files,
+    binaries, media) and the repository's .gitattributes
+    (linguist-generated, -diff); the last matching rule wins.
+
+    Requires authentication and access to the project on GitLab.
+    """
+    await _check_project_access(project_id, current_user)
+
+    rules = await file_filter_service.get_project_rules(db, project_id)
+    return FileFilterRules(
+        project_id=project_id,
+        rules=[FileFilterRuleItem.model_validate(rule) for rule in rules],
+    )
+
+
+@router.put("/projects/{project_id}/file-filters", response_model=FileFilterRules)
+async def replace_file_filters(
+    project_id: int,
+    request: FileFilterRulesUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Replace the file filter rules of a project.
+
+    - "skip" rules leave matching files out of the analysis
+    - "keep" rules analyze matching files
+
+    The last matching rule wins; project rules override the built-in
+    skip list and the repository's .gitattributes.
+
+    Rules change every user's summaries of the project, so this requires
+    the Maintainer role (or higher) on GitLab.
+    """
+    await _check_project_access(project_id, current_user, AccessLevel.MAINTAINER)
+
+    print(f"\n[INFO] Replacing file filters of project {project_id} ({len(request.rules)} rules)")
+
+    rules = await file_filter_service.replace_project_rules(
+        db, project_id, [rule.model_dump() for rule in request.rules]
+    )
+    return FileFilterRules(
+        project_id=project_id,
+        rules=[FileFilterRuleItem.model_validate(rule) for rule in rules],
+    )
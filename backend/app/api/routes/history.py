@@ -15,9 +15,10 @@ router = APIRouter()
 
 @router.get("/history", response_model=HistoryResponse)
 async def get_history(
-    search: str = Query(None, description="Search query for MR title or URL"),
+    search: str = Query(None, description="Search query for MR title, URL or summary"),
     limit: int = Query(50, ge=1, le=100, description="Number of results to return"),
-    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    offset: int = Query(0, ge=0, description="Number of results to skip (prefer cursor)"),
+    cursor: str = Query(None, description="next_cursor from the previous page"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -25,31 +26,38 @@ async def get_history(
     Returns list of previously scanned MRs.
 
     Features:
-    - Pagination support (limit/offset)
-    - Search by MR title or URL
-    - Ordered by scanned_at (most recent first)
+    - Keyset pagination (cursor), constant cost at any depth
+    - Full-text search over MR title, URL and summary, best matches
+      first, with highlighted snippets
+    - Otherwise ordered by scanned_at, then id (most recent first)
     - Shows all scans (global history)
 
     Requires authentication (user must be logged in).
 
     Query Parameters:
-    - search: Optional search term (searches in title and URL)
+    - search: Optional search terms (every word must match, as a prefix)
     - limit: Number of results to return (1-100, default: 50)
-    - offset: Number of results to skip (default: 0)
+    - offset: Number of results to skip (default: 0, ignored with cursor)
+    - cursor: Position after the last scan of the previous page
 
     Returns:
     - scans: List of scan history items
     - total: Total number of scans matching search criteria
+    - next_cursor: Cursor of the next page (null on the last page)
     """
-    print(f"\n[INFO] Fetching history (search='{search}', limit={limit}, offset={offset})")
+    print(f"\n[INFO] Fetching history (search='{search}', limit={limit}, offset={offset}, cursor={cursor})")
 
     # Get scans from database
-    scans, total = await scan_service.get_all_scans(
-        db=db,
-        search=search,
-        limit=limit,
-        offset=offset
-    )
+    try:
+        scans, total, next_cursor, snippets = await scan_service.get_all_scans(
+            db=db,
+            search=search,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid history cursor")
 
     # Convert to response format
     history_items = [
@@ -61,6 +69,7 @@ async def get_history(
             title=scan.title,
             scanned_at=scan.scanned_at,
             is_up_to_date=True,  # TODO: Could check current SHA vs cached SHA
+            snippet=snippets.get(scan.id),
         )
         for scan in scans
     ]
@@ -69,7 +78,8 @@ async def get_history(
 
     return HistoryResponse(
         scans=history_items,
-        total=total
+        total=total,
+        next_cursor=next_cursor,
     )
 
 
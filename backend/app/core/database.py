@@ -1,18 +1,88 @@
 """
 Database configuration and session management.
 Creates SQLite database programmatically if it doesn't exist.
+PostgreSQL (asyncpg) is supported for several API nodes sharing one database.
 """
+from sqlalchemy import event, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
 
+# Serializes schema setup when several nodes start at once (PostgreSQL)
+_MIGRATION_LOCK_ID = 0x64656c7461  # "delta"
+
+
+def _engine_options(database_url: str) -> dict:
+    """
+    Dialect-specific engine options.
+
+    Args:
+        database_url: SQLAlchemy database URL
+
+    Returns:
+        Keyword arguments for create_async_engine
+    """
+    if make_url(database_url).get_backend_name() != "postgresql":
+        return {}
+
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        # Connections die on failover and idle timeouts; test before use
+        "pool_pre_ping": True,
+        "connect_args": {
+            "server_settings": {
+                "application_name": "delta",
+                # JIT compilation only slows down short queries like ours
+                "jit": "off",
+            },
+        },
+    }
+
+
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
-    future=True
+    future=True,
+    **_engine_options(settings.DATABASE_URL)
 )
 
+IS_SQLITE = engine.dialect.name == "sqlite"
+
+
+if IS_SQLITE:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        """
+        Apply the production SQLite profile to every new connection.
+
+        WAL lets readers (history, cache checks) run while a summary is
+        being written; synchronous=NORMAL is durable across app crashes in
+        WAL mode and skips an fsync per commit.
+        """
+        # Let SQLAlchemy emit BEGIN itself (see _begin_sqlite), so
+        # SAVEPOINTs work; pysqlite's implicit transactions break them
+        dbapi_connection.isolation_level = None
+
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _begin_sqlite(connection):
+        """Start transactions explicitly (pairs with isolation_level=None)."""
+        connection.exec_driver_sql("BEGIN")
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -26,17 +96,39 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+def dialect_insert(db: AsyncSession):
+    """
+    Get the dialect-specific insert() for a session's database.
+
+    Unlike sqlalchemy.insert(), it supports ON CONFLICT.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
 async def init_db():
     """
     Initialize database - creates all tables if they don't exist.
     This is called on application startup.
     """
     # Import all models here to ensure they're registered with Base
-    from app.models import user, scan  # noqa: F401
+    from app.models import user, scan, file_summary, analysis_lease, file_filter_rule  # noqa: F401
+    from app.core.migrations import run_migrations
 
     async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Other nodes wait here until this one has set up the schema
+            await conn.execute(
+                text("SELECT pg_advisory_xact_lock(:id)"), {"id": _MIGRATION_LOCK_ID}
+            )
+
         # Create all tables
         await conn.run_sync(Base.metadata.create_all)
+
+        # Indexes added since a table was created, full-text search, and
+        # other DDL create_all can't express
+        await conn.run_sync(run_migrations)
         print("[OK] All database tables created successfully")
 
 
@@ -0,0 +1,216 @@
+"""
+Single-writer queue for SQLite.
+SQLite allows one writer at a time; instead of letting request sessions
+race for the write lock ("database is locked"), writes are queued to one
+task that runs them on its own session and commits them in batches.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, IS_SQLITE
+
+# A unit of work: performs writes on the given session without committing
+WriteJob = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class DatabaseWriter:
+    """Runs write jobs one at a time, committing queued jobs together."""
+
+    def __init__(self, session_factory: async_sessionmaker, max_batch: int):
+        """
+        Initialize writer (the task starts on first use).
+
+        Args:
+            session_factory: Factory for the writer's session
+            max_batch: Maximum jobs per commit
+        """
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self._queue: "asyncio.Queue[Optional[Tuple[WriteJob, asyncio.Future]]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, job: WriteJob) -> Any:
+        """
+        Queue a write job and wait until it is committed.
+
+        If the caller is cancelled, the job still runs.
+
+        Args:
+            job: Coroutine function taking the writer's session
+
+        Returns:
+            The job's return value (ORM objects are detached, fully loaded)
+
+        Raises:
+            Whatever the job raised, or the commit error
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, future))
+        return await asyncio.shield(future)
+
+    async def close(self):
+        """Finish queued jobs and stop the writer task."""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(None)
+        await self._task
+
+    async def _run(self):
+        """
+        Writer loop: take every queued job (up to max_batch), run, commit once.
+
+        A batch that fails outside its jobs (e.g. the rollback after a
+        failed commit) fails all of its jobs and the loop continues on a
+        new session. If the loop stops for good (closed or cancelled),
+        the jobs still queued or running fail too, so no caller waits
+        forever.
+        """
+        session = self.session_factory()
+        batch: List[Tuple[WriteJob, asyncio.Future]] = []
+        try:
+            while True:
+                item = await self._queue.get()
+                if item is None:
+                    return
+
+                batch = [item]
+                stop = False
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+
+                try:
+                    await self._run_batch(session, batch)
+                except Exception as e:
+                    print(f"[ERROR] Database writer batch failed ({len(batch)} jobs): {e}")
+                    _fail_pending(batch, e)
+                    await _close_session(session)
+                    session = self.session_factory()
+
+                if stop:
+                    return
+        finally:
+            await _close_session(session)
+            stopped = list(batch)
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    stopped.append(item)
+            _fail_pending(stopped, RuntimeError("Database writer stopped"))
+
+    async def _run_batch(
+        self, session: AsyncSession, batch: List[Tuple[WriteJob, asyncio.Future]]
+    ):
+        """
+        Run jobs in one transaction, each in a SAVEPOINT so a failing job
+        doesn't undo the others, then commit and resolve their futures.
+        """
+        outcomes: List[Tuple[asyncio.Future, Any, Optional[BaseException]]] = []
+        for job, future in batch:
+            try:
+                async with session.begin_nested():
+                    result = await job(session)
+                # Detach this job's objects, so a later job in the batch
+                # touching the same rows can't change what it returned
+                session.expunge_all()
+                outcomes.append((future, result, None))
+            except Exception as e:
+                session.expunge_all()
+                outcomes.append((future, None, e))
+
+        try:
+            await session.commit()
+        except Exception as e:
+            print(f"[ERROR] Database writer commit failed ({len(batch)} jobs): {e}")
+            await session.rollback()
+            outcomes = [(future, None, e) for future, _, _ in outcomes]
+
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+def _fail_pending(batch: List[Tuple[WriteJob, asyncio.Future]], error: BaseException):
+    """Fail the futures of a batch that aren't resolved yet."""
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(error)
+
+
+async def _close_session(session: AsyncSession):
+    """Close a writer session, ignoring errors (it may already be broken)."""
+    try:
+        await session.close()
+    except Exception as e:
+        print(f"[WARN] Failed to close database writer session: {e}")
+
+
+# Global instance
+_db_writer = None
+
+
+def get_db_writer() -> Optional[DatabaseWriter]:
+    """
+    Get or create global DatabaseWriter instance.
+
+    Returns:
+        DatabaseWriter, or None if writes go straight to the request
+        session (not SQLite, or DB_SINGLE_WRITER disabled)
+    """
+    global _db_writer
+    if not (IS_SQLITE and settings.DB_SINGLE_WRITER):
+        return None
+    if _db_writer is None:
+        _db_writer = DatabaseWriter(AsyncSessionLocal, settings.DB_WRITER_MAX_BATCH)
+    return _db_writer
+
+
+async def run_write(db: AsyncSession, job: WriteJob) -> Any:
+    """
+    Run a write job and commit it.
+
+    Goes through the single-writer queue when enabled, otherwise runs on
+    the caller's session inside a SAVEPOINT: a failing job only undoes
+    its own writes, but a successful one commits the caller's session,
+    including anything else pending on it. Callers pass a session with no
+    unrelated uncommitted changes.
+
+    Args:
+        db: Caller's session (used only without the writer)
+        job: Coroutine function performing the writes (must not commit)
+
+    Returns:
+        The job's return value
+    """
+    writer = get_db_writer()
+    if writer is None:
+        async with db.begin_nested():
+            result = await job(db)
+        try:
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return result
+    return await writer.submit(job)
+
+
+async def shutdown_db_writer():
+    """Flush and stop the writer (called on application shutdown)."""
+    global _db_writer
+    if _db_writer is not None:
+        await _db_writer.close()
+        _db_writer = None
@@ -0,0 +1,244 @@
+"""
+Unified diff parsing.
+Parses GitLab diffs (hunks without file headers) once into a compact
+file/hunk/line model shared by filtering, chunking and prompt building.
+"""
+import re
+from array import array
+from typing import Dict, List, Optional
+
+_HUNK_HEADER = re.compile(r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)")
+
+# Line kinds (FileDiff.line_kinds holds one of these per line)
+ADDED = ord("+")
+REMOVED = ord("-")
+CONTEXT = ord(" ")
+HUNK_HEADER = ord("@")
+NO_NEWLINE = ord("\\")  # "\ No newline at end of file"
+
+
+class Hunk:
+    """One "@@" hunk: header fields plus a range of lines in its FileDiff."""
+
+    __slots__ = (
+        "old_start", "old_count", "new_start", "new_count", "section",
+        "first_line", "end_line", "added", "removed",
+    )
+
+    def __init__(
+        self,
+        old_start: int,
+        old_count: int,
+        new_start: int,
+        new_count: int,
+        section: str,
+        first_line: int,
+    ):
+        self.old_start = old_start
+        self.old_count = old_count
+        self.new_start = new_start
+        self.new_count = new_count
+        self.section = section  # Text after the closing "@@" (e.g. enclosing function)
+        self.first_line = first_line  # Index of the header line
+        self.end_line = first_line + 1  # Exclusive
+        self.added = 0
+        self.removed = 0
+
+
+class FileDiff:
+    """
+    Parsed diff of one file.
+
+    The diff text is kept as-is; lines are described by two compact arrays
+    (start offsets and kinds) instead of one string per line.
+    """
+
+    __slots__ = (
+        "old_path", "new_path", "new_file", "renamed_file", "deleted_file",
+        "text", "line_starts", "line_kinds", "hunks", "added", "removed",
+    )
+
+    def __init__(
+        self,
+        text: str,
+        old_path: str = "",
+        new_path: str = "",
+        new_file: bool = False,
+        renamed_file: bool = False,
+        deleted_file: bool = False,
+    ):
+        self.old_path = old_path
+        self.new_path = new_path
+        self.new_file = new_file
+        self.renamed_file = renamed_file
+        self.deleted_file = deleted_file
+        self.text = text
+        self.line_starts = array("I")  # Offset of each line, plus len(text)
+        self.line_kinds = bytearray()
+        self.hunks: List[Hunk] = []
+        self.added = 0
+        self.removed = 0
+        self._parse()
+
+    @classmethod
+    def from_change(cls, change: Dict) -> "FileDiff":
+        """
+        Parse a change dictionary (see GitLabService.get_merge_request_changes).
+
+        Args:
+            change: Change dictionary
+
+        Returns:
+            FileDiff instance
+        """
+        return cls(
+            change.get("diff", ""),
+            old_path=change.get("old_path", ""),
+            new_path=change.get("new_path", ""),
+            new_file=change.get("new_file", False),
+            renamed_file=change.get("renamed_file", False),
+            deleted_file=change.get("deleted_file", False),
+        )
+
+    @property
+    def path(self) -> str:
+        """Path used to identify the file (new path, else old path)."""
+        return self.new_path or self.old_path
+
+    @property
+    def size(self) -> int:
+        """Length of the diff text in characters."""
+        return len(self.text)
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines in the diff."""
+        return len(self.line_kinds)
+
+    def line(self, index: int) -> str:
+        """Text of one line, including its line ending."""
+        return self.text[self.line_starts[index]:self.line_starts[index + 1]]
+
+    def hunk_text(self, hunk: Hunk) -> str:
+        """Text of one hunk, header included."""
+        return self.text[self.line_starts[hunk.first_line]:self.line_starts[hunk.end_line]]
+
+    def segments(self) -> List[str]:
+        """
+        Split the diff into hunk texts.
+
+        Text before the first hunk header (if any) is its own segment, so
+        "".join(segments()) == text.
+
+        Returns:
+            List of texts
+        """
+        if not self.hunks:
+            return [self.text] if self.text else []
+
+        segments = []
+        preamble_end = self.line_starts[self.hunks[0].first_line]
+        if preamble_end:
+            segments.append(self.text[:preamble_end])
+        segments.extend(self.hunk_text(hunk) for hunk in self.hunks)
+        return segments
+
+    def _parse(self):
+        """Scan the text once, recording line offsets, kinds and hunks."""
+        text = self.text
+        length = len(text)
+        starts = self.line_starts
+        kinds = self.line_kinds
+        hunk: Optional[Hunk] = None
+
+        position = 0
+        while position < length:
+            end = text.find("\n", position)
+            end = length if end == -1 else end + 1
+
+            kind = ord(text[position])
+            if kind == HUNK_HEADER and text.startswith("@@", position):
+                match = _HUNK_HEADER.match(text, position, end)
+                if match:
+                    old_count, new_count = match.group(2), match.group(4)
+                    hunk = Hunk(
+                        int(match.group(1)),
+                        1 if old_count is None else int(old_count),
+                        int(match.group(3)),
+                        1 if new_count is None else int(new_count),
+                        match.group(5).rstrip("\r\n"),
+                        len(kinds),
+                    )
+                    self.hunks.append(hunk)
+            elif kind not in (ADDED, REMOVED, NO_NEWLINE):
+                kind = CONTEXT  # Includes blank context lines with no leading space
+
+            starts.append(position)
+            kinds.append(kind)
+
+            if hunk is not None:
+                hunk.end_line = len(kinds)
+                if kind == ADDED:
+                    hunk.added += 1
+                elif kind == REMOVED:
+                    hunk.removed += 1
+
+            position = end
+
+        starts.append(length)
+        self.added = sum(h.added for h in self.hunks)
+        self.removed = sum(h.removed for h in self.hunks)
+
+
+def get_file_diff(change: Dict) -> FileDiff:
+    """
+    Get the parsed diff of a change, parsing it only the first time.
+
+    Changes fetched by GitLabService are parsed right after the fetch
+    ("parsed" key); changes built elsewhere are parsed and updated here.
+
+    Args:
+        change: Change dictionary
+
+    Returns:
+        FileDiff instance
+    """
+    file_diff = change.get("parsed")
+    if file_diff is None:
+        file_diff = FileDiff.from_change(change)
+        change["parsed"] = file_diff
+    return file_diff
+
+
+def split_by_lines(text: str, max_chars: int) -> List[str]:
+    """
+    Split text at line boundaries into pieces of at most max_chars.
+
+    A single line longer than max_chars becomes its own piece.
+
+    Args:
+        text: Text to split
+        max_chars: Maximum characters per piece
+
+    Returns:
+        List of pieces ("".join(pieces) == text)
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    pieces: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    for line in text.splitlines(keepends=True):
+        if current and size + len(line) > max_chars:
+            pieces.append("".join(current))
+            current = []
+            size = 0
+        current.append(line)
+        size += len(line)
+
+    if current:
+        pieces.append("".join(current))
+
+    return pieces
@@ -0,0 +1,268 @@
+"""
+File filter engine.
+Decides which changed files are left out of the analysis. Rules apply in
+order and the last matching rule wins, as in .gitignore/.gitattributes.
+Consecutive rules with the same action are compiled once into lookup
+sets (exact names, suffixes) and a single regular expression for the
+remaining globs.
+
+Unlike git, matching is case-insensitive, as the filter has always
+been: "*.png" also skips "Logo.PNG", and a rule for "Makefile" also
+matches "makefile".
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+# (pattern, action) with action "skip" or "keep"
+Rule = Tuple[str, str]
+
+# Files that never help a summary (lock files, minified/compiled output, media)
+DEFAULT_SKIP_RULES = (
+    # Lock files
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "poetry.lock",
+    "Gemfile.lock",
+    "Cargo.lock",
+    # Build artifacts
+    "*.min.js",
+    "*.min.css",
+    # Binary/compiled
+    "*.pyc",
+    "*.o",
+    "*.so",
+    "*.dll",
+    "*.exe",
+    # Images
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.svg",
+    "*.ico",
+    # Fonts
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.eot",
+)
+
+# .gitattributes attributes that mark a file as not worth reviewing
+_GITATTRIBUTES_SKIP = {"linguist-generated", "linguist-generated=true", "-diff", "binary"}
+_GITATTRIBUTES_KEEP = {"-linguist-generated", "linguist-generated=false", "diff"}
+
+
+class _Matcher:
+    """Compiled set of gitignore-style patterns (case-insensitive)."""
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Compile patterns.
+
+        Patterns without "/" match the file name at any depth; "name" and
+        "*.ext" patterns go to set lookups, everything else to one regex.
+        Patterns with "/" match from the repository root ("**" crosses
+        directories); a trailing "/" matches everything below a directory.
+
+        Args:
+            patterns: Glob patterns
+        """
+        self.names = set()
+        self.suffixes = set()
+        globs = []
+
+        for pattern in patterns:
+            pattern = pattern.strip().lower()
+            if not pattern:
+                continue
+            if "/" not in pattern and not _has_wildcard(pattern):
+                self.names.add(pattern)
+            elif (
+                "/" not in pattern
+                and pattern.startswith("*.")
+                and not _has_wildcard(pattern[1:])
+            ):
+                self.suffixes.add(pattern[1:])
+            else:
+                globs.append(_glob_to_regex(pattern))
+
+        self.regex = re.compile("|".join(f"(?:{glob})" for glob in globs)) if globs else None
+
+    def matches(self, path: str) -> bool:
+        """
+        Check a lowercased path.
+
+        Args:
+            path: Lowercased file path
+
+        Returns:
+            True if any pattern matches
+        """
+        name = path.rsplit("/", 1)[-1]
+        if name in self.names:
+            return True
+
+        if self.suffixes:
+            dot = name.find(".")
+            while dot != -1:
+                if name[dot:] in self.suffixes:
+                    return True
+                dot = name.find(".", dot + 1)
+
+        return self.regex is not None and self.regex.fullmatch(path) is not None
+
+
+class FileFilter:
+    """Ordered skip/keep rules for one project, compiled for fast matching."""
+
+    def __init__(self, rules: Iterable[Rule]):
+        """
+        Compile rules.
+
+        Args:
+            rules: (pattern, action) pairs in precedence order; a later
+                   matching rule overrides an earlier one
+        """
+        # Runs of consecutive rules with the same action, last run first
+        self._runs: List[Tuple[bool, _Matcher]] = []
+        run_action, run_patterns = None, []
+        for pattern, action in rules:
+            if action != run_action and run_patterns:
+                self._runs.append((run_action == "skip", _Matcher(run_patterns)))
+                run_patterns = []
+            run_action = action
+            run_patterns.append(pattern)
+        if run_patterns:
+            self._runs.append((run_action == "skip", _Matcher(run_patterns)))
+        self._runs.reverse()
+
+    def should_skip(self, filepath: str) -> bool:
+        """
+        Determine if a file should be left out of the analysis.
+
+        Args:
+            filepath: Path to file (relative to the repository root)
+
+        Returns:
+            True if the last rule matching the file is a skip rule
+        """
+        path = filepath.lower().lstrip("/")
+        for skip, matcher in self._runs:
+            if matcher.matches(path):
+                return skip
+        return False
+
+
+def parse_gitattributes(text: str) -> List[Rule]:
+    """
+    Extract analysis rules from a .gitattributes file.
+
+    Files marked linguist-generated, -diff or binary are skipped; an
+    explicit linguist-generated=false or diff keeps them. Lines without
+    these attributes yield no rule.
+
+    Args:
+        text: .gitattributes content
+
+    Returns:
+        (pattern, action) rules in file order
+    """
+    rules = []
+    for line in text.splitlines():
+        fields = line.split()
+        if not fields or fields[0].startswith("#"):
+            continue
+        pattern, attributes = fields[0], set(fields[1:])
+        if attributes & _GITATTRIBUTES_KEEP:
+            rules.append((pattern, "keep"))
+        elif attributes & _GITATTRIBUTES_SKIP:
+            rules.append((pattern, "skip"))
+    return rules
+
+
+@lru_cache(maxsize=256)
+def get_file_filter(
+    project_rules: Tuple[Rule, ...] = (),
+    gitattributes: Optional[str] = None,
+) -> FileFilter:
+    """
+    Get the compiled filter for a rule set (cached per distinct rule set).
+
+    Rules apply in this order, each overriding the ones before it:
+    the built-in defaults, the repository's .gitattributes, then the
+    project's own rules (configured by its maintainers).
+
+    Args:
+        project_rules: Project-specific (pattern, action) rules, in order
+        gitattributes: .gitattributes content at the MR head, if any
+
+    Returns:
+        FileFilter instance
+    """
+    rules = [(pattern, "skip") for pattern in DEFAULT_SKIP_RULES]
+    if gitattributes:
+        rules += parse_gitattributes(gitattributes)
+    rules += project_rules
+    return FileFilter(rules)
+
+
+def _has_wildcard(pattern: str) -> bool:
+    """True if the pattern contains glob metacharacters."""
+    return any(char in pattern for char in "*?[")
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """
+    Translate one gitignore-style glob to a regex matching the full path.
+
+    Args:
+        pattern: Lowercased glob
+
+    Returns:
+        Regex source
+    """
+    anchored = "/" in pattern.rstrip("/")
+    directory = pattern.endswith("/")
+    pattern = pattern.strip("/")
+
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            parts.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                parts.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+
+    regex = "".join(parts)
+    if not anchored:
+        regex = f"(?:.*/)?{regex}"
+    if directory:
+        regex = f"{regex}/.*"
+    return regex
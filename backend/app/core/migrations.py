@@ -0,0 +1,184 @@
+"""
+Schema migrations that Base.metadata.create_all can't express.
+Run once at startup, after create_all. Every step is idempotent.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import Base
+
+# Whether the scan search index exists (set by run_migrations)
+_scan_search_index = False
+
+# Keep the most recent scan of each MR (older duplicates predate the unique index)
+_DEDUPE_SCANS = """
+DELETE FROM scans WHERE id NOT IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY project_id, mr_iid ORDER BY scanned_at DESC, id DESC
+        ) AS position
+        FROM scans
+    ) ranked
+    WHERE position = 1
+)
+"""
+
+# External-content FTS5 index over scans; the table holds no copy of the text
+_SQLITE_SCAN_FTS = """
+CREATE VIRTUAL TABLE scans_fts USING fts5(
+    title, mr_url, summary_markdown,
+    content='scans', content_rowid='id',
+    prefix='2 3'
+)
+"""
+
+# Keep scans_fts in sync with every write to scans, whoever makes it
+_SQLITE_SCAN_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS scans_fts_insert AFTER INSERT ON scans BEGIN
+        INSERT INTO scans_fts(rowid, title, mr_url, summary_markdown)
+        VALUES (new.id, new.title, new.mr_url, new.summary_markdown);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS scans_fts_delete AFTER DELETE ON scans BEGIN
+        INSERT INTO scans_fts(scans_fts, rowid, title, mr_url, summary_markdown)
+        VALUES ('delete', old.id, old.title, old.mr_url, old.summary_markdown);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS scans_fts_update
+    AFTER UPDATE OF title, mr_url, summary_markdown ON scans BEGIN
+        INSERT INTO scans_fts(scans_fts, rowid, title, mr_url, summary_markdown)
+        VALUES ('delete', old.id, old.title, old.mr_url, old.summary_markdown);
+        INSERT INTO scans_fts(rowid, title, mr_url, summary_markdown)
+        VALUES (new.id, new.title, new.mr_url, new.summary_markdown);
+    END
+    """,
+)
+
+# PostgreSQL counterpart of scans_fts: a weighted tsvector kept up to date
+# by the database. Text is split on non-alphanumerics first, like FTS5's
+# tokenizer, so URLs and paths match word by word.
+_POSTGRES_SCAN_SEARCH_VECTOR = """
+ALTER TABLE scans ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', regexp_replace(title, '[^[:alnum:]]+', ' ', 'g')), 'A')
+    || setweight(to_tsvector('simple', regexp_replace(mr_url, '[^[:alnum:]]+', ' ', 'g')), 'B')
+    || setweight(to_tsvector('simple', regexp_replace(summary_markdown, '[^[:alnum:]]+', ' ', 'g')), 'C')
+) STORED
+"""
+
+_POSTGRES_SCAN_SEARCH_INDEX = """
+CREATE INDEX IF NOT EXISTS ix_scans_search_vector ON scans USING GIN (search_vector)
+"""
+
+
+def run_migrations(connection: Connection):
+    """
+    Apply migrations (sync; call via AsyncConnection.run_sync).
+
+    Args:
+        connection: Database connection inside a transaction
+    """
+    global _scan_search_index
+
+    _add_scan_columns(connection)
+
+    scan_indexes = {index["name"] for index in inspect(connection).get_indexes("scans")}
+    if "uq_scans_project_mr" not in scan_indexes:
+        _dedupe_scans(connection)
+
+    # create_all skips existing tables, so add indexes declared since
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+    if connection.dialect.name == "sqlite":
+        _scan_search_index = _create_sqlite_scan_fts(connection)
+    elif connection.dialect.name == "postgresql":
+        _scan_search_index = _create_postgres_scan_search(connection)
+
+
+def scan_search_index_enabled() -> bool:
+    """True if history search can use the full-text index."""
+    return _scan_search_index
+
+
+def _add_scan_columns(connection: Connection):
+    """
+    Add scan columns declared after the table was created.
+
+    Args:
+        connection: Database connection
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("scans")}
+    if "incremental_updates" not in columns:
+        connection.execute(text(
+            "ALTER TABLE scans ADD COLUMN incremental_updates INTEGER NOT NULL DEFAULT 0"
+        ))
+        print("[OK] Added incremental update count to scans")
+
+
+def _dedupe_scans(connection: Connection):
+    """
+    Delete duplicate scans of the same MR, keeping the most recent one.
+
+    Args:
+        connection: Database connection
+    """
+    deleted = connection.execute(text(_DEDUPE_SCANS)).rowcount
+    if deleted:
+        print(f"[INFO] Removed {deleted} duplicate scans before adding the unique MR index")
+
+
+def _create_sqlite_scan_fts(connection: Connection) -> bool:
+    """
+    Create the FTS5 index over scans, its triggers, and backfill it.
+
+    Args:
+        connection: SQLite connection
+
+    Returns:
+        True if the index is available (False if SQLite lacks FTS5)
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'scans_fts'")
+    ).first()
+
+    if not exists:
+        try:
+            connection.execute(text(_SQLITE_SCAN_FTS))
+        except OperationalError as e:
+            print(f"[WARN] SQLite FTS5 unavailable, history search falls back to LIKE: {e}")
+            return False
+
+        # Index scans stored before the index existed
+        connection.execute(text("INSERT INTO scans_fts(scans_fts) VALUES ('rebuild')"))
+        print("[OK] Created full-text index for scan history")
+
+    for trigger in _SQLITE_SCAN_FTS_TRIGGERS:
+        connection.execute(text(trigger))
+
+    return True
+
+
+def _create_postgres_scan_search(connection: Connection) -> bool:
+    """
+    Add the full-text search column and its GIN index to scans.
+
+    Adding the column computes it for existing scans.
+
+    Args:
+        connection: PostgreSQL connection
+
+    Returns:
+        True (the index is always available on PostgreSQL 12+)
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("scans")}
+    if "search_vector" not in columns:
+        connection.execute(text(_POSTGRES_SCAN_SEARCH_VECTOR))
+        print("[OK] Created full-text index for scan history")
+
+    connection.execute(text(_POSTGRES_SCAN_SEARCH_INDEX))
+    return True
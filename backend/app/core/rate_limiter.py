@@ -0,0 +1,259 @@
+"""
+Client-side rate limiting for Azure OpenAI calls.
+Budgets requests and tokens against the deployment quota (TPM/RPM) and
+adapts concurrency to throttling (AIMD).
+"""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Mapping, Optional
+
+from app.core.config import settings
+
+
+class TokenBucket:
+    """Budget of units (tokens or requests) refilled continuously per minute."""
+
+    def __init__(self, per_minute: int):
+        """
+        Initialize a full bucket.
+
+        Args:
+            per_minute: Units available per minute (also the burst capacity)
+        """
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0  # Units per second
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """Add the units accrued since the last update."""
+        now = time.monotonic()
+        self.available = min(
+            self.capacity, self.available + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    async def acquire(self, amount: float):
+        """
+        Wait until `amount` units are available, then take them.
+
+        Callers are served in arrival order. A request larger than the
+        whole bucket is admitted once the bucket is full.
+
+        Args:
+            amount: Units to take
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) / self.rate)
+
+    def sync_remaining(self, remaining: float):
+        """
+        Align the local budget with the server's remaining quota.
+
+        Only ever lowers the budget: other clients of the same deployment
+        may have used quota this process doesn't know about.
+
+        Args:
+            remaining: Remaining units reported by the server
+        """
+        self._refill()
+        self.available = min(self.available, remaining)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Concurrency limit with additive increase / multiplicative decrease."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        """
+        Initialize limiter.
+
+        Args:
+            initial: Starting concurrency limit
+            minimum: Lower bound for the limit
+            maximum: Upper bound for the limit
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        """Wait for a free slot under the current limit."""
+        async with self._condition:
+            while self.in_flight >= int(self.limit):
+                await self._condition.wait()
+            self.in_flight += 1
+
+    async def release(self):
+        """Free a slot."""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        """Additive increase: about +1 slot per limit's worth of successes."""
+        self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def on_throttle(self):
+        """Multiplicative decrease: halve the limit."""
+        self.limit = max(self.minimum, self.limit / 2.0)
+
+
+class OpenAIRateLimiter:
+    """Shared limiter for all chat completion calls to one deployment."""
+
+    def __init__(
+        self,
+        tokens_per_minute: int,
+        requests_per_minute: int,
+        max_concurrency: int,
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            tokens_per_minute: Deployment TPM quota
+            requests_per_minute: Deployment RPM quota
+            max_concurrency: Upper bound for concurrent requests
+        """
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.requests = TokenBucket(requests_per_minute)
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            initial=max_concurrency, minimum=1, maximum=max_concurrency
+        )
+        self.paused_until = 0.0
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """
+        Reserve quota for one request.
+
+        Waits out any server-requested pause, then takes a concurrency slot,
+        one request and the estimated prompt + completion tokens.
+
+        Args:
+            estimated_tokens: Estimated prompt + completion tokens
+        """
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        await self.concurrency.acquire()
+        try:
+            await self.requests.acquire(1)
+            await self.tokens.acquire(estimated_tokens)
+            yield
+        finally:
+            await self.concurrency.release()
+
+    def on_success(self, headers: Mapping[str, str]):
+        """
+        Record a successful response and sync budgets with rate-limit headers.
+
+        Args:
+            headers: Response headers (x-ratelimit-remaining-*)
+        """
+        self.concurrency.on_success()
+
+        remaining_tokens = _parse_float(headers.get("x-ratelimit-remaining-tokens"))
+        if remaining_tokens is not None:
+            self.tokens.sync_remaining(remaining_tokens)
+
+        remaining_requests = _parse_float(headers.get("x-ratelimit-remaining-requests"))
+        if remaining_requests is not None:
+            self.requests.sync_remaining(remaining_requests)
+
+    def on_throttle(self, headers: Optional[Mapping[str, str]]) -> Optional[float]:
+        """
+        Record a 429 response: shrink concurrency and pause all callers.
+
+        Args:
+            headers: Response headers (retry-after-ms / retry-after)
+
+        Returns:
+            Server-requested delay in seconds, if any
+        """
+        self.concurrency.on_throttle()
+
+        retry_after = retry_after_seconds(headers or {})
+        if retry_after is not None:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        return retry_after
+
+    @staticmethod
+    def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Compute delay before the next retry.
+
+        Uses the server's retry-after when given (plus a little jitter so
+        waiting callers don't all fire at once), otherwise exponential
+        backoff with full jitter.
+
+        Args:
+            attempt: Zero-based retry attempt
+            retry_after: Server-requested delay in seconds
+
+        Returns:
+            Delay in seconds
+        """
+        if retry_after is not None:
+            return retry_after + random.uniform(0, 1)
+        cap = min(settings.OPENAI_RETRY_MAX_DELAY_SECONDS, 2 ** attempt)
+        return random.uniform(0, cap)
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Read the server-requested retry delay from response headers.
+
+    Args:
+        headers: Response headers
+
+    Returns:
+        Delay in seconds, or None if not provided
+    """
+    retry_after_ms = _parse_float(headers.get("retry-after-ms"))
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000.0
+    return _parse_float(headers.get("retry-after"))
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    """Parse a numeric header value, returning None if missing or invalid."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+# Global instance
+_rate_limiter = None
+
+
+def get_rate_limiter() -> OpenAIRateLimiter:
+    """
+    Get or create global OpenAIRateLimiter instance.
+
+    Returns:
+        OpenAIRateLimiter instance
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = OpenAIRateLimiter(
+            tokens_per_minute=settings.AZURE_OPENAI_TPM_LIMIT,
+            requests_per_minute=settings.AZURE_OPENAI_RPM_LIMIT,
+            max_concurrency=settings.OPENAI_MAX_CONCURRENCY,
+        )
+    return _rate_limiter
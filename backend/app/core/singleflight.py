@@ -0,0 +1,63 @@
+"""
+In-process request coalescing ("single-flight").
+Concurrent callers with the same key share one execution of the work.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Run fn once per key at a time; concurrent callers await its result.
+
+        The first caller (leader) runs fn. Callers arriving while it runs
+        (followers) wait for the leader's result or exception. If the
+        leader is cancelled, a waiting follower takes over as new leader.
+
+        Args:
+            key: Coalescing key
+            fn: Zero-argument coroutine function doing the work
+
+        Returns:
+            Tuple of (result, shared)
+            - result: Return value of fn
+            - shared: True if the result came from another caller's run
+        """
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                break
+
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # We were cancelled ourselves
+                # Leader was cancelled: retry, possibly as the new leader
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark exceptions as retrieved even if nobody is waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._inflight[key]
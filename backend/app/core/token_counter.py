@@ -2,19 +2,110 @@
 Token counting utilities using tiktoken.
 Estimates token usage for Azure OpenAI API calls.
 """
+import asyncio
+import functools
+import hashlib
+import math
+import posixpath
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import tiktoken
-from typing import List, Dict
+from typing import Any, Callable, List, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+# Calibration for estimate_tokens(): UTF-8 bytes per cl100k_base token and
+# the relative error bound of that ratio, by file extension. Bounds are
+# conservative: estimates are only trusted when a decision is clear anyway.
+_CODE_CALIBRATION = (3.5, 0.30)
+_MARKUP_CALIBRATION = (3.0, 0.35)  # Punctuation-heavy formats
+_PROSE_CALIBRATION = (4.2, 0.25)
+_BYTES_PER_TOKEN: Dict[str, Tuple[float, float]] = {
+    ".py": (3.8, 0.30),
+    ".rb": (3.8, 0.30),
+    **{ext: _CODE_CALIBRATION for ext in (
+        ".js", ".jsx", ".ts", ".tsx", ".java", ".kt", ".go", ".rs", ".c", ".h",
+        ".cpp", ".hpp", ".cs", ".swift", ".php", ".scala", ".sh", ".sql",
+    )},
+    **{ext: _MARKUP_CALIBRATION for ext in (
+        ".json", ".yaml", ".yml", ".xml", ".html", ".css", ".scss", ".toml", ".ini",
+    )},
+    **{ext: _PROSE_CALIBRATION for ext in (".md", ".rst", ".txt")},
+}
+_NON_ASCII_ERROR = 0.5  # CJK and other scripts tokenize far less predictably
+
+
+# Thread pool for tokenization (tiktoken releases the GIL while encoding)
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_tokenizer_executor() -> ThreadPoolExecutor:
+    """
+    Get or create the shared thread pool for tokenization.
+
+    Returns:
+        ThreadPoolExecutor instance
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.TOKENIZER_MAX_WORKERS,
+            thread_name_prefix="tokenizer",
+        )
+    return _executor
+
+
+def shutdown_tokenizer_executor():
+    """Shut down the tokenizer thread pool (called on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run_in_tokenizer_pool(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run CPU-bound tokenizer work in the tokenizer thread pool.
+
+    Args:
+        func: Synchronous callable to execute
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_tokenizer_executor(), functools.partial(func, *args, **kwargs)
+    )
 
 
 class TokenCounter:
     """Utility for counting tokens in text."""
 
-    def __init__(self, model: str = "gpt-4"):
+    def __init__(
+        self,
+        model: str = "gpt-4",
+        max_cached_counts: int = 10000,
+        max_cached_tokens: int = 2000000,
+    ):
         """
         Initialize token counter for specific model.
 
+        The same diff is counted several times per analysis (sizing,
+        prompt building, truncation), so counts and encodings are memoized
+        in LRU caches keyed by a digest of the text. The caches are
+        thread-safe; the *_async methods run in the tokenizer pool.
+
         Args:
             model: Model name (default: gpt-4)
+            max_cached_counts: Max memoized token counts
+            max_cached_tokens: Max total tokens of memoized encodings
         """
         try:
             self.encoding = tiktoken.encoding_for_model(model)
@@ -22,6 +113,70 @@ class TokenCounter:
             # Fallback to cl100k_base for GPT-4 and newer models
             self.encoding = tiktoken.get_encoding("cl100k_base")
 
+        self.max_cached_counts = max_cached_counts
+        self.max_cached_tokens = max_cached_tokens
+        self._counts: "OrderedDict[bytes, int]" = OrderedDict()
+        self._encodings: "OrderedDict[bytes, array]" = OrderedDict()
+        self._cached_tokens = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(text: str) -> bytes:
+        """Cache key for a text."""
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def _encode(self, text: str, key: bytes) -> array:
+        """
+        Encode text, memoizing the token count and (if small enough) the tokens.
+
+        Args:
+            text: Text to encode
+            key: Digest of the text
+
+        Returns:
+            Token array
+        """
+        with self._lock:
+            tokens = self._encodings.get(key)
+            if tokens is not None:
+                self._encodings.move_to_end(key)
+                return tokens
+
+        # Special tokens in diffs (e.g. "<|endoftext|>") are plain text here
+        tokens = array("I", self.encoding.encode_ordinary(text))
+        with self._lock:
+            self._remember(key, tokens)
+        return tokens
+
+    def _remember(self, key: bytes, tokens: array):
+        """
+        Memoize a count and encoding (LRU). Caller must hold the lock.
+
+        Args:
+            key: Digest of the text
+            tokens: Token array
+        """
+        self._counts[key] = len(tokens)
+        self._counts.move_to_end(key)
+        if len(self._counts) > self.max_cached_counts:
+            self._counts.popitem(last=False)
+
+        # Encodings are large; keep them bounded by total tokens, not entries
+        if len(tokens) <= self.max_cached_tokens and key not in self._encodings:
+            self._encodings[key] = tokens
+            self._cached_tokens += len(tokens)
+            while self._cached_tokens > self.max_cached_tokens:
+                _, evicted = self._encodings.popitem(last=False)
+                self._cached_tokens -= len(evicted)
+
+    def _cached_count(self, key: bytes) -> Optional[int]:
+        """Look up a memoized token count."""
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+            return count
+
     def count_tokens(self, text: str) -> int:
         """
         Count tokens in a text string.
@@ -34,7 +189,100 @@ class TokenCounter:
         """
         if not text:
             return 0
-        return len(self.encoding.encode(text))
+
+        key = self._digest(text)
+        count = self._cached_count(key)
+        if count is not None:
+            return count
+
+        return len(self._encode(text, key))
+
+    def count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """
+        Count tokens in many texts, encoding all uncached ones in one batch.
+
+        Args:
+            texts: Texts to count
+
+        Returns:
+            Token counts, in the order of `texts`
+        """
+        counts = [0] * len(texts)
+        misses: Dict[bytes, List[int]] = {}
+
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            key = self._digest(text)
+            count = self._cached_count(key)
+            if count is not None:
+                counts[i] = count
+            else:
+                misses.setdefault(key, []).append(i)
+
+        if misses:
+            keys = list(misses)
+            # Callers already run this in the tokenizer pool; more threads
+            # here would multiply TOKENIZER_MAX_WORKERS
+            encoded = self.encoding.encode_ordinary_batch(
+                [texts[misses[key][0]] for key in keys],
+                num_threads=1,
+            )
+            with self._lock:
+                for key, tokens in zip(keys, encoded):
+                    self._remember(key, array("I", tokens))
+            for key, tokens in zip(keys, encoded):
+                for i in misses[key]:
+                    counts[i] = len(tokens)
+
+        return counts
+
+    def estimate_tokens(self, text: str, filepath: Optional[str] = None) -> Tuple[int, int]:
+        """
+        Estimate tokens from the text's size, without encoding it.
+
+        Uses a bytes-per-token ratio calibrated per file extension (prose
+        for text without a path). Costs one linear scan for ASCII text
+        (str.isascii), plus a UTF-8 encode otherwise; far cheaper than
+        tokenizing, but not O(1).
+
+        Args:
+            text: Text to estimate
+            filepath: Path the text belongs to, selects the calibration
+
+        Returns:
+            Tuple of (estimate, margin): the exact count is within
+            estimate +/- margin for typical content
+        """
+        if not text:
+            return 0, 0
+
+        if filepath is None:
+            bytes_per_token, error = _PROSE_CALIBRATION
+        else:
+            extension = posixpath.splitext(filepath)[1].lower()
+            bytes_per_token, error = _BYTES_PER_TOKEN.get(extension, _CODE_CALIBRATION)
+
+        if text.isascii():
+            size = len(text)
+        else:
+            size = len(text.encode("utf-8", "surrogatepass"))
+            error = max(error, _NON_ASCII_ERROR)
+
+        estimate = math.ceil(size / bytes_per_token)
+        return estimate, math.ceil(estimate * error) + 1
+
+    async def count_tokens_batch_async(self, texts: List[str]) -> List[int]:
+        """
+        count_tokens_batch() in the tokenizer pool, off the event loop.
+
+        Args:
+            texts: Texts to count
+
+        Returns:
+            Token counts, in the order of `texts`
+        """
+        return await run_in_tokenizer_pool(self.count_tokens_batch, texts)
 
     def count_tokens_in_messages(self, messages: List[Dict]) -> int:
         """
@@ -92,26 +340,27 @@ class TokenCounter:
                 "total": int
             }
         """
-        title_tokens = self.count_tokens(title)
-        description_tokens = self.count_tokens(description)
+        # Encode every text of the MR in one batch
+        counts = self.count_tokens_batch(
+            [title, description]
+            + [change.get("diff", "") for change in changes]
+            + [note.get("body", "") for note in notes]
+            + [commit.get("message", "") for commit in commits]
+        )
+
+        title_tokens, description_tokens = counts[0], counts[1]
+        offset = 2
 
         # Count tokens in changes (diffs)
-        changes_tokens = 0
-        for change in changes:
-            diff = change.get("diff", "")
-            changes_tokens += self.count_tokens(diff)
+        changes_tokens = sum(counts[offset:offset + len(changes)])
+        offset += len(changes)
 
         # Count tokens in notes
-        notes_tokens = 0
-        for note in notes:
-            body = note.get("body", "")
-            notes_tokens += self.count_tokens(body)
+        notes_tokens = sum(counts[offset:offset + len(notes)])
+        offset += len(notes)
 
         # Count tokens in commits
-        commits_tokens = 0
-        for commit in commits:
-            message = commit.get("message", "")
-            commits_tokens += self.count_tokens(message)
+        commits_tokens = sum(counts[offset:offset + len(commits)])
 
         total = (
             title_tokens
@@ -130,6 +379,61 @@ class TokenCounter:
             "total": total,
         }
 
+    def estimate_context_usage_fast(
+        self,
+        title: str,
+        description: str,
+        changes: List[Dict],
+        notes: List[Dict],
+        commits: List[Dict],
+    ) -> Dict[str, int]:
+        """
+        Estimate token usage for MR components without tokenizing.
+
+        Args:
+            title: MR title
+            description: MR description
+            changes: List of file changes
+            notes: List of discussion notes
+            commits: List of commits
+
+        Returns:
+            Same counts as estimate_context_usage (estimated), plus
+            "margin": error bound of "total" (worst case, errors summed)
+        """
+        margin = 0
+
+        def estimate(text: str, filepath: Optional[str] = None) -> int:
+            nonlocal margin
+            tokens, error = self.estimate_tokens(text, filepath)
+            margin += error
+            return tokens
+
+        title_tokens = estimate(title)
+        description_tokens = estimate(description)
+        changes_tokens = sum(
+            estimate(change.get("diff", ""), change.get("new_path") or change.get("old_path") or "")
+            for change in changes
+        )
+        notes_tokens = sum(estimate(note.get("body", "")) for note in notes)
+        commits_tokens = sum(estimate(commit.get("message", "")) for commit in commits)
+
+        return {
+            "title": title_tokens,
+            "description": description_tokens,
+            "changes": changes_tokens,
+            "notes": notes_tokens,
+            "commits": commits_tokens,
+            "total": (
+                title_tokens
+                + description_tokens
+                + changes_tokens
+                + notes_tokens
+                + commits_tokens
+            ),
+            "margin": margin,
+        }
+
     def truncate_to_token_limit(self, text: str, max_tokens: int) -> str:
         """
         Truncate text to fit within token limit.
@@ -144,13 +448,23 @@ class TokenCounter:
         if not text:
             return text
 
-        tokens = self.encoding.encode(text)
+        # Every token covers at least one UTF-8 byte, so short texts always fit
+        if len(text) <= max_tokens and len(text.encode("utf-8", "surrogatepass")) <= max_tokens:
+            return text
+
+        key = self._digest(text)
+        count = self._cached_count(key)
+        if count is not None and count <= max_tokens:
+            return text
+
+        # Reuses the encoding memoized by count_tokens() when available
+        tokens = self._encode(text, key)
 
         if len(tokens) <= max_tokens:
             return text
 
         # Truncate tokens and decode back to text
-        truncated_tokens = tokens[:max_tokens]
+        truncated_tokens = tokens[:max_tokens].tolist()
         truncated_text = self.encoding.decode(truncated_tokens)
 
         return truncated_text + "..."
@@ -172,5 +486,9 @@ def get_token_counter(model: str = "gpt-4") -> TokenCounter:
     """
     global _token_counter
     if _token_counter is None:
-        _token_counter = TokenCounter(model)
+        _token_counter = TokenCounter(
+            model,
+            max_cached_counts=settings.TOKEN_CACHE_MAX_ENTRIES,
+            max_cached_tokens=settings.TOKEN_CACHE_MAX_TOKENS,
+        )
     return _token_counter
@@ -6,7 +6,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
-from app.api.routes import auth, analyze, history
+from app.api.routes import auth, analyze, history, file_filters
 
 
 @asynccontextmanager
@@ -19,7 +19,13 @@ async def lifespan(app: FastAPI):
 
     yield
 
-    # Shutdown: Cleanup if needed
+    # Shutdown: Flush queued database writes, stop the worker pools
+    from app.core.db_writer import shutdown_db_writer
+    from app.services.gitlab_service import shutdown_gitlab_executor
+    from app.core.token_counter import shutdown_tokenizer_executor
+    await shutdown_db_writer()
+    shutdown_gitlab_executor()
+    shutdown_tokenizer_executor()
     print("[OK] Application shutdown")
 
 
@@ -43,6 +49,7 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(analyze.router, prefix="/api", tags=["Analysis"])
 app.include_router(history.router, prefix="/api", tags=["History"])
+app.include_router(file_filters.router, prefix="/api", tags=["File Filters"])
 
 
 @app.get("/")
@@ -3,5 +3,8 @@ Database models package.
 """
 from app.models.user import User
 from app.models.scan import Scan
+from app.models.file_summary import FileSummary
+from app.models.analysis_lease import AnalysisLease
+from app.models.file_filter_rule import FileFilterRule
 
-__all__ = ["User", "Scan"]
+__all__ = ["User", "Scan", "FileSummary", "AnalysisLease", "FileFilterRule"]
@@ -0,0 +1,19 @@
+"""
+Analysis lease model for coordinating summary generation across workers.
+"""
+from sqlalchemy import Column, String, DateTime
+from app.core.database import Base
+
+
+class AnalysisLease(Base):
+    """Lease held by the worker currently generating a summary."""
+
+    __tablename__ = "analysis_leases"
+
+    # "<project_id>:<mr_iid>:<sha>"
+    key = Column(String(255), primary_key=True)
+    owner = Column(String(64), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<AnalysisLease {self.key}>"
@@ -0,0 +1,23 @@
+"""
+File filter rule model for per-project analysis filters.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from datetime import datetime
+from app.core.database import Base
+
+
+class FileFilterRule(Base):
+    """Project-specific pattern of files to skip or always analyze."""
+
+    __tablename__ = "file_filter_rules"
+    __table_args__ = (UniqueConstraint("project_id", "pattern"),)
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    project_id = Column(Integer, nullable=False, index=True)
+    # Gitignore-style glob, e.g. "*.snap", "vendor/", "src/**/generated_*.ts"
+    pattern = Column(String(512), nullable=False)
+    action = Column(String(16), nullable=False)  # "skip" or "keep"
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<FileFilterRule {self.project_id} {self.action} {self.pattern}>"
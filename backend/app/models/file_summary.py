@@ -0,0 +1,21 @@
+"""
+File summary model for caching MAP-phase summaries of individual diffs.
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class FileSummary(Base):
+    """Content-addressed cache of per-file summaries."""
+
+    __tablename__ = "file_summaries"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    # sha256 of (prompt version, deployment, file path, diff text)
+    content_hash = Column(String(64), unique=True, nullable=False, index=True)
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<FileSummary {self.content_hash[:12]}>"
@@ -1,7 +1,7 @@
 """
 Scan model for storing MR analysis history and cache.
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
 from datetime import datetime
 from app.core.database import Base
 
@@ -10,14 +10,22 @@ class Scan(Base):
     """Scan table for MR analysis cache and history."""
 
     __tablename__ = "scans"
+    __table_args__ = (
+        # One scan per MR; also the cache lookup index
+        Index("uq_scans_project_mr", "project_id", "mr_iid", unique=True),
+        # History pages are keyset-paginated on (scanned_at, id)
+        Index("ix_scans_scanned_at_id", "scanned_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    project_id = Column(Integer, nullable=False, index=True)
-    mr_iid = Column(Integer, nullable=False, index=True)
+    project_id = Column(Integer, nullable=False)
+    mr_iid = Column(Integer, nullable=False)
     mr_url = Column(Text, nullable=False)
     title = Column(Text, nullable=False)
     last_commit_sha = Column(String(255), nullable=False, index=True)
     summary_markdown = Column(Text, nullable=False)
+    # Incremental updates applied since the last full summary
+    incremental_updates = Column(Integer, nullable=False, default=0, server_default="0")
     scanned_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     def __repr__(self):
@@ -36,6 +36,9 @@ class ScanHistoryItem(BaseModel):
     title: str
     scanned_at: datetime
     is_up_to_date: bool = Field(True, description="Whether scan is still current")
+    snippet: Optional[str] = Field(
+        None, description="Search match excerpt; matches wrapped in <mark></mark>, otherwise plain text"
+    )
 
     class Config:
         from_attributes = True
@@ -45,3 +48,4 @@ class HistoryResponse(BaseModel):
     """Response from history endpoint."""
     scans: list[ScanHistoryItem]
     total: int
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, if any")
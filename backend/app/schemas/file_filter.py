@@ -0,0 +1,25 @@
+"""
+Pydantic schemas for file filter endpoints.
+"""
+from pydantic import BaseModel, Field
+from typing import Literal
+
+
+class FileFilterRuleItem(BaseModel):
+    """Single project file filter rule."""
+    pattern: str = Field(..., min_length=1, max_length=512, description="Gitignore-style glob")
+    action: Literal["skip", "keep"] = Field("skip", description="Skip matching files, or analyze them")
+
+    class Config:
+        from_attributes = True
+
+
+class FileFilterRules(BaseModel):
+    """A project's file filter rules."""
+    project_id: int
+    rules: list[FileFilterRuleItem]
+
+
+class FileFilterRulesUpdate(BaseModel):
+    """Request to replace a project's file filter rules (later rules override earlier ones)."""
+    rules: list[FileFilterRuleItem] = Field(..., max_length=500)
@@ -0,0 +1,303 @@
+"""
+Context budget planner for direct MR summarization.
+Allocates the input token budget across the prompt sections and builds
+the user message in one pass.
+"""
+from typing import List, Dict, Optional, Tuple
+
+from app.core.diff_parser import get_file_diff
+from app.core.token_counter import TokenCounter
+
+
+class ContextBudgetPlanner:
+    """Builds the direct summarization prompt within a token budget."""
+
+    DESCRIPTION_MAX_TOKENS = 2000
+    MAX_COMMITS = 20
+    MAX_NOTES = 10
+    NOTE_MAX_CHARS = 300
+    # Files that can't get this many diff tokens are left out rather than shredded
+    MIN_DIFF_TOKENS = 200
+    # Upper bounds of the scaffolding around the sections (headings,
+    # instructions), around each diff (heading, code fence; path aside)
+    # and around each note (bullet, bold; author aside) or commit (bullet)
+    STRUCTURE_TOKENS = 64
+    FILE_WRAPPER_TOKENS = 16
+    NOTE_WRAPPER_TOKENS = 8
+    COMMIT_WRAPPER_TOKENS = 2
+
+    def __init__(self, token_counter: TokenCounter):
+        """
+        Initialize planner.
+
+        Args:
+            token_counter: Token counter (memoized, thread-safe)
+        """
+        self.token_counter = token_counter
+
+    def plan(
+        self,
+        title: str,
+        description: str,
+        changes: List[Dict],
+        notes: List[Dict],
+        commits: List[Dict],
+        budget: int,
+    ) -> Dict:
+        """
+        Allocate the budget and build the user message.
+
+        Title, description (capped), commit titles, notes and instructions
+        are counted first; the remaining budget goes to the diffs. Every
+        diff gets the same cap (water-filling), so small diffs are kept
+        whole and only the largest ones are truncated. If even
+        MIN_DIFF_TOKENS per file doesn't fit, trailing files are omitted.
+
+        Token usage is tracked per section from exact counts of the parts
+        actually sent. This is CPU-bound; run it in the tokenizer pool.
+
+        Args:
+            title: MR title
+            description: MR description
+            changes: File changes
+            notes: Discussion notes
+            commits: Commits
+            budget: Tokens available for the user message
+
+        Returns:
+            Dictionary with:
+            - "message": Formatted user message
+            - "tokens": Tokens used (sum of the sections)
+            - "decisions": {"budget", "used", "sections", "diff_token_cap",
+              "files_included", "files_truncated", "files_omitted",
+              "description_truncated", "complete"}
+        """
+        counter = self.token_counter
+
+        description = description or "No description provided"
+        description_tokens = counter.count_tokens(description)
+        description_truncated = description_tokens > self.DESCRIPTION_MAX_TOKENS
+        if description_truncated:
+            description = counter.truncate_to_token_limit(description, self.DESCRIPTION_MAX_TOKENS)
+            description_tokens = self.DESCRIPTION_MAX_TOKENS + 1  # "..."
+
+        texts = self._section_texts(title, notes, commits)
+        file_diffs = [get_file_diff(change) for change in changes]
+        paths = [file_diff.path for file_diff in file_diffs]
+        diffs = [file_diff.text for file_diff in file_diffs]
+        openers = [_file_opener(filepath) for filepath in paths]
+
+        # One batch for everything else (diff counts are usually memoized)
+        counts = counter.count_tokens_batch(list(texts.values()) + openers + diffs)
+        fixed = dict(zip(texts, counts))
+        opener_tokens = counts[len(texts):len(texts) + len(changes)]
+        diff_tokens = counts[len(texts) + len(changes):]
+
+        sections = {
+            "structure": (
+                fixed["header"] + fixed["changes_heading"] + fixed["commits_heading"]
+                + fixed["notes_heading"] + fixed["instructions"]
+            ),
+            "description": description_tokens,
+            "commits": fixed["commits"],
+            "notes": fixed["notes"],
+        }
+        remaining = budget - sum(sections.values())
+
+        # Include files in order while each can still get MIN_DIFF_TOKENS
+        wrapper_tokens = [tokens + fixed["closer"] for tokens in opener_tokens]
+        included = 0
+        reserved = 0
+        for wrapper, tokens in zip(wrapper_tokens, diff_tokens):
+            cost = wrapper + min(tokens, self.MIN_DIFF_TOKENS)
+            if reserved + cost > remaining:
+                break
+            reserved += cost
+            included += 1
+
+        cap = _water_fill_cap(
+            diff_tokens[:included],
+            remaining - sum(wrapper_tokens[:included]),
+        )
+
+        files = []
+        files_truncated = []
+        diff_section_tokens = 0
+        for i in range(included):
+            diff = diffs[i]
+            tokens = diff_tokens[i]
+            if cap is not None and tokens > cap:
+                diff = counter.truncate_to_token_limit(diffs[i], max(cap - 1, 0))
+                tokens = cap  # Truncated prefix + "..."
+                files_truncated.append(paths[i])
+            files.append((paths[i], diff))
+            diff_section_tokens += wrapper_tokens[i] + tokens
+
+        sections["diffs"] = diff_section_tokens
+        used = sum(sections.values())
+        files_omitted = paths[included:]
+
+        return {
+            "message": _assemble(texts, description, files),
+            "tokens": used,
+            "decisions": {
+                "budget": budget,
+                "used": used,
+                "sections": sections,
+                "diff_token_cap": cap,
+                "files_included": included,
+                "files_truncated": files_truncated,
+                "files_omitted": files_omitted,
+                "description_truncated": description_truncated,
+                "complete": not files_truncated and not files_omitted,
+            },
+        }
+
+    def fits_by_estimate(
+        self,
+        token_estimate: Dict[str, int],
+        changes: List[Dict],
+        notes: List[Dict],
+        commits: List[Dict],
+        budget: int,
+    ) -> bool:
+        """
+        Check whether the whole prompt surely fits, from size estimates alone.
+
+        Args:
+            token_estimate: TokenCounter.estimate_context_usage_fast() result
+                            (full texts; the message sends less of notes
+                            and commits, so those are overestimated)
+            changes: File changes
+            notes: Discussion notes
+            commits: Commits
+            budget: Tokens available for the user message
+
+        Returns:
+            True if even the estimates' upper bounds fit the budget
+        """
+        counter = self.token_counter
+
+        def upper(text: str) -> int:
+            tokens, error = counter.estimate_tokens(text)
+            return tokens + error
+
+        wrappers = sum(
+            upper(get_file_diff(change).path) + self.FILE_WRAPPER_TOKENS
+            for change in changes
+        )
+        wrappers += sum(
+            upper(note.get("author", "Unknown")) + self.NOTE_WRAPPER_TOKENS
+            for note in notes[:self.MAX_NOTES]
+        )
+        wrappers += self.COMMIT_WRAPPER_TOKENS * min(len(commits), self.MAX_COMMITS)
+
+        upper_bound = (
+            token_estimate["total"] + token_estimate["margin"]
+            + self.STRUCTURE_TOKENS + wrappers
+        )
+        return upper_bound <= budget
+
+    def build_message(
+        self,
+        title: str,
+        description: str,
+        changes: List[Dict],
+        notes: List[Dict],
+        commits: List[Dict],
+    ) -> str:
+        """
+        Build the user message with every diff whole, without a budget.
+
+        For MRs that fits_by_estimate() accepted: diffs aren't tokenized;
+        only a long description is (to cap it like plan() does).
+
+        Args:
+            title: MR title
+            description: MR description
+            changes: File changes
+            notes: Discussion notes
+            commits: Commits
+
+        Returns:
+            Formatted user message
+        """
+        description = self.token_counter.truncate_to_token_limit(
+            description or "No description provided", self.DESCRIPTION_MAX_TOKENS
+        )
+        files = [
+            (file_diff.path, file_diff.text)
+            for file_diff in map(get_file_diff, changes)
+        ]
+        return _assemble(self._section_texts(title, notes, commits), description, files)
+
+    def _section_texts(self, title: str, notes: List[Dict], commits: List[Dict]) -> Dict[str, str]:
+        """Fixed texts of the message (everything but the description and diffs)."""
+        return {
+            "header": f"# Merge Request: {title}\n\n## Description\n",
+            "changes_heading": "\n\n## File Changes\n",
+            "commits_heading": "\n\n## Commits\n",
+            "notes_heading": "\n\n## Discussion\n",
+            "instructions": "\n\nAnalyze this merge request and provide a comprehensive technical summary.",
+            "closer": "\n```\n",
+            "commits": "\n".join(
+                f"- {commit.get('title', '')}"
+                for commit in commits[:self.MAX_COMMITS]
+            ),
+            "notes": "\n".join(
+                f"- **{note.get('author', 'Unknown')}**: {note.get('body', '')[:self.NOTE_MAX_CHARS]}"
+                for note in notes[:self.MAX_NOTES]
+            ) or "No discussions",
+        }
+
+
+def _file_opener(filepath: str) -> str:
+    """Heading and opening code fence of one file's diff."""
+    return f"\n### {filepath}\n```diff\n"
+
+
+def _assemble(texts: Dict[str, str], description: str, files: List[Tuple[str, str]]) -> str:
+    """
+    Join the message in one pass.
+
+    Args:
+        texts: Fixed texts from _section_texts()
+        description: Description (already capped)
+        files: (path, diff) of the included files, in order
+
+    Returns:
+        User message
+    """
+    parts = [texts["header"], description, texts["changes_heading"]]
+    for filepath, diff in files:
+        parts.extend((_file_opener(filepath), diff, texts["closer"]))
+    parts.extend((
+        texts["commits_heading"], texts["commits"],
+        texts["notes_heading"], texts["notes"],
+        texts["instructions"],
+    ))
+    return "".join(parts)
+
+
+def _water_fill_cap(sizes: List[int], available: int) -> Optional[int]:
+    """
+    Find the largest per-item cap so that sum(min(size, cap)) <= available.
+
+    Args:
+        sizes: Item sizes
+        available: Total budget
+
+    Returns:
+        The cap, or None if every item fits whole
+    """
+    if sum(sizes) <= available:
+        return None
+
+    remaining_items = len(sizes)
+    for size in sorted(sizes):
+        if size * remaining_items > available:
+            return max(available // remaining_items, 0)
+        available -= size
+        remaining_items -= 1
+
+    return None
@@ -0,0 +1,399 @@
+"""
+Diff compression before prompt building.
+Rewrites parsed diffs so they carry the same changes in fewer tokens:
+unchanged context is trimmed, whitespace-only and moved hunks are
+collapsed and hunks repeated across files are replaced by a reference.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.diff_parser import ADDED, REMOVED, CONTEXT, NO_NEWLINE, FileDiff, Hunk, get_file_diff
+from app.core.token_counter import TokenCounter, get_token_counter, run_in_tokenizer_pool
+
+# Rewrites one hunk; returns its new text, or None to keep it as-is
+HunkRewriter = Callable[[FileDiff, Hunk], Optional[str]]
+
+# Files where a change of indentation changes meaning
+_INDENT_SIGNIFICANT_SUFFIXES = (".py", ".pyi", ".yaml", ".yml", ".mk")
+_INDENT_SIGNIFICANT_NAMES = {"makefile", "gnumakefile"}
+
+
+class DiffCompressor:
+    """Runs the compression steps over a list of changes."""
+
+    def __init__(
+        self,
+        token_counter: TokenCounter,
+        context_lines: int,
+        min_collapse_lines: int,
+    ):
+        """
+        Initialize compressor.
+
+        Args:
+            token_counter: Token counter (memoized, thread-safe)
+            context_lines: Unchanged lines kept before and after each change
+            min_collapse_lines: Smallest moved or repeated block (in changed
+                                lines) replaced by a note
+        """
+        self.token_counter = token_counter
+        self.context_lines = context_lines
+        self.min_collapse_lines = min_collapse_lines
+
+    def compress(self, changes: List[Dict]) -> Tuple[List[Dict], Dict]:
+        """
+        Compress the diffs of a list of changes.
+
+        Steps run in order (each sees the output of the previous one):
+        1. "context": unchanged lines beyond context_lines of a change
+           (splits hunks at the gaps, so later steps work on single edits)
+        2. "whitespace": hunks whose changes are whitespace-only
+        3. "moves": removed blocks re-added unchanged elsewhere in the MR
+        4. "duplicates": hunks identical to an earlier one in the MR
+
+        Collapsed hunks keep their "@@" header with a short note, so the
+        model still sees where something happened. Notes never name other
+        files or their line numbers: a file's compressed diff is part of
+        its summary cache key, which must not change when an unrelated
+        file does. The input changes are not modified. This is CPU-bound;
+        run it in the tokenizer pool.
+
+        A hunk collapsed against another file only makes sense when both
+        files are in the same prompt. Each change therefore also gets a
+        "standalone" diff, where moves and duplicates are only collapsed
+        within the file, for summarizing the file on its own (MAP phase).
+
+        Args:
+            changes: Change dictionaries
+
+        Returns:
+            Tuple of (changes, report)
+            - changes: Copies of the changes with compressed "diff"/"parsed"
+              and "standalone" (FileDiff without cross-file collapses)
+            - report: {"tokens_before", "tokens_after", "saved": {step: tokens}}
+              (estimated token counts, see _estimate)
+        """
+        file_diffs = [get_file_diff(change) for change in changes]
+        tokens = self._estimate(file_diffs)
+        report = {"tokens_before": tokens, "tokens_after": tokens, "saved": {}}
+
+        steps = [
+            ("context", self._context_step),
+            ("whitespace", self._whitespace_step),
+            ("moves", self._moves_step),
+            ("duplicates", self._duplicates_step),
+        ]
+        standalone = file_diffs
+        for name, step in steps:
+            file_diffs = step(file_diffs)
+            if name in ("context", "whitespace"):
+                standalone = file_diffs
+            step_tokens = self._estimate(file_diffs)
+            report["saved"][name] = tokens - step_tokens
+            tokens = step_tokens
+
+        report["tokens_after"] = tokens
+
+        # Moves and duplicates again, one file at a time
+        standalone = [
+            self._duplicates_step(self._moves_step([file_diff]))[0]
+            for file_diff in standalone
+        ]
+
+        compressed = [
+            {**change, "diff": file_diff.text, "parsed": file_diff, "standalone": standalone_diff}
+            for change, file_diff, standalone_diff in zip(changes, file_diffs, standalone)
+        ]
+        return compressed, report
+
+    async def compress_async(self, changes: List[Dict]) -> List[Dict]:
+        """
+        Compress changes in the tokenizer pool and log the savings.
+
+        Args:
+            changes: Change dictionaries
+
+        Returns:
+            Compressed copies of the changes
+        """
+        compressed, report = await run_in_tokenizer_pool(self.compress, changes)
+
+        saved = report["tokens_before"] - report["tokens_after"]
+        steps = ", ".join(f"{name} -{tokens}" for name, tokens in report["saved"].items())
+        print(
+            f"[INFO] Diff compression: ~{report['tokens_before']} -> "
+            f"~{report['tokens_after']} tokens (saved ~{saved}: {steps})"
+        )
+        return compressed
+
+    def _estimate(self, file_diffs: List[FileDiff]) -> int:
+        """
+        Estimated total tokens of the diff texts.
+
+        The report only needs rough savings; exact counting would encode
+        every diff once per step, before the strategy is even chosen.
+        """
+        return sum(
+            self.token_counter.estimate_tokens(file_diff.text, file_diff.path)[0]
+            for file_diff in file_diffs
+        )
+
+    def _context_step(self, file_diffs: List[FileDiff]) -> List[FileDiff]:
+        """Keep only context_lines unchanged lines around changes, splitting hunks at gaps."""
+        def rewrite(file_diff: FileDiff, hunk: Hunk) -> Optional[str]:
+            if not hunk.added and not hunk.removed:
+                return None
+            return _trim_context(file_diff, hunk, self.context_lines)
+
+        return [_rewrite_hunks(file_diff, rewrite) for file_diff in file_diffs]
+
+    def _whitespace_step(self, file_diffs: List[FileDiff]) -> List[FileDiff]:
+        """
+        Collapse hunks whose added and removed lines differ only in whitespace.
+
+        Lines are compared with runs of whitespace normalized to one space
+        (so "return x" -> "returnx" is a real change) and blank lines
+        ignored. Indentation changes count as real changes in files where
+        indentation is syntax (Python, YAML, Makefiles).
+        """
+        def rewrite(file_diff: FileDiff, hunk: Hunk) -> Optional[str]:
+            if not hunk.added and not hunk.removed:
+                return None
+            keep_indent = _indent_significant(file_diff.path)
+            removed, added = _changed_lines(file_diff, hunk)
+            if _normalized(removed, keep_indent) != _normalized(added, keep_indent):
+                return None
+            return _collapsed(hunk, f"whitespace-only change, {hunk.added + hunk.removed} lines")
+
+        return [_rewrite_hunks(file_diff, rewrite) for file_diff in file_diffs]
+
+    def _moves_step(self, file_diffs: List[FileDiff]) -> List[FileDiff]:
+        """Collapse pure-removal hunks re-added (indentation aside) elsewhere in the MR."""
+        # Pure-addition hunks by normalized content
+        additions: Dict[Tuple[str, ...], List[Tuple[int, Hunk]]] = {}
+        for index, file_diff in enumerate(file_diffs):
+            for hunk in file_diff.hunks:
+                if hunk.removed or hunk.added < self.min_collapse_lines:
+                    continue
+                key = _block_key(_changed_lines(file_diff, hunk)[1])
+                if key:
+                    additions.setdefault(key, []).append((index, hunk))
+
+        notes: List[Dict[int, str]] = [{} for _ in file_diffs]  # Per file: id(hunk) -> note
+        for index, file_diff in enumerate(file_diffs):
+            for hunk in file_diff.hunks:
+                if hunk.added or hunk.removed < self.min_collapse_lines:
+                    continue
+                candidates = additions.get(_block_key(_changed_lines(file_diff, hunk)[0]))
+                if not candidates:
+                    continue
+                target_index, target = candidates.pop(0)
+                if target_index == index:
+                    notes[index][id(hunk)] = f"{hunk.removed} lines moved to line {target.new_start}"
+                    notes[index][id(target)] = f"{target.added} lines moved from line {hunk.old_start}"
+                else:
+                    notes[index][id(hunk)] = f"{hunk.removed} lines moved to another file"
+                    notes[target_index][id(target)] = f"{target.added} lines moved from another file"
+
+        result = []
+        for file_diff, file_notes in zip(file_diffs, notes):
+            if file_notes:
+                file_diff = _rewrite_hunks(
+                    file_diff,
+                    lambda _, hunk, file_notes=file_notes: (
+                        _collapsed(hunk, file_notes[id(hunk)]) if id(hunk) in file_notes else None
+                    ),
+                )
+            result.append(file_diff)
+        return result
+
+    def _duplicates_step(self, file_diffs: List[FileDiff]) -> List[FileDiff]:
+        """Replace hunks identical to an earlier one by a reference to it."""
+        # Hunk body -> (file diff, new start line) where it first appeared
+        seen: Dict[str, Tuple[FileDiff, int]] = {}
+
+        def rewrite(file_diff: FileDiff, hunk: Hunk) -> Optional[str]:
+            if hunk.added + hunk.removed < self.min_collapse_lines:
+                return None
+            body = file_diff.text[
+                file_diff.line_starts[hunk.first_line + 1]:file_diff.line_starts[hunk.end_line]
+            ]
+            first = seen.get(body)
+            if first is None:
+                seen[body] = (file_diff, hunk.new_start)
+                return None
+            if first[0] is file_diff:
+                return _collapsed(hunk, f"same change as at line {first[1]}")
+            return _collapsed(hunk, "same change as in another file")
+
+        return [_rewrite_hunks(file_diff, rewrite) for file_diff in file_diffs]
+
+
+def _rewrite_hunks(file_diff: FileDiff, rewrite: HunkRewriter) -> FileDiff:
+    """
+    Apply a hunk rewriter to every hunk of a file diff.
+
+    Args:
+        file_diff: Parsed file diff
+        rewrite: Function returning a hunk's new text, or None to keep it
+
+    Returns:
+        The same FileDiff if nothing changed, otherwise a re-parsed one
+    """
+    parts = []
+    position = 0
+    for hunk in file_diff.hunks:
+        replacement = rewrite(file_diff, hunk)
+        if replacement is None:
+            continue
+        parts.append(file_diff.text[position:file_diff.line_starts[hunk.first_line]])
+        parts.append(replacement)
+        position = file_diff.line_starts[hunk.end_line]
+
+    if not parts:
+        return file_diff
+
+    parts.append(file_diff.text[position:])
+    return FileDiff(
+        "".join(parts),
+        old_path=file_diff.old_path,
+        new_path=file_diff.new_path,
+        new_file=file_diff.new_file,
+        renamed_file=file_diff.renamed_file,
+        deleted_file=file_diff.deleted_file,
+    )
+
+
+def _trim_context(file_diff: FileDiff, hunk: Hunk, context_lines: int) -> Optional[str]:
+    """
+    Rebuild a hunk keeping only the context near its changes.
+
+    Args:
+        file_diff: Parsed file diff
+        hunk: Hunk with at least one change
+        context_lines: Unchanged lines kept before and after each change
+
+    Returns:
+        New text (one hunk per run of kept lines), or None if nothing is trimmed
+    """
+    kinds = file_diff.line_kinds
+    first, end = hunk.first_line + 1, hunk.end_line
+
+    # Mark lines within context_lines of a change
+    keep = bytearray(end - first)
+    for i in range(first, end):
+        if kinds[i] == ADDED or kinds[i] == REMOVED:
+            lo = max(first, i - context_lines)
+            hi = min(end, i + context_lines + 1)
+            keep[lo - first:hi - first] = b"\x01" * (hi - lo)
+        elif kinds[i] == NO_NEWLINE and i > first and keep[i - 1 - first]:
+            keep[i - first] = 1
+    if all(keep):
+        return None
+
+    # One hunk per run of kept lines, with recomputed line numbers
+    parts = []
+    old_line, new_line = hunk.old_start, hunk.new_start
+    run_start = None
+    for i in range(first, end):
+        kind = kinds[i]
+        if keep[i - first]:
+            if run_start is None:
+                run_start, run_old, run_new = i, old_line, new_line
+                old_count = new_count = 0
+            old_count += kind == CONTEXT or kind == REMOVED
+            new_count += kind == CONTEXT or kind == ADDED
+        elif run_start is not None:
+            parts.append(_hunk_header(run_old, old_count, run_new, new_count, hunk.section))
+            parts.append(file_diff.text[file_diff.line_starts[run_start]:file_diff.line_starts[i]])
+            run_start = None
+        old_line += kind == CONTEXT or kind == REMOVED
+        new_line += kind == CONTEXT or kind == ADDED
+
+    if run_start is not None:
+        parts.append(_hunk_header(run_old, old_count, run_new, new_count, hunk.section))
+        parts.append(file_diff.text[file_diff.line_starts[run_start]:file_diff.line_starts[end]])
+
+    return "".join(parts)
+
+
+def _hunk_header(old_start: int, old_count: int, new_start: int, new_count: int, section: str) -> str:
+    """Format a "@@" line; empty sides point at the line before, as diff does."""
+    if not old_count:
+        old_start -= 1
+    if not new_count:
+        new_start -= 1
+    header = f"@@ -{old_start},{old_count} +{new_start},{new_count} @@"
+    return f"{header} {section}\n" if section else f"{header}\n"
+
+
+def _collapsed(hunk: Hunk, note: str) -> str:
+    """Header-only replacement for a hunk, with a note on what was left out."""
+    section = f"{hunk.section} [{note}]" if hunk.section else f"[{note}]"
+    return f"@@ -{hunk.old_start},{hunk.old_count} +{hunk.new_start},{hunk.new_count} @@ {section}\n"
+
+
+def _changed_lines(file_diff: FileDiff, hunk: Hunk) -> Tuple[List[str], List[str]]:
+    """Removed and added lines of a hunk, without their +/- markers."""
+    removed, added = [], []
+    for i in range(hunk.first_line + 1, hunk.end_line):
+        kind = file_diff.line_kinds[i]
+        if kind == REMOVED:
+            removed.append(file_diff.line(i)[1:])
+        elif kind == ADDED:
+            added.append(file_diff.line(i)[1:])
+    return removed, added
+
+
+def _normalized(lines: List[str], keep_indent: bool) -> List[str]:
+    """
+    Non-blank lines with whitespace runs collapsed to one space.
+
+    Args:
+        lines: Lines without +/- markers
+        keep_indent: Keep each line's leading whitespace as-is
+
+    Returns:
+        Normalized lines
+    """
+    result = []
+    for line in lines:
+        words = line.split()
+        if not words:
+            continue
+        indent = line[:len(line) - len(line.lstrip())] if keep_indent else ""
+        result.append(indent + " ".join(words))
+    return result
+
+
+def _indent_significant(path: str) -> bool:
+    """True if indentation is part of the syntax of a file."""
+    name = path.rsplit("/", 1)[-1].lower()
+    return name in _INDENT_SIGNIFICANT_NAMES or name.endswith(_INDENT_SIGNIFICANT_SUFFIXES)
+
+
+def _block_key(lines: List[str]) -> Optional[Tuple[str, ...]]:
+    """Indentation-insensitive key of a block, or None if it is blank."""
+    key = tuple(line.strip() for line in lines)
+    return key if any(key) else None
+
+
+# Global instance
+_diff_compressor = None
+
+
+def get_diff_compressor() -> DiffCompressor:
+    """
+    Get or create global DiffCompressor instance.
+
+    Returns:
+        DiffCompressor instance
+    """
+    global _diff_compressor
+    if _diff_compressor is None:
+        _diff_compressor = DiffCompressor(
+            get_token_counter(),
+            context_lines=settings.DIFF_CONTEXT_LINES,
+            min_collapse_lines=settings.DIFF_MIN_COLLAPSE_LINES,
+        )
+    return _diff_compressor
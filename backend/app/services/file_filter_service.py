@@ -0,0 +1,83 @@
+"""
+File filter service for database operations.
+Stores per-project skip/keep rules and builds the compiled filter used
+to leave files out of an analysis.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
+from typing import Dict, List, Optional
+
+from app.core.db_writer import run_write
+from app.core.file_filter import FileFilter, get_file_filter
+from app.models.file_filter_rule import FileFilterRule
+
+
+async def get_project_rules(
+    db: AsyncSession,
+    project_id: int
+) -> List[FileFilterRule]:
+    """Get the filter rules of a project, in creation order."""
+    result = await db.execute(
+        select(FileFilterRule)
+        .where(FileFilterRule.project_id == project_id)
+        .order_by(FileFilterRule.id)
+    )
+    return list(result.scalars().all())
+
+
+async def replace_project_rules(
+    db: AsyncSession,
+    project_id: int,
+    rules: List[Dict[str, str]]
+) -> List[FileFilterRule]:
+    """
+    Replace the filter rules of a project (committed through the
+    database writer).
+
+    Args:
+        rules: List of {"pattern": str, "action": "skip" | "keep"}, in
+               precedence order (a later matching rule wins; duplicate
+               patterns keep the last action, at the last position)
+
+    Returns:
+        The stored rules
+    """
+    unique: Dict[str, str] = {}
+    for rule in rules:
+        pattern = rule["pattern"].strip()
+        if pattern:
+            # Re-insert so a repeated pattern takes its last position
+            unique.pop(pattern, None)
+            unique[pattern] = rule["action"]
+
+    async def write(session: AsyncSession) -> List[FileFilterRule]:
+        await session.execute(
+            delete(FileFilterRule).where(FileFilterRule.project_id == project_id)
+        )
+        session.add_all([
+            FileFilterRule(project_id=project_id, pattern=pattern, action=action)
+            for pattern, action in unique.items()
+        ])
+        await session.flush()
+        return await get_project_rules(session, project_id)
+
+    return await run_write(db, write)
+
+
+async def load_file_filter(
+    db: AsyncSession,
+    project_id: int,
+    gitattributes: Optional[str] = None
+) -> FileFilter:
+    """
+    Build the filter for a project: defaults, .gitattributes, project rules
+    (later ones override earlier ones).
+
+    Compiled filters are cached per distinct rule set, so this costs one
+    small query per analysis.
+    """
+    rules = await get_project_rules(db, project_id)
+    return get_file_filter(
+        project_rules=tuple((rule.pattern, rule.action) for rule in rules),
+        gitattributes=gitattributes or None,
+    )
@@ -0,0 +1,96 @@
+"""
+File summary service for database operations.
+Content-addressed cache for MAP-phase file summaries, so a diff that has
+been summarized once is never sent to the LLM again.
+"""
+import hashlib
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Dict, List
+
+from app.core.database import dialect_insert
+from app.core.db_writer import run_write
+from app.models.file_summary import FileSummary
+
+# Keys per IN (...) query, well below SQLite's bound-parameter limit
+_LOOKUP_BATCH_SIZE = 500
+# Rows per multi-row INSERT (3 parameters each)
+_INSERT_BATCH_SIZE = 150
+
+
+def compute_summary_key(
+    filepath: str, diff: str, prompt_version: str, deployment: str
+) -> str:
+    """
+    Compute the cache key for a file summary.
+
+    Any change to the path, the diff text, the prompt or the model
+    deployment yields a different key.
+    """
+    digest = hashlib.sha256()
+    for part in (prompt_version, deployment, filepath, diff):
+        digest.update(part.encode("utf-8", errors="replace"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def get_file_summaries(
+    db: AsyncSession,
+    keys: List[str]
+) -> Dict[str, str]:
+    """
+    Look up cached summaries for the given keys.
+
+    Returns:
+        Mapping of key -> summary for keys that are cached
+    """
+    found: Dict[str, str] = {}
+    unique_keys = list(dict.fromkeys(keys))
+
+    for start in range(0, len(unique_keys), _LOOKUP_BATCH_SIZE):
+        batch = unique_keys[start:start + _LOOKUP_BATCH_SIZE]
+        result = await db.execute(
+            select(FileSummary.content_hash, FileSummary.summary).where(
+                FileSummary.content_hash.in_(batch)
+            )
+        )
+        found.update({row.content_hash: row.summary for row in result})
+
+    return found
+
+
+async def store_file_summaries(
+    db: AsyncSession,
+    summaries: Dict[str, str]
+) -> int:
+    """
+    Store new file summaries, skipping keys that already exist.
+
+    Concurrent analyses may store the same key; INSERT ... ON CONFLICT
+    DO NOTHING keeps the first. Committed through the database writer.
+
+    Returns:
+        Number of summaries stored
+    """
+    if not summaries:
+        return 0
+
+    rows = [
+        {"content_hash": key, "summary": summary, "created_at": datetime.utcnow()}
+        for key, summary in summaries.items()
+    ]
+
+    async def write(session: AsyncSession) -> int:
+        insert = dialect_insert(session)
+        stored = 0
+        for start in range(0, len(rows), _INSERT_BATCH_SIZE):
+            result = await session.execute(
+                insert(FileSummary)
+                .values(rows[start:start + _INSERT_BATCH_SIZE])
+                .on_conflict_do_nothing(index_elements=[FileSummary.content_hash])
+            )
+            stored += max(result.rowcount, 0)
+        return stored
+
+    return await run_write(db, write)
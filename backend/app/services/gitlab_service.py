@@ -1,11 +1,480 @@
 """
 GitLab API service for fetching merge request data.
+
+python-gitlab is synchronous, so every call into it is dispatched to a
+bounded thread pool to keep the event loop free while GitLab responds.
 """
-from typing import Optional, Dict, List
+import asyncio
+import functools
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Callable, Any, Awaitable, Tuple
+from urllib.parse import quote
 import gitlab
-from gitlab.exceptions import GitlabError
+import requests
+from gitlab.exceptions import GitlabError, GitlabHttpError
+from gitlab.v4.objects import ProjectMergeRequest
 
 from app.core.config import settings
+from app.core.diff_parser import FileDiff
+
+
+# Failures of a GitLab call: API errors, and network errors (connection,
+# timeout) that python-gitlab passes through from requests
+_REQUEST_ERRORS = (GitlabError, requests.RequestException)
+
+# Shared worker pool for blocking python-gitlab calls (created lazily)
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_gitlab_executor() -> ThreadPoolExecutor:
+    """
+    Get or create the shared thread pool for GitLab API calls.
+
+    The pool is bounded by GITLAB_MAX_WORKERS, which also caps the number
+    of concurrent requests this worker process sends to GitLab.
+
+    Returns:
+        ThreadPoolExecutor instance
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.GITLAB_MAX_WORKERS,
+            thread_name_prefix="gitlab",
+        )
+    return _executor
+
+
+# MR metadata cache for conditional revalidation:
+# (token digest, project path, MR IID) -> {"attrs": dict, "etag": str, "fetched_at": float}
+# Keyed per user token so a cached MR is never served to someone without access.
+_mr_cache: "OrderedDict[Tuple[str, str, int], Dict]" = OrderedDict()
+
+# Background revalidations in flight (keys), and their task references
+_revalidating: set = set()
+_background_tasks: set = set()
+
+
+def shutdown_gitlab_executor():
+    """Shut down the GitLab thread pool (called on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _fetch_concurrently(
+    fetches: Dict[str, Awaitable], deadline: float
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run named fetches concurrently under one shared deadline.
+
+    A fetch that raises or is still running when the deadline expires
+    yields None instead of failing the whole batch.
+
+    Args:
+        fetches: Mapping of name -> awaitable
+        deadline: Seconds to wait for all fetches combined
+
+    Returns:
+        Tuple of (results, timings)
+        - results: name -> fetch result (None if failed or timed out)
+        - timings: name -> elapsed milliseconds
+    """
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    async def timed(name: str, awaitable: Awaitable) -> Any:
+        try:
+            return await awaitable
+        finally:
+            timings[name] = (time.perf_counter() - start) * 1000
+
+    tasks = {
+        name: asyncio.create_task(timed(name, awaitable))
+        for name, awaitable in fetches.items()
+    }
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+
+    for task in pending:
+        task.cancel()
+
+    results: Dict[str, Any] = {}
+    for name, task in tasks.items():
+        if task in pending:
+            print(f"[ERROR] GitLab fetch '{name}' exceeded {deadline}s deadline")
+            results[name] = None
+        elif task.exception() is not None:
+            print(f"[ERROR] GitLab fetch '{name}' failed: {task.exception()}")
+            results[name] = None
+        else:
+            results[name] = task.result()
+
+    # Snapshot in fetch order; timed-out fetches report the deadline
+    elapsed = {name: timings.get(name, deadline * 1000) for name in tasks}
+    return results, elapsed
+
+
+class MergeRequestContext:
+    """
+    Request-scoped handle on a single merge request.
+
+    The MR is resolved from GitLab once (one API call, via a lazy project
+    reference), and metadata, changes, notes and commits are all served
+    from that one handle instead of re-resolving the project and MR for
+    every piece of data.
+    """
+
+    def __init__(
+        self,
+        service: "GitLabService",
+        project_path: str,
+        mr,
+        from_cache: bool = False,
+    ):
+        """
+        Initialize context from an already fetched MR object.
+
+        Args:
+            service: GitLabService that resolved the MR
+            project_path: Full project path
+            mr: python-gitlab ProjectMergeRequest object
+            from_cache: True if served from the metadata cache without
+                        contacting GitLab (metadata may be a few seconds old)
+        """
+        self.service = service
+        self.project_path = project_path
+        self.mr = mr
+        self.from_cache = from_cache
+        self.metadata = self._build_metadata(mr)
+
+    @staticmethod
+    def _build_metadata(mr) -> Dict:
+        """
+        Convert a python-gitlab MR object into the metadata dictionary.
+
+        Args:
+            mr: python-gitlab ProjectMergeRequest object
+
+        Returns:
+            Metadata dictionary (see GitLabService.get_merge_request)
+        """
+        return {
+            "iid": mr.iid,
+            "title": mr.title,
+            "description": mr.description or "",
+            "state": mr.state,
+            "author": mr.author.get("name", "Unknown"),
+            "source_branch": mr.source_branch,
+            "target_branch": mr.target_branch,
+            "sha": mr.sha,  # Latest commit SHA for cache invalidation
+            "updated_at": mr.updated_at,
+            "web_url": mr.web_url,
+            "project_id": mr.project_id,
+        }
+
+    @property
+    def label(self) -> str:
+        """Human-readable MR reference for log messages."""
+        return f"{self.project_path}!{self.mr.iid}"
+
+    async def get_changes(self) -> Optional[List[Dict]]:
+        """
+        Get merge request diffs/changes.
+
+        Returns:
+            List of change dictionaries (see GitLabService.get_merge_request_changes)
+            Returns None if unable to fetch changes.
+        """
+        try:
+            # Get changes (diffs), parsed in the worker thread
+            return await self.service._run(self._load_changes)
+        except _REQUEST_ERRORS as e:
+            print(f"[ERROR] Failed to get changes for MR {self.label}: {e}")
+            return None
+
+    async def get_compare(self, from_sha: str) -> Optional[Dict]:
+        """
+        Get the diff between an earlier commit and the current MR head.
+
+        Used for incremental re-summarization: only what changed since
+        the last analyzed commit is fetched.
+
+        Args:
+            from_sha: Earlier commit SHA (e.g. the last analyzed head)
+
+        Returns:
+            Dictionary containing:
+            {
+                "changes": [...],  # Change dictionaries, same shape as get_changes()
+                "commits": [...]   # Commits between from_sha and head
+            }
+            Returns None if unable to fetch the comparison.
+        """
+        try:
+            project = self.service.client.projects.get(self.project_path, lazy=True)
+            compare, changes = await self.service._run(
+                self._load_compare, project, from_sha
+            )
+
+            return {
+                "changes": changes,
+                "commits": [
+                    {
+                        "id": commit["id"],
+                        "short_id": commit["short_id"],
+                        "title": commit["title"],
+                        "message": commit["message"],
+                        "author_name": commit["author_name"],
+                        "created_at": commit["created_at"],
+                    }
+                    for commit in compare.get("commits", [])
+                ],
+            }
+        except _REQUEST_ERRORS as e:
+            print(f"[ERROR] Failed to compare {from_sha[:8]}..head for MR {self.label}: {e}")
+            return None
+
+    async def get_incremental_data(self, previous_sha: str) -> Optional[Dict]:
+        """
+        Get what changed in the MR since a previously analyzed commit.
+
+        The comparison, the MR commit list and its notes are fetched
+        concurrently. The delta is only usable if previous_sha is still part
+        of the MR history; after a rebase or force-push the comparison would
+        mix in unrelated changes, so None is returned instead. Notes are
+        optional: if they fail, an empty list is used.
+
+        Args:
+            previous_sha: Head SHA of the last analyzed version
+
+        Returns:
+            Dictionary containing:
+            {
+                "metadata": {...},  # Resolved MR metadata
+                "changes": [...],   # Diff between previous_sha and head
+                "commits": [...],   # Commits added since previous_sha
+                "notes": [...],     # All notes, from get_notes()
+                "gitattributes": str | None,  # From get_gitattributes()
+            }
+            Returns None if the delta is unavailable or not usable.
+        """
+        results, timings = await _fetch_concurrently(
+            {
+                "compare": self.get_compare(previous_sha),
+                "commits": self.get_commits(),
+                "notes": self.get_notes(),
+                "gitattributes": self.get_gitattributes(),
+            },
+            deadline=settings.GITLAB_FETCH_DEADLINE_SECONDS,
+        )
+
+        print("[INFO] GitLab fetch timings: " + ", ".join(
+            f"{name}={elapsed:.0f}ms" for name, elapsed in timings.items()
+        ))
+
+        compare, commits = results["compare"], results["commits"]
+        if compare is None or commits is None:
+            return None
+
+        if previous_sha not in {commit["id"] for commit in commits}:
+            print(f"[INFO] {previous_sha[:8]} is no longer in MR {self.label} history")
+            return None
+
+        return {
+            "metadata": self.metadata,
+            "changes": compare["changes"],
+            "commits": compare["commits"],
+            "notes": results["notes"] or [],
+            "gitattributes": results["gitattributes"],
+        }
+
+    async def get_gitattributes(self) -> Optional[str]:
+        """
+        Get the repository's .gitattributes at the MR head.
+
+        Used to leave out files marked linguist-generated or -diff.
+
+        Returns:
+            File content, "" if the repository has none, or None if
+            unable to fetch it.
+        """
+        try:
+            project = self.service.client.projects.get(self.project_path, lazy=True)
+            content = await self.service._run(
+                project.files.raw, file_path=".gitattributes", ref=self.mr.sha
+            )
+            return content.decode("utf-8", errors="replace")
+        except _REQUEST_ERRORS as e:
+            if getattr(e, "response_code", None) == 404:
+                return ""
+            print(f"[WARN] Failed to get .gitattributes for MR {self.label}: {e}")
+            return None
+
+    def _load_changes(self) -> List[Dict]:
+        """
+        Fetch and parse the MR changes (blocking; runs in the GitLab pool).
+
+        Returns:
+            List of change dictionaries
+        """
+        changes = self.mr.changes()
+        if not changes or "changes" not in changes:
+            return []
+        return [self._format_change(change) for change in changes["changes"]]
+
+    def _load_compare(self, project, from_sha: str) -> Tuple[Dict, List[Dict]]:
+        """
+        Fetch a comparison and parse its diffs (blocking; runs in the GitLab pool).
+
+        Args:
+            project: Lazy project object
+            from_sha: Earlier commit SHA
+
+        Returns:
+            Tuple of (raw comparison, change dictionaries)
+        """
+        compare = project.repository_compare(from_sha, self.metadata["sha"])
+        return compare, [self._format_change(change) for change in compare.get("diffs", [])]
+
+    @staticmethod
+    def _format_change(change: Dict) -> Dict:
+        """
+        Convert a GitLab diff entry into a change dictionary.
+
+        The diff is parsed here, once, into a FileDiff ("parsed") that
+        later stages use instead of re-scanning the text.
+
+        Args:
+            change: Diff entry from the changes or compare API
+
+        Returns:
+            Change dictionary (see GitLabService.get_merge_request_changes)
+        """
+        formatted = {
+            "old_path": change.get("old_path", ""),
+            "new_path": change.get("new_path", ""),
+            "diff": change.get("diff", ""),
+            "new_file": change.get("new_file", False),
+            "renamed_file": change.get("renamed_file", False),
+            "deleted_file": change.get("deleted_file", False),
+        }
+        formatted["parsed"] = FileDiff.from_change(formatted)
+        return formatted
+
+    async def get_notes(self, include_system: bool = False) -> Optional[List[Dict]]:
+        """
+        Get merge request discussions/notes.
+
+        Args:
+            include_system: Include system notes (default: False)
+
+        Returns:
+            List of note dictionaries (see GitLabService.get_merge_request_notes)
+            Returns None if unable to fetch notes.
+        """
+        try:
+            # Get notes (comments)
+            notes = await self.service._run(self.mr.notes.list, all=True)
+
+            result = []
+            for note in notes:
+                # Skip system notes if requested
+                if not include_system and note.system:
+                    continue
+
+                result.append({
+                    "author": note.author.get("name", "Unknown"),
+                    "body": note.body,
+                    "created_at": note.created_at,
+                    "system": note.system,
+                })
+
+            return result
+        except _REQUEST_ERRORS as e:
+            print(f"[ERROR] Failed to get notes for MR {self.label}: {e}")
+            return None
+
+    async def get_commits(self) -> Optional[List[Dict]]:
+        """
+        Get merge request commits.
+
+        Returns:
+            List of commit dictionaries (see GitLabService.get_merge_request_commits)
+            Returns None if unable to fetch commits.
+        """
+        try:
+            # Get commits (materialized in the pool, since the list paginates lazily)
+            commits = await self.service._run(lambda: list(self.mr.commits()))
+
+            result = []
+            for commit in commits:
+                result.append({
+                    "id": commit.id,
+                    "short_id": commit.short_id,
+                    "title": commit.title,
+                    "message": commit.message,
+                    "author_name": commit.author_name,
+                    "created_at": commit.created_at,
+                })
+
+            return result
+        except _REQUEST_ERRORS as e:
+            print(f"[ERROR] Failed to get commits for MR {self.label}: {e}")
+            return None
+
+    async def get_full_data(self) -> Optional[Dict]:
+        """
+        Get complete merge request data including changes and discussions.
+
+        Changes, notes, commits and .gitattributes are fetched concurrently
+        under a shared deadline (GITLAB_FETCH_DEADLINE_SECONDS). Notes and
+        commits are optional: if either fails, an empty list is used.
+        Changes are required.
+
+        Returns:
+            Dictionary containing:
+            {
+                "metadata": {...},  # Resolved MR metadata
+                "changes": [...],   # From get_changes()
+                "notes": [...],     # From get_notes()
+                "commits": [...],   # From get_commits()
+                "gitattributes": str | None,  # From get_gitattributes()
+                "timings": {...},   # Milliseconds per sub-fetch
+                "failed": [...]     # Names of sub-fetches that failed
+            }
+            Returns None if unable to fetch changes.
+        """
+        results, timings = await _fetch_concurrently(
+            {
+                "changes": self.get_changes(),
+                "notes": self.get_notes(),
+                "commits": self.get_commits(),
+                "gitattributes": self.get_gitattributes(),
+            },
+            deadline=settings.GITLAB_FETCH_DEADLINE_SECONDS,
+        )
+
+        print("[INFO] GitLab fetch timings: " + ", ".join(
+            f"{name}={elapsed:.0f}ms" for name, elapsed in timings.items()
+        ))
+
+        if results["changes"] is None:
+            print(f"[ERROR] Could not fetch changes for MR {self.label}")
+            return None
+
+        return {
+            "metadata": self.metadata,
+            "changes": results["changes"],
+            "notes": results["notes"] or [],
+            "commits": results["commits"] or [],
+            "gitattributes": results["gitattributes"],
+            "timings": timings,
+            "failed": [name for name, result in results.items() if result is None],
+        }
 
 
 class GitLabService:
@@ -20,7 +489,28 @@ class GitLabService:
         """
         self.access_token = access_token
         self.gitlab_url = settings.GITLAB_URL
-        self.client = gitlab.Gitlab(self.gitlab_url, oauth_token=access_token)
+        self.client = gitlab.Gitlab(
+            self.gitlab_url,
+            oauth_token=access_token,
+            timeout=settings.GITLAB_REQUEST_TIMEOUT_SECONDS,
+        )
+
+    async def _run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking python-gitlab call in the GitLab thread pool.
+
+        Args:
+            func: Synchronous callable to execute
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_gitlab_executor(), functools.partial(func, *args, **kwargs)
+        )
 
     async def get_project(self, project_path: str):
         """
@@ -34,15 +524,200 @@ class GitLabService:
 
         Raises:
             GitlabError: If project not found or access denied
+            requests.RequestException: If GitLab can't be reached
         """
         try:
-            # The python-gitlab library is synchronous, but we wrap it for consistency
-            project = self.client.projects.get(project_path)
+            project = await self._run(self.client.projects.get, project_path)
             return project
-        except GitlabError as e:
+        except _REQUEST_ERRORS as e:
             print(f"[ERROR] Failed to get project {project_path}: {e}")
             raise
 
+    async def is_admin(self) -> bool:
+        """
+        Check whether the user is a GitLab instance administrator.
+
+        Returns:
+            True for administrators
+
+        Raises:
+            GitlabError: If the user can't be fetched
+            requests.RequestException: If GitLab can't be reached
+        """
+        try:
+            await self._run(self.client.auth)
+        except _REQUEST_ERRORS as e:
+            print(f"[ERROR] Failed to get current GitLab user: {e}")
+            raise
+        # is_admin is only returned to administrators
+        return bool(getattr(self.client.user, "is_admin", False))
+
+    def _cache_key(self, project_path: str, mr_iid: int) -> Tuple[str, str, int]:
+        """Build the metadata cache key for this user and MR."""
+        token_digest = hashlib.sha256(self.access_token.encode()).hexdigest()
+        return (token_digest, project_path, mr_iid)
+
+    def _fetch_mr_attrs(
+        self, project_path: str, mr_iid: int, etag: Optional[str] = None
+    ) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        GET the MR resource, conditionally if an ETag is known (blocking).
+
+        python-gitlab's http_request() treats 304 as an error and sends
+        extra keyword arguments as query parameters, so this calls the
+        client's session directly, with headers and options built from
+        the client's public attributes.
+
+        Args:
+            project_path: Full project path
+            mr_iid: Merge request internal ID
+            etag: ETag from a previous response, sent as If-None-Match
+
+        Returns:
+            Tuple of (attrs, etag); attrs is None if GitLab answered
+            304 Not Modified
+
+        Raises:
+            GitlabHttpError: On any other non-2xx response
+        """
+        url = (
+            f"{self.client.api_url}/projects/{quote(project_path, safe='')}"
+            f"/merge_requests/{mr_iid}"
+        )
+        # client.headers only has the User-Agent; the token goes on its own
+        headers = dict(self.client.headers)
+        if self.client.oauth_token:
+            headers["Authorization"] = f"Bearer {self.client.oauth_token}"
+        elif self.client.private_token:
+            headers["PRIVATE-TOKEN"] = self.client.private_token
+        if etag:
+            headers["If-None-Match"] = etag
+
+        response = self.client.session.get(
+            url,
+            headers=headers,
+            timeout=self.client.timeout,
+            verify=self.client.ssl_verify,
+        )
+
+        if response.status_code == 304:
+            return None, etag
+        if not 200 <= response.status_code < 300:
+            raise GitlabHttpError(
+                response_code=response.status_code,
+                error_message=response.reason,
+                response_body=response.content,
+            )
+
+        return response.json(), response.headers.get("ETag")
+
+    async def _refresh_mr_attrs(
+        self, key: Tuple[str, str, int], project_path: str, mr_iid: int
+    ) -> Dict:
+        """
+        Fetch or revalidate MR attributes and update the metadata cache.
+
+        Args:
+            key: Metadata cache key
+            project_path: Full project path
+            mr_iid: Merge request internal ID
+
+        Returns:
+            Current MR attributes
+
+        Raises:
+            GitlabError: If MR not found or access denied
+            requests.RequestException: If GitLab can't be reached
+        """
+        entry = _mr_cache.get(key)
+        etag = entry["etag"] if entry else None
+
+        attrs, etag = await self._run(self._fetch_mr_attrs, project_path, mr_iid, etag)
+        if attrs is None:
+            # 304 Not Modified: cached attributes are still current
+            attrs = entry["attrs"]
+
+        _mr_cache[key] = {"attrs": attrs, "etag": etag, "fetched_at": time.monotonic()}
+        _mr_cache.move_to_end(key)
+        while len(_mr_cache) > settings.GITLAB_METADATA_CACHE_SIZE:
+            _mr_cache.popitem(last=False)
+
+        return attrs
+
+    def _schedule_revalidation(
+        self, key: Tuple[str, str, int], project_path: str, mr_iid: int
+    ):
+        """Revalidate a stale cache entry in the background (at most once per key)."""
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+
+        async def revalidate():
+            try:
+                await self._refresh_mr_attrs(key, project_path, mr_iid)
+            except _REQUEST_ERRORS as e:
+                # Drop the entry so the next open fetches synchronously
+                print(f"[ERROR] Background revalidation failed for {project_path}!{mr_iid}: {e}")
+                _mr_cache.pop(key, None)
+            finally:
+                _revalidating.discard(key)
+
+        task = asyncio.create_task(revalidate())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def open_merge_request(
+        self, project_path: str, mr_iid: int, revalidate: bool = False
+    ) -> Optional[MergeRequestContext]:
+        """
+        Resolve a merge request once and return a reusable handle.
+
+        MR metadata is cached with its ETag:
+        - Younger than GITLAB_METADATA_FRESH_SECONDS: served without
+          contacting GitLab.
+        - Within the following GITLAB_METADATA_STALE_SECONDS: served from
+          cache while a background request revalidates it.
+        - Older: revalidated with If-None-Match (a 304 carries no body).
+
+        The project is referenced lazily (by its URL-encoded path), so a
+        fetch costs a single GitLab API call.
+
+        Args:
+            project_path: Full project path
+            mr_iid: Merge request internal ID
+            revalidate: Always check with GitLab before returning (use when
+                        the exact current SHA matters, e.g. on a cache miss)
+
+        Returns:
+            MergeRequestContext, or None if MR not found
+        """
+        key = self._cache_key(project_path, mr_iid)
+        entry = _mr_cache.get(key)
+        from_cache = False
+
+        try:
+            if entry and not revalidate:
+                age = time.monotonic() - entry["fetched_at"]
+                fresh = settings.GITLAB_METADATA_FRESH_SECONDS
+                stale = settings.GITLAB_METADATA_STALE_SECONDS
+
+                if age <= fresh + stale:
+                    if age > fresh:
+                        self._schedule_revalidation(key, project_path, mr_iid)
+                    _mr_cache.move_to_end(key)
+                    attrs = entry["attrs"]
+                    from_cache = True
+
+            if not from_cache:
+                attrs = await self._refresh_mr_attrs(key, project_path, mr_iid)
+
+            project = self.client.projects.get(project_path, lazy=True)
+            mr = ProjectMergeRequest(project.mergerequests, attrs)
+            return MergeRequestContext(self, project_path, mr, from_cache=from_cache)
+        except _REQUEST_ERRORS as e:
+            print(f"[ERROR] Failed to get MR {project_path}!{mr_iid}: {e}")
+            return None
+
     async def get_merge_request(
         self, project_path: str, mr_iid: int
     ) -> Optional[Dict]:
@@ -70,26 +745,8 @@ class GitLabService:
             }
             Returns None if MR not found.
         """
-        try:
-            project = await self.get_project(project_path)
-            mr = project.mergerequests.get(mr_iid)
-
-            return {
-                "iid": mr.iid,
-                "title": mr.title,
-                "description": mr.description or "",
-                "state": mr.state,
-                "author": mr.author.get("name", "Unknown"),
-                "source_branch": mr.source_branch,
-                "target_branch": mr.target_branch,
-                "sha": mr.sha,  # Latest commit SHA for cache invalidation
-                "updated_at": mr.updated_at,
-                "web_url": mr.web_url,
-                "project_id": project.id,
-            }
-        except GitlabError as e:
-            print(f"[ERROR] Failed to get MR {project_path}!{mr_iid}: {e}")
-            return None
+        context = await self.open_merge_request(project_path, mr_iid)
+        return context.metadata if context else None
 
     async def get_merge_request_changes(
         self, project_path: str, mr_iid: int
@@ -110,37 +767,15 @@ class GitLabService:
                     "diff": str,  # Unified diff format
                     "new_file": bool,
                     "renamed_file": bool,
-                    "deleted_file": bool
+                    "deleted_file": bool,
+                    "parsed": FileDiff  # Parsed diff (app.core.diff_parser)
                 },
                 ...
             ]
             Returns None if unable to fetch changes.
         """
-        try:
-            project = await self.get_project(project_path)
-            mr = project.mergerequests.get(mr_iid)
-
-            # Get changes (diffs)
-            changes = mr.changes()
-
-            if not changes or "changes" not in changes:
-                return []
-
-            result = []
-            for change in changes["changes"]:
-                result.append({
-                    "old_path": change.get("old_path", ""),
-                    "new_path": change.get("new_path", ""),
-                    "diff": change.get("diff", ""),
-                    "new_file": change.get("new_file", False),
-                    "renamed_file": change.get("renamed_file", False),
-                    "deleted_file": change.get("deleted_file", False),
-                })
-
-            return result
-        except GitlabError as e:
-            print(f"[ERROR] Failed to get changes for MR {project_path}!{mr_iid}: {e}")
-            return None
+        context = await self.open_merge_request(project_path, mr_iid)
+        return await context.get_changes() if context else None
 
     async def get_merge_request_notes(
         self, project_path: str, mr_iid: int, include_system: bool = False
@@ -166,30 +801,8 @@ class GitLabService:
             ]
             Returns None if unable to fetch notes.
         """
-        try:
-            project = await self.get_project(project_path)
-            mr = project.mergerequests.get(mr_iid)
-
-            # Get notes (comments)
-            notes = mr.notes.list(all=True)
-
-            result = []
-            for note in notes:
-                # Skip system notes if requested
-                if not include_system and note.system:
-                    continue
-
-                result.append({
-                    "author": note.author.get("name", "Unknown"),
-                    "body": note.body,
-                    "created_at": note.created_at,
-                    "system": note.system,
-                })
-
-            return result
-        except GitlabError as e:
-            print(f"[ERROR] Failed to get notes for MR {project_path}!{mr_iid}: {e}")
-            return None
+        context = await self.open_merge_request(project_path, mr_iid)
+        return await context.get_notes(include_system) if context else None
 
     async def get_merge_request_commits(
         self, project_path: str, mr_iid: int
@@ -216,28 +829,8 @@ class GitLabService:
             ]
             Returns None if unable to fetch commits.
         """
-        try:
-            project = await self.get_project(project_path)
-            mr = project.mergerequests.get(mr_iid)
-
-            # Get commits
-            commits = mr.commits()
-
-            result = []
-            for commit in commits:
-                result.append({
-                    "id": commit["id"],
-                    "short_id": commit["short_id"],
-                    "title": commit["title"],
-                    "message": commit["message"],
-                    "author_name": commit["author_name"],
-                    "created_at": commit["created_at"],
-                })
-
-            return result
-        except GitlabError as e:
-            print(f"[ERROR] Failed to get commits for MR {project_path}!{mr_iid}: {e}")
-            return None
+        context = await self.open_merge_request(project_path, mr_iid)
+        return await context.get_commits() if context else None
 
     async def get_full_merge_request_data(
         self, project_path: str, mr_iid: int
@@ -245,36 +838,20 @@ class GitLabService:
         """
         Get complete merge request data including changes and discussions.
 
-        This is the main method to use for analysis.
+        Resolves the MR once and fans out from that handle; see
+        MergeRequestContext.get_full_data().
 
         Args:
             project_path: Full project path
             mr_iid: Merge request internal ID
 
         Returns:
-            Dictionary containing:
-            {
-                "metadata": {...},  # From get_merge_request()
-                "changes": [...],   # From get_merge_request_changes()
-                "notes": [...],     # From get_merge_request_notes()
-                "commits": [...]    # From get_merge_request_commits()
-            }
+            Dictionary with "metadata", "changes", "notes", "commits",
+            "timings" and "failed" keys.
             Returns None if unable to fetch data.
         """
-        metadata = await self.get_merge_request(project_path, mr_iid)
-        if not metadata:
-            return None
-
-        changes = await self.get_merge_request_changes(project_path, mr_iid)
-        notes = await self.get_merge_request_notes(project_path, mr_iid)
-        commits = await self.get_merge_request_commits(project_path, mr_iid)
-
-        return {
-            "metadata": metadata,
-            "changes": changes or [],
-            "notes": notes or [],
-            "commits": commits or [],
-        }
+        context = await self.open_merge_request(project_path, mr_iid)
+        return await context.get_full_data() if context else None
 
 
 def create_gitlab_service(access_token: str) -> GitLabService:
@@ -0,0 +1,97 @@
+"""
+Lease service for database operations.
+Short-lived leases make sure only one worker process generates the
+summary for a given MR version at a time.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete
+from typing import Optional
+from datetime import datetime, timedelta
+
+from app.core.database import dialect_insert
+from app.core.db_writer import run_write
+from app.models.analysis_lease import AnalysisLease
+
+
+async def get_lease(db: AsyncSession, key: str) -> Optional[AnalysisLease]:
+    """Get lease by key (expired leases included)."""
+    result = await db.execute(
+        select(AnalysisLease).where(AnalysisLease.key == key)
+    )
+    return result.scalar_one_or_none()
+
+
+async def acquire_lease(
+    db: AsyncSession,
+    key: str,
+    owner: str,
+    ttl_seconds: float,
+) -> bool:
+    """
+    Try to acquire a lease.
+
+    Inserts a new lease (INSERT ... ON CONFLICT DO NOTHING), or takes over
+    an expired one with a conditional UPDATE, so at most one owner can
+    succeed. Committed through the database writer.
+
+    Returns:
+        True if the lease is now held by owner
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+
+    async def write(session: AsyncSession) -> bool:
+        insert = dialect_insert(session)
+        result = await session.execute(
+            insert(AnalysisLease)
+            .values(key=key, owner=owner, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[AnalysisLease.key])
+        )
+        if result.rowcount == 1:
+            return True
+
+        # Lease exists: take it over only if it has expired
+        result = await session.execute(
+            update(AnalysisLease)
+            .where(AnalysisLease.key == key, AnalysisLease.expires_at < now)
+            .values(owner=owner, expires_at=expires_at)
+        )
+        return result.rowcount == 1
+
+    return await run_write(db, write)
+
+
+async def renew_lease(
+    db: AsyncSession,
+    key: str,
+    owner: str,
+    ttl_seconds: float,
+) -> bool:
+    """
+    Extend a lease still held by owner to ttl_seconds from now.
+
+    Returns:
+        False if the lease was released or taken over by another owner
+    """
+    async def write(session: AsyncSession) -> bool:
+        result = await session.execute(
+            update(AnalysisLease)
+            .where(AnalysisLease.key == key, AnalysisLease.owner == owner)
+            .values(expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds))
+        )
+        return result.rowcount == 1
+
+    return await run_write(db, write)
+
+
+async def release_lease(db: AsyncSession, key: str, owner: str) -> None:
+    """Release a lease if it is still held by owner."""
+    async def write(session: AsyncSession) -> None:
+        await session.execute(
+            delete(AnalysisLease).where(
+                AnalysisLease.key == key,
+                AnalysisLease.owner == owner
+            )
+        )
+
+    await run_write(db, write)
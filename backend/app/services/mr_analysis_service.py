@@ -2,15 +2,28 @@
 MR Analysis service with smart caching logic.
 Coordinates GitLab data fetching, cache checking, and summary storage.
 """
-from typing import Optional, Dict, Tuple, List
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, Dict, Tuple, List, Callable, Awaitable
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.services.gitlab_service import GitLabService
-from app.services import scan_service
+from app.services.gitlab_service import GitLabService, MergeRequestContext
+from app.services import scan_service, lease_service, file_filter_service
+from app.core.database import AsyncSessionLocal
+from app.core.diff_parser import get_file_diff
+from app.core.file_filter import FileFilter, get_file_filter
+from app.core.singleflight import SingleFlight
 from app.core.utils import parse_gitlab_mr_url, validate_gitlab_url
 from app.core.config import settings
 
 
+# Summary generations running in this process, keyed by (project_id, mr_iid, sha)
+_analysis_flights = SingleFlight()
+
+
 class MRAnalysisService:
     """Service for analyzing MRs with smart caching."""
 
@@ -60,7 +73,8 @@ class MRAnalysisService:
         Returns:
             Tuple of (is_valid, cached_scan)
             - is_valid: True if cache is valid (SHA matches)
-            - cached_scan: Cached scan data if exists, None otherwise
+            - cached_scan: Cached scan data if exists (even if outdated,
+              so it can seed an incremental update), None otherwise
         """
         is_valid, scan = await scan_service.check_cache_validity(
             db=self.db,
@@ -69,19 +83,41 @@ class MRAnalysisService:
             current_sha=current_sha,
         )
 
-        if is_valid and scan:
-            return (True, {
+        if scan:
+            return (is_valid, {
                 "id": scan.id,
                 "project_id": scan.project_id,
                 "mr_iid": scan.mr_iid,
                 "title": scan.title,
                 "summary_markdown": scan.summary_markdown,
                 "last_commit_sha": scan.last_commit_sha,
+                "incremental_updates": scan.incremental_updates,
                 "scanned_at": scan.scanned_at,
             })
 
         return (False, None)
 
+    async def open_merge_request(
+        self, project_path: str, mr_iid: int, revalidate: bool = False
+    ) -> Optional[MergeRequestContext]:
+        """
+        Resolve the MR once for the duration of this request.
+
+        The returned context carries the MR metadata and serves changes,
+        notes and commits without resolving the project or MR again.
+
+        Args:
+            project_path: GitLab project path
+            mr_iid: Merge request IID
+            revalidate: Confirm cached metadata with GitLab first
+
+        Returns:
+            MergeRequestContext or None if MR not found
+        """
+        return await self.gitlab_service.open_merge_request(
+            project_path, mr_iid, revalidate=revalidate
+        )
+
     async def fetch_mr_metadata(
         self, project_path: str, mr_iid: int
     ) -> Optional[Dict]:
@@ -99,7 +135,7 @@ class MRAnalysisService:
         return metadata
 
     async def fetch_full_mr_data(
-        self, project_path: str, mr_iid: int
+        self, mr_context: MergeRequestContext
     ) -> Optional[Dict]:
         """
         Fetch complete MR data including changes and discussions.
@@ -107,18 +143,180 @@ class MRAnalysisService:
         This is used when cache is invalid and we need to generate a new summary.
 
         Args:
-            project_path: GitLab project path
-            mr_iid: Merge request IID
+            mr_context: MR handle from open_merge_request()
 
         Returns:
             Full MR data dictionary or None if failed
         """
-        data = await self.gitlab_service.get_full_merge_request_data(
-            project_path, mr_iid
+        data = await mr_context.get_full_data()
+        return data
+
+    async def fetch_incremental_data(
+        self, mr_context: MergeRequestContext, previous_sha: str, since: datetime
+    ) -> Optional[Dict]:
+        """
+        Fetch only what changed since the last analyzed commit.
+
+        Used when a cached scan exists but is outdated, so the previous
+        summary can be updated instead of re-reading the whole MR.
+
+        Args:
+            mr_context: MR handle from open_merge_request()
+            previous_sha: last_commit_sha of the cached scan
+            since: scanned_at of the cached scan (naive UTC)
+
+        Returns:
+            Dictionary with "metadata", "changes" (filtered delta),
+            "commits" (new commits) and "notes" (user notes created after
+            `since`), or None if an incremental update isn't possible
+            (e.g. the MR was rebased)
+        """
+        data = await mr_context.get_incremental_data(previous_sha)
+        if not data:
+            return None
+
+        file_filter = await self.load_file_filter(
+            data["metadata"]["project_id"], data.get("gitattributes")
         )
+        data["changes"] = self.filter_changes(data["changes"], file_filter)
+        data["notes"] = [
+            note for note in data["notes"]
+            if not note.get("system", False) and _created_after(note, since)
+        ]
         return data
 
-    async def should_skip_file(self, filepath: str) -> bool:
+    async def generate_once(
+        self,
+        project_id: int,
+        mr_iid: int,
+        sha: str,
+        generate: Callable[[], Awaitable[Dict]],
+    ) -> Tuple[Dict, bool]:
+        """
+        Generate the summary for an MR version at most once at a time.
+
+        Concurrent requests for the same (project_id, mr_iid, sha) in this
+        process share one run of `generate`. Across worker processes, a
+        database lease elects one generator; other workers wait for its
+        scan to appear instead of generating their own.
+
+        Args:
+            project_id: GitLab project ID
+            mr_iid: Merge request IID
+            sha: Head commit SHA being summarized
+            generate: Coroutine function that generates and stores the
+                      summary, returning {"summary_markdown", "scanned_at"}
+
+        Returns:
+            Tuple of (result, shared)
+            - result: Dictionary with "summary_markdown" and "scanned_at"
+            - shared: True if another request or worker produced the result
+        """
+        result, shared = await _analysis_flights.do(
+            (project_id, mr_iid, sha),
+            lambda: self._generate_with_lease(project_id, mr_iid, sha, generate),
+        )
+        return result, shared or result.get("shared", False)
+
+    async def _generate_with_lease(
+        self,
+        project_id: int,
+        mr_iid: int,
+        sha: str,
+        generate: Callable[[], Awaitable[Dict]],
+    ) -> Dict:
+        """
+        Run `generate` while holding the database lease for this MR version.
+
+        If another worker holds the lease, wait for its result; if that
+        worker gives up or dies, take over the lease and generate here
+        (or keep waiting if a third worker took it over first). The lease
+        is renewed while generating, so long runs keep it.
+
+        Leases use their own short-lived sessions so their commits and
+        rollbacks never touch the request session.
+        """
+        key = f"{project_id}:{mr_iid}:{sha}"
+        owner = uuid.uuid4().hex
+        ttl = settings.ANALYSIS_LEASE_SECONDS
+
+        async with AsyncSessionLocal() as db:
+            acquired = await lease_service.acquire_lease(db, key, owner, ttl)
+
+        if not acquired:
+            print("[INFO] Another worker is generating this summary, waiting...")
+        while not acquired:
+            result = await self._wait_for_lease_holder(key, project_id, mr_iid, sha)
+            if result:
+                return result
+
+            async with AsyncSessionLocal() as db:
+                acquired = await lease_service.acquire_lease(db, key, owner, ttl)
+
+        heartbeat = asyncio.create_task(self._renew_lease(key, owner, ttl))
+        try:
+            return await generate()
+        finally:
+            heartbeat.cancel()
+            async with AsyncSessionLocal() as db:
+                await lease_service.release_lease(db, key, owner)
+
+    @staticmethod
+    async def _renew_lease(key: str, owner: str, ttl: float):
+        """
+        Extend the lease every third of its TTL until cancelled.
+
+        Stops early if the lease was lost (e.g. this worker stalled past
+        the TTL and another one took over).
+        """
+        while True:
+            await asyncio.sleep(ttl / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    renewed = await lease_service.renew_lease(db, key, owner, ttl)
+            except SQLAlchemyError as e:
+                # Retry at the next beat; the lease is still valid for 2/3 TTL
+                print(f"[WARN] Failed to renew analysis lease {key}: {e}")
+                continue
+            if not renewed:
+                print(f"[WARN] Lost analysis lease {key} to another worker")
+                return
+
+    async def _wait_for_lease_holder(
+        self, key: str, project_id: int, mr_iid: int, sha: str
+    ) -> Optional[Dict]:
+        """
+        Poll until the lease holder has stored the scan for this SHA.
+
+        Returns:
+            Result dictionary (with "shared": True) once the scan is stored,
+            or None if the lease was released or expired without one
+        """
+        deadline = time.monotonic() + settings.ANALYSIS_LEASE_SECONDS
+
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.ANALYSIS_LEASE_POLL_SECONDS)
+
+            async with AsyncSessionLocal() as db:
+                is_valid, scan = await scan_service.check_cache_validity(
+                    db, project_id, mr_iid, sha
+                )
+                if is_valid and scan:
+                    return {
+                        "summary_markdown": scan.summary_markdown,
+                        "scanned_at": scan.scanned_at,
+                        "shared": True,
+                    }
+
+                lease = await lease_service.get_lease(db, key)
+                if lease is None or lease.expires_at < datetime.utcnow():
+                    return None
+
+        return None
+
+    def should_skip_file(
+        self, filepath: str, file_filter: Optional[FileFilter] = None
+    ) -> bool:
         """
         Determine if a file should be skipped during analysis.
 
@@ -126,65 +324,52 @@ class MRAnalysisService:
 
         Args:
             filepath: Path to file
+            file_filter: Project filter from load_file_filter()
+                         (default: built-in rules only)
 
         Returns:
             True if file should be skipped
         """
-        skip_patterns = [
-            # Lock files
-            "package-lock.json",
-            "yarn.lock",
-            "pnpm-lock.yaml",
-            "poetry.lock",
-            "Gemfile.lock",
-            "Cargo.lock",
-            # Build artifacts
-            ".min.js",
-            ".min.css",
-            # Binary/compiled
-            ".pyc",
-            ".o",
-            ".so",
-            ".dll",
-            ".exe",
-            # Images
-            ".png",
-            ".jpg",
-            ".jpeg",
-            ".gif",
-            ".svg",
-            ".ico",
-            # Fonts
-            ".woff",
-            ".woff2",
-            ".ttf",
-            ".eot",
-        ]
+        return (file_filter or get_file_filter()).should_skip(filepath)
+
+    async def load_file_filter(
+        self, project_id: int, gitattributes: Optional[str] = None
+    ) -> FileFilter:
+        """
+        Build the file filter for a project.
+
+        Combines the built-in rules, the project's rules stored in the
+        database and the repository's .gitattributes.
+
+        Args:
+            project_id: GitLab project ID
+            gitattributes: .gitattributes content at the MR head, if any
 
-        filepath_lower = filepath.lower()
-        return any(pattern in filepath_lower for pattern in skip_patterns)
+        Returns:
+            Compiled FileFilter
+        """
+        return await file_filter_service.load_file_filter(
+            self.db, project_id, gitattributes
+        )
 
-    async def filter_changes(self, changes: List[Dict]) -> List[Dict]:
+    def filter_changes(
+        self, changes: List[Dict], file_filter: Optional[FileFilter] = None
+    ) -> List[Dict]:
         """
         Filter changes to exclude files that shouldn't be analyzed.
 
         Args:
             changes: List of change dictionaries
+            file_filter: Project filter from load_file_filter()
 
         Returns:
             Filtered list of changes
         """
-        filtered = []
-        for change in changes:
-            filepath = change.get("new_path", change.get("old_path", ""))
-
-            # Skip if file should be excluded
-            if await self.should_skip_file(filepath):
-                continue
-
-            filtered.append(change)
-
-        return filtered
+        file_filter = file_filter or get_file_filter()
+        return [
+            change for change in changes
+            if not file_filter.should_skip(get_file_diff(change).path)
+        ]
 
     async def prepare_data_for_analysis(self, full_data: Dict) -> Dict:
         """
@@ -208,8 +393,12 @@ class MRAnalysisService:
         metadata = full_data["metadata"]
         changes = full_data["changes"]
 
-        # Filter changes to exclude lock files, etc.
-        filtered_changes = await self.filter_changes(changes)
+        # Filter changes to exclude lock files, generated files, etc.
+        file_filter = await self.load_file_filter(
+            metadata["project_id"], full_data.get("gitattributes")
+        )
+        filtered_changes = self.filter_changes(changes, file_filter)
+        print(f"[INFO] Analyzing {len(filtered_changes)}/{len(changes)} changed files")
 
         # Only include user notes (not system notes)
         user_notes = [
@@ -228,6 +417,27 @@ class MRAnalysisService:
         }
 
 
+def _created_after(note: Dict, since: datetime) -> bool:
+    """
+    Check whether a GitLab note was created after a point in time.
+
+    Args:
+        note: Note dictionary ("created_at" as GitLab's ISO 8601 string)
+        since: Naive UTC datetime
+
+    Returns:
+        True if the note is newer (or its creation time can't be read,
+        so it isn't lost)
+    """
+    try:
+        created_at = datetime.fromisoformat(note["created_at"].replace("Z", "+00:00"))
+    except (KeyError, AttributeError, ValueError):
+        return True
+    if created_at.tzinfo:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return created_at > since
+
+
 def create_mr_analysis_service(
     gitlab_service: GitLabService, db: AsyncSession
 ) -> MRAnalysisService:
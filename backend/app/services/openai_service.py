@@ -2,11 +2,32 @@
 Azure OpenAI service for generating MR summaries.
 Implements Map-Reduce strategy for handling large diffs.
 """
-from typing import List, Dict, Optional
-from openai import AsyncAzureOpenAI
+import asyncio
+import json
+import posixpath
+from typing import Callable, List, Dict, Optional, Tuple
+from openai import (
+    NOT_GIVEN,
+    AsyncAzureOpenAI,
+    APIConnectionError,
+    InternalServerError,
+    RateLimitError,
+)
 
 from app.core.config import settings
-from app.core.token_counter import get_token_counter
+from app.core.database import AsyncSessionLocal
+from app.core.diff_parser import FileDiff, get_file_diff, split_by_lines
+from app.core.rate_limiter import get_rate_limiter
+from app.core.token_counter import get_token_counter, run_in_tokenizer_pool
+from app.services import file_summary_service
+from app.services.context_planner import ContextBudgetPlanner
+
+
+# Receives each streamed content delta of a summary
+TokenCallback = Callable[[str], None]
+
+# Receives MAP-phase progress: (completed files, total files, filepath)
+ProgressCallback = Callable[[int, int, Optional[str]], None]
 
 
 class OpenAIService:
@@ -17,15 +38,26 @@ class OpenAIService:
     MAX_OUTPUT_TOKENS = 4000  # Reserve for response
     SAFE_INPUT_TOKENS = 100000  # Safe limit for input
 
+    # Shared MAP calls (small diffs packed into one request)
+    MAX_FILES_PER_MAP_BATCH = 20
+    MAP_BATCH_OUTPUT_TOKENS_PER_FILE = 150
+
+    # Bump whenever the file summary prompt or its parameters change, so
+    # cached file summaries from the old prompt are no longer used
+    FILE_SUMMARY_PROMPT_VERSION = "1"
+
     def __init__(self):
         """Initialize Azure OpenAI client."""
         self.client = AsyncAzureOpenAI(
             api_key=settings.AZURE_OPENAI_API_KEY,
             api_version=settings.AZURE_OPENAI_API_VERSION,
             azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            max_retries=0,  # Retries are handled by _create_completion
         )
         self.deployment = settings.AZURE_OPENAI_DEPLOYMENT
         self.token_counter = get_token_counter()
+        self.context_planner = ContextBudgetPlanner(self.token_counter)
+        self.rate_limiter = get_rate_limiter()
 
     def get_system_prompt(self) -> str:
         """
@@ -78,6 +110,121 @@ Focus on:
 
 Be concise and technical."""
 
+    def get_file_batch_summary_prompt(self) -> str:
+        """
+        Get prompt for summarizing several small files in one call (Map phase).
+
+        Returns:
+            Prompt string for batched file-level summaries
+        """
+        return """Analyze each of the following file changes and provide a brief technical summary for each one (1-3 sentences max).
+
+Focus on:
+- What changed in the file
+- Why it might have changed (infer from context)
+- Any notable patterns or concerns
+
+Be concise and technical. Respond only with a JSON object."""
+
+    def get_component_summary_prompt(self) -> str:
+        """
+        Get prompt for combining file summaries of one directory (tree reduce).
+
+        Returns:
+            Prompt string for component-level summaries
+        """
+        return """Combine these summaries of changes in one directory of a merge request into a single component summary (3-5 sentences max).
+
+Focus on:
+- What changed in this component as a whole
+- How the individual changes relate to each other
+- Any notable risks or concerns mentioned
+
+Keep file and symbol names that matter. Be concise and technical."""
+
+    async def _create_completion(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        on_token: Optional[TokenCallback] = None,
+        response_format: Optional[Dict] = None,
+    ) -> str:
+        """
+        Create a chat completion within the deployment's rate limits.
+
+        Every call reserves its estimated prompt + completion tokens with
+        the shared rate limiter. Throttled (429) and transient failures are
+        retried with jittered backoff, honoring the server's retry-after.
+
+        With `on_token`, the completion is streamed and each content delta
+        is passed to it as it arrives. Once a delta has been delivered, a
+        failure is raised instead of retried, so no text is delivered twice.
+
+        Args:
+            messages: Chat messages
+            temperature: Sampling temperature
+            max_tokens: Maximum completion tokens
+            on_token: Optional callback receiving streamed content deltas
+            response_format: Optional response format (e.g. JSON mode)
+
+        Returns:
+            Completion content
+
+        Raises:
+            openai.APIError: If the call still fails after OPENAI_MAX_RETRIES
+        """
+        # Cheap estimate (~4 characters per token); exact counting isn't
+        # worth the CPU here, the server headers correct the budget anyway
+        estimated_tokens = sum(
+            len(message.get("content", "")) for message in messages
+        ) // 4 + max_tokens
+
+        delivered = False  # Whether on_token has received any text
+        for attempt in range(settings.OPENAI_MAX_RETRIES + 1):
+            retry_after = None
+            try:
+                # The slot is held until the whole stream has been read
+                async with self.rate_limiter.slot(estimated_tokens):
+                    raw_response = await self.client.chat.completions.with_raw_response.create(
+                        model=self.deployment,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        stream=on_token is not None,
+                        response_format=response_format or NOT_GIVEN,
+                    )
+                    self.rate_limiter.on_success(raw_response.headers)
+
+                    if on_token is None:
+                        return raw_response.parse().choices[0].message.content
+
+                    parts = []
+                    async for chunk in raw_response.parse():
+                        # Azure sends chunks without choices (content filter results)
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            parts.append(delta)
+                            delivered = True
+                            on_token(delta)
+                    return "".join(parts)
+            except RateLimitError as e:
+                retry_after = self.rate_limiter.on_throttle(e.response.headers)
+                error = e
+            except (APIConnectionError, InternalServerError) as e:
+                error = e
+
+            if delivered or attempt == settings.OPENAI_MAX_RETRIES:
+                break
+
+            delay = self.rate_limiter.backoff_delay(attempt, retry_after)
+            print(f"[WARN] OpenAI call failed ({error.__class__.__name__}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        raise error
+
     async def generate_summary(
         self,
         title: str,
@@ -85,12 +232,14 @@ Be concise and technical."""
         changes: List[Dict],
         notes: List[Dict],
         commits: List[Dict],
+        on_token: Optional[TokenCallback] = None,
+        on_progress: Optional[ProgressCallback] = None,
     ) -> Optional[str]:
         """
         Generate MR summary using appropriate strategy.
 
         Automatically chooses between:
-        - Direct summarization (if fits in context)
+        - Direct summarization (if the planned prompt holds every diff)
         - Map-Reduce chunking (if too large)
 
         Args:
@@ -99,69 +248,178 @@ Be concise and technical."""
             changes: List of file changes
             notes: List of discussion notes
             commits: List of commits
+            on_token: Optional callback receiving the summary as it streams
+            on_progress: Optional callback for MAP-phase progress
 
         Returns:
             Generated summary markdown, or None if failed
         """
-        # Estimate token usage
-        token_estimate = self.token_counter.estimate_context_usage(
+        # Estimate token usage from sizes; clearly small or clearly oversized
+        # MRs pick their strategy without tokenizing any diff
+        token_estimate = self.token_counter.estimate_context_usage_fast(
             title, description, changes, notes, commits
         )
+        print(f"[INFO] Token estimate: {token_estimate['total']} ± {token_estimate['margin']} tokens")
 
-        print(f"[INFO] Token estimate: {token_estimate['total']} tokens")
+        if token_estimate["total"] - token_estimate["margin"] < self.SAFE_INPUT_TOKENS:
+            budget = self.SAFE_INPUT_TOKENS - self.token_counter.count_tokens_in_messages(
+                [{"role": "system", "content": self.get_system_prompt()}]
+            )
 
-        # Choose strategy based on token count
-        if token_estimate["total"] < self.SAFE_INPUT_TOKENS:
-            print("[INFO] Using direct summarization (fits in context)")
-            return await self._generate_direct_summary(
-                title, description, changes, notes, commits
+            # Clearly small MRs fit whole; nothing needs to be tokenized
+            if self.context_planner.fits_by_estimate(token_estimate, changes, notes, commits, budget):
+                print("[INFO] Using direct summarization (fits in context by estimate)")
+                message = await run_in_tokenizer_pool(
+                    self.context_planner.build_message,
+                    title, description, changes, notes, commits,
+                )
+                return await self._generate_direct_summary(message, on_token)
+
+            # Near the threshold: plan the exact direct prompt within the budget
+            plan = await run_in_tokenizer_pool(
+                self.context_planner.plan,
+                title, description, changes, notes, commits, budget,
             )
-        else:
-            print("[INFO] Using Map-Reduce chunking (exceeds context limit)")
-            return await self._generate_chunked_summary(
-                title, description, changes, notes, commits
+            decisions = plan["decisions"]
+            print(
+                f"[INFO] Prompt plan: {decisions['used']}/{decisions['budget']} tokens, "
+                f"{decisions['files_included']}/{len(changes)} files, "
+                f"{len(decisions['files_truncated'])} truncated, "
+                f"{len(decisions['files_omitted'])} omitted"
             )
 
-    async def _generate_direct_summary(
+            if decisions["complete"]:
+                print("[INFO] Using direct summarization (fits in context)")
+                return await self._generate_direct_summary(plan["message"], on_token)
+
+        print("[INFO] Using Map-Reduce chunking (exceeds context limit)")
+        return await self._generate_chunked_summary(
+            title, description, changes, notes, commits, on_token, on_progress
+        )
+
+    async def generate_incremental_summary(
         self,
+        previous_summary: str,
         title: str,
         description: str,
         changes: List[Dict],
         notes: List[Dict],
         commits: List[Dict],
+        on_token: Optional[TokenCallback] = None,
     ) -> Optional[str]:
         """
-        Generate summary directly (single API call).
+        Update an existing summary with the changes since it was generated.
+
+        Only the delta is sent to the model, together with the previous
+        summary. Deltas above OPENAI_INCREMENTAL_MAX_DELTA_TOKENS are
+        rejected, so the caller falls back to a full summary.
 
         Args:
+            previous_summary: Summary of the last analyzed version
             title: MR title
             description: MR description
-            changes: List of file changes
-            notes: List of discussion notes
-            commits: List of commits
+            changes: File changes since the last analyzed commit
+            notes: Discussion notes added since the previous summary
+            commits: Commits added since the last analyzed commit
+            on_token: Optional callback receiving the summary as it streams
 
         Returns:
-            Generated summary or None
+            Updated summary markdown, or None if the delta is too large or
+            generation failed
         """
-        # Build user message with all context
-        user_message = self._build_full_context(
-            title, description, changes, notes, commits
+        if not changes and not commits and not notes:
+            print("[INFO] Empty delta, previous summary is still current")
+            return previous_summary
+
+        file_diffs = [get_file_diff(change) for change in changes]
+        delta_tokens = sum(await self.token_counter.count_tokens_batch_async(
+            [file_diff.text for file_diff in file_diffs]
+        ))
+        print(f"[INFO] Incremental delta: {len(changes)} files, {delta_tokens} tokens")
+
+        if delta_tokens > settings.OPENAI_INCREMENTAL_MAX_DELTA_TOKENS:
+            print("[INFO] Delta too large for incremental update")
+            return None
+
+        changes_section = "".join(
+            f"\n### {file_diff.path}\n```diff\n{file_diff.text}\n```\n"
+            for file_diff in file_diffs
+        )
+
+        commits_section = "\n".join([
+            f"- {commit.get('title', '')}"
+            for commit in commits[:20]
+        ])
+
+        notes_section = "\n".join(
+            f"- **{note.get('author', 'Unknown')}**: "
+            f"{note.get('body', '')[:ContextBudgetPlanner.NOTE_MAX_CHARS]}"
+            for note in notes[:ContextBudgetPlanner.MAX_NOTES]
         )
 
+        user_message = f"""# Merge Request: {title}
+
+## Description
+{description if description else "No description provided"}
+
+## Previous Summary
+{previous_summary}
+
+## New Changes Since Previous Summary
+{changes_section if changes_section else "No file changes"}
+
+## New Commits
+{commits_section if commits_section else "No new commits"}
+
+## New Discussion
+{notes_section if notes_section else "No new discussions"}
+
+The previous summary describes an earlier version of this merge request. Update it to reflect the new changes and discussion: keep what is still accurate, revise what changed, and add anything new. Follow the format in your system prompt."""
+
         messages = [
             {"role": "system", "content": self.get_system_prompt()},
             {"role": "user", "content": user_message},
         ]
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.deployment,
+            return await self._create_completion(
                 messages=messages,
                 temperature=0.3,
                 max_tokens=self.MAX_OUTPUT_TOKENS,
+                on_token=on_token,
             )
 
-            summary = response.choices[0].message.content
+        except Exception as e:
+            print(f"[ERROR] Failed to generate incremental summary: {e}")
+            return None
+
+    async def _generate_direct_summary(
+        self,
+        user_message: str,
+        on_token: Optional[TokenCallback] = None,
+    ) -> Optional[str]:
+        """
+        Generate summary directly (single API call).
+
+        Args:
+            user_message: Full context message from ContextBudgetPlanner
+            on_token: Optional callback receiving the summary as it streams
+
+        Returns:
+            Generated summary or None
+        """
+        messages = [
+            {"role": "system", "content": self.get_system_prompt()},
+            {"role": "user", "content": user_message},
+        ]
+
+        try:
+            summary = await self._create_completion(
+                messages=messages,
+                temperature=0.3,
+                max_tokens=self.MAX_OUTPUT_TOKENS,
+                on_token=on_token,
+            )
             return summary
 
         except Exception as e:
@@ -175,12 +433,20 @@ Be concise and technical."""
         changes: List[Dict],
         notes: List[Dict],
         commits: List[Dict],
+        on_token: Optional[TokenCallback] = None,
+        on_progress: Optional[ProgressCallback] = None,
     ) -> Optional[str]:
         """
         Generate summary using Map-Reduce strategy.
 
-        MAP phase: Summarize each file individually
-        REDUCE phase: Combine file summaries into final summary
+        MAP phase: Summarize files concurrently, largest diffs first;
+                   results keep the original file order. Large diffs get
+                   their own call, small ones are packed into shared calls
+                   (see _pack_map_batches). Diffs summarized before are
+                   served from the file summary cache instead of the LLM.
+        REDUCE phase: Combine file summaries into final summary. If they
+                      don't fit OPENAI_REDUCE_MAX_INPUT_TOKENS, they are
+                      first reduced per directory (see _reduce_by_directory)
 
         Args:
             title: MR title
@@ -188,58 +454,483 @@ Be concise and technical."""
             changes: List of file changes
             notes: List of discussion notes
             commits: List of commits
+            on_token: Optional callback receiving the final summary as it streams
+            on_progress: Optional callback called as file summaries complete
 
         Returns:
             Generated summary or None
         """
         print("[INFO] MAP Phase: Summarizing individual files...")
 
-        # MAP: Summarize each file
-        file_summaries = []
-        for i, change in enumerate(changes):
-            filepath = change.get("new_path", change.get("old_path", "unknown"))
-            diff = change.get("diff", "")
+        # Files with a non-empty diff, in original order. Each is summarized
+        # on its own, so use the diff without cross-file collapses
+        # (see DiffCompressor.compress)
+        files = [
+            file_diff
+            for file_diff in (change.get("standalone") or get_file_diff(change) for change in changes)
+            if file_diff.text
+        ]
 
-            # Skip if diff is empty
-            if not diff:
-                continue
+        # Estimates are accurate enough for packing (the budgets are soft)
+        diff_tokens = [
+            self.token_counter.estimate_tokens(file_diff.text, file_diff.path)[0]
+            for file_diff in files
+        ]
 
-            print(f"[INFO] Processing file {i+1}/{len(changes)}: {filepath}")
+        # Reuse summaries of diffs we've seen before (content-addressed).
+        # Summaries from shared calls are briefer, so they have keys of
+        # their own and are only reused for files small enough to share one
+        keys = [
+            file_summary_service.compute_summary_key(
+                file_diff.path, file_diff.text, self.FILE_SUMMARY_PROMPT_VERSION, self.deployment
+            )
+            for file_diff in files
+        ]
+        batch_keys = [
+            file_summary_service.compute_summary_key(
+                file_diff.path, file_diff.text, f"{self.FILE_SUMMARY_PROMPT_VERSION}-batch", self.deployment
+            )
+            if tokens <= settings.OPENAI_MAP_SMALL_FILE_TOKENS else None
+            for file_diff, tokens in zip(files, diff_tokens)
+        ]
+        cached = await self._load_cached_file_summaries(keys + [key for key in batch_keys if key])
+        results: List[Optional[str]] = [
+            cached.get(key) or cached.get(batch_key)
+            for key, batch_key in zip(keys, batch_keys)
+        ]
+        pending = [i for i, summary in enumerate(results) if summary is None]
+        print(f"[INFO] {len(files) - len(pending)}/{len(files)} file summaries cached")
+        if on_progress:
+            on_progress(len(files) - len(pending), len(files), None)
+
+        # MAP: Summarize remaining files concurrently, at most OPENAI_MAP_CONCURRENCY calls at once
+        batches = self._pack_map_batches(pending, diff_tokens)
+        print(f"[INFO] {len(pending)} files to summarize in {len(batches)} calls")
+        semaphore = asyncio.Semaphore(settings.OPENAI_MAP_CONCURRENCY)
+        completed = 0
+        generated: Dict[str, str] = {}  # Cache key -> new summary
+
+        async def summarize(batch: List[int]):
+            nonlocal completed
+            async with semaphore:
+                if len(batch) == 1:
+                    summaries = [await self._summarize_file(files[batch[0]])]
+                else:
+                    summaries = await self._summarize_file_batch([files[i] for i in batch])
+
+            missing = []
+            for index, summary in zip(batch, summaries):
+                results[index] = summary
+                if summary is None and len(batch) > 1:
+                    missing.append(index)
+                    continue
+                if summary:
+                    generated[batch_keys[index] if len(batch) > 1 else keys[index]] = summary
+                completed += 1
+                print(f"[INFO] Processed file {completed}/{len(pending)}: {files[index].path}")
+                if on_progress:
+                    on_progress(len(files) - len(pending) + completed, len(files), files[index].path)
+
+            # Files the shared call didn't cover get their own call
+            if missing:
+                print(f"[WARN] {len(missing)} files missing from shared MAP call, retrying individually")
+                await asyncio.gather(*(summarize([index]) for index in missing))
+
+        # Batches come largest first so the slowest calls don't form the tail
+        await asyncio.gather(*(summarize(batch) for batch in batches))
+
+        await self._store_file_summaries(generated)
+
+        # Keep original file order for a deterministic REDUCE prompt
+        file_summaries = [
+            {"filepath": file_diff.path, "summary": summary}
+            for file_diff, summary in zip(files, results)
+            if summary
+        ]
 
-            file_summary = await self._summarize_file(filepath, diff)
-            if file_summary:
-                file_summaries.append({
-                    "filepath": filepath,
-                    "summary": file_summary,
-                })
+        file_summaries = await self._reduce_by_directory(file_summaries)
 
         print(f"[INFO] REDUCE Phase: Combining {len(file_summaries)} file summaries...")
 
         # REDUCE: Combine file summaries with metadata
         return await self._generate_final_summary(
-            title, description, file_summaries, notes, commits
+            title, description, file_summaries, notes, commits, on_token
         )
 
-    async def _summarize_file(self, filepath: str, diff: str) -> Optional[str]:
+    def _pack_map_batches(
+        self, pending: List[int], tokens: List[int]
+    ) -> List[List[int]]:
+        """
+        Group pending files into MAP calls.
+
+        Diffs above OPENAI_MAP_SMALL_FILE_TOKENS get a call of their own.
+        Smaller ones are bin-packed (first-fit decreasing) into shared calls
+        of up to OPENAI_MAP_BATCH_TOKENS diff tokens and
+        MAX_FILES_PER_MAP_BATCH files.
+
+        Args:
+            pending: Indexes of the files that need a summary
+            tokens: Diff token count of every file, by index
+
+        Returns:
+            Batches of file indexes, largest (by diff tokens) first
+        """
+        batches = [[i] for i in pending if tokens[i] > settings.OPENAI_MAP_SMALL_FILE_TOKENS]
+        small = sorted(
+            (i for i in pending if tokens[i] <= settings.OPENAI_MAP_SMALL_FILE_TOKENS),
+            key=lambda i: tokens[i],
+            reverse=True,
+        )
+
+        bins: List[List[int]] = []
+        loads: List[int] = []
+        for i in small:
+            for b, load in enumerate(loads):
+                if (
+                    load + tokens[i] <= settings.OPENAI_MAP_BATCH_TOKENS
+                    and len(bins[b]) < self.MAX_FILES_PER_MAP_BATCH
+                ):
+                    bins[b].append(i)
+                    loads[b] += tokens[i]
+                    break
+            else:
+                bins.append([i])
+                loads.append(tokens[i])
+
+        batches.extend(bins)
+        return sorted(batches, key=lambda batch: sum(tokens[i] for i in batch), reverse=True)
+
+    async def _reduce_by_directory(self, file_summaries: List[Dict]) -> List[Dict]:
+        """
+        Condense file summaries until they fit the REDUCE token budget.
+
+        Tree reduce: summaries are grouped by directory, starting at the
+        deepest level, and each group is combined into one component
+        summary. Groups of a level are reduced concurrently; levels move
+        up the directory tree until the total fits (the repository root
+        last). Groups larger than the budget are split into several calls.
+
+        Args:
+            file_summaries: List of {"filepath", "summary"} (file or
+                            component summaries; components end with "/")
+
+        Returns:
+            List of {"filepath", "summary"} within the budget where possible
+        """
+        budget = settings.OPENAI_REDUCE_MAX_INPUT_TOKENS
+        counts = await self.token_counter.count_tokens_batch_async([
+            _format_summary_entry(fs["filepath"], fs["summary"]) for fs in file_summaries
+        ])
+        entries = [
+            (fs["filepath"], fs["summary"], count)
+            for fs, count in zip(file_summaries, counts)
+        ]
+        if not entries or sum(tokens for _, _, tokens in entries) <= budget:
+            return file_summaries
+
+        depth = max(len(_directory_parts(filepath)) for filepath, _, _ in entries)
+        semaphore = asyncio.Semaphore(settings.OPENAI_MAP_CONCURRENCY)
+        level = 0
+
+        async def reduce_group(label: str, group: List[Tuple[str, str, int]]):
+            if len(group) == 1:
+                return group
+            async with semaphore:
+                summary = await self._summarize_component(label, group)
+            if not summary:
+                return group  # Keep the file summaries rather than lose them
+            return [(label, summary, self._count_summary_tokens(label, summary))]
+
+        while sum(tokens for _, _, tokens in entries) > budget:
+            groups = _group_by_directory(entries, depth, budget)
+            if all(len(group) == 1 for _, group in groups):
+                if depth == 0:
+                    break  # Nothing left to combine
+                depth -= 1
+                continue
+
+            level += 1
+            print(f"[INFO] Tree reduce level {level}: {len(entries)} summaries -> {len(groups)} groups (depth {depth})")
+            reduced = await asyncio.gather(*(
+                reduce_group(label, group) for label, group in groups
+            ))
+            reduced_entries = [entry for group in reduced for entry in group]
+            if len(reduced_entries) == len(entries) and depth == 0:
+                break  # Every reduction failed; don't retry forever
+            entries = reduced_entries
+            depth = max(depth - 1, 0)
+
+        return [
+            {"filepath": filepath, "summary": summary}
+            for filepath, summary, _ in entries
+        ]
+
+    def _count_summary_tokens(self, filepath: str, summary: str) -> int:
+        """Count tokens of one summary as it appears in a REDUCE prompt."""
+        return self.token_counter.count_tokens(_format_summary_entry(filepath, summary))
+
+    async def _summarize_component(
+        self, label: str, group: List[Tuple[str, str, int]]
+    ) -> Optional[str]:
+        """
+        Combine the summaries of one directory into a component summary.
+
+        Args:
+            label: Directory label (e.g. "src/api/")
+            group: (filepath, summary, tokens) entries in the directory
+
+        Returns:
+            Component summary or None
+        """
+        summaries_section = "\n\n".join(
+            f"**{filepath}**: {summary}" for filepath, summary, _ in group
+        )
+
+        user_message = f"""Directory: {label}
+
+## Change Summaries
+{summaries_section}
+
+Provide a component summary of these changes."""
+
+        messages = [
+            {"role": "system", "content": self.get_component_summary_prompt()},
+            {"role": "user", "content": user_message},
+        ]
+
+        try:
+            return await self._create_completion(
+                messages=messages,
+                temperature=0.3,
+                max_tokens=800,
+            )
+
+        except Exception as e:
+            print(f"[ERROR] Failed to summarize component {label}: {e}")
+            return None
+
+    async def _load_cached_file_summaries(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Load cached file summaries (best-effort; a DB error means no hits).
+
+        Args:
+            keys: File summary cache keys
+
+        Returns:
+            Mapping of key -> cached summary
+        """
+        try:
+            async with AsyncSessionLocal() as db:
+                return await file_summary_service.get_file_summaries(db, keys)
+        except Exception as e:
+            print(f"[ERROR] Failed to load cached file summaries: {e}")
+            return {}
+
+    async def _store_file_summaries(self, summaries: Dict[str, str]):
+        """
+        Persist newly generated file summaries (best-effort).
+
+        Args:
+            summaries: Mapping of key -> summary
+        """
+        if not summaries:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                await file_summary_service.store_file_summaries(db, summaries)
+        except Exception as e:
+            print(f"[ERROR] Failed to store file summaries: {e}")
+
+    async def _summarize_file(self, file_diff: FileDiff) -> Optional[str]:
         """
         Summarize a single file change (MAP phase).
 
+        Diffs above OPENAI_FILE_CHUNK_TOKENS are split at hunk boundaries;
+        the chunks are summarized concurrently and merged, so the whole
+        change is seen rather than a truncated prefix. Diffs the estimate
+        puts under the limit are still truncated to it, since the estimate
+        is not a strict bound for dense content.
+
+        Args:
+            file_diff: Parsed file diff
+
+        Returns:
+            File summary or None
+        """
+        diff = file_diff.text
+        estimate, margin = self.token_counter.estimate_tokens(diff, file_diff.path)
+        if estimate + margin > settings.OPENAI_FILE_CHUNK_TOKENS:
+            chunks, omitted = await run_in_tokenizer_pool(self._split_diff_chunks, file_diff)
+            if len(chunks) > 1:
+                return await self._summarize_file_in_chunks(file_diff.path, chunks, omitted)
+            diff = chunks[0]
+        else:
+            diff = await run_in_tokenizer_pool(
+                self.token_counter.truncate_to_token_limit,
+                diff,
+                settings.OPENAI_FILE_CHUNK_TOKENS,
+            )
+
+        return await self._summarize_file_part(file_diff.path, diff)
+
+    def _split_diff_chunks(self, file_diff: FileDiff) -> Tuple[List[str], int]:
+        """
+        Split a diff into hunk-aligned chunks of at most OPENAI_FILE_CHUNK_TOKENS.
+
+        Consecutive hunks are packed together; a hunk larger than a chunk is
+        split at line boundaries. CPU-bound; run it in the tokenizer pool.
+
+        Args:
+            file_diff: Parsed file diff
+
+        Returns:
+            Tuple of (chunks, omitted): at most OPENAI_MAX_CHUNKS_PER_FILE
+            chunks, and the number of chunks left out beyond that
+        """
+        limit = settings.OPENAI_FILE_CHUNK_TOKENS
+
+        # ~3 characters per token keeps line-split pieces near the limit
+        pieces = [
+            piece
+            for hunk in file_diff.segments()
+            for piece in split_by_lines(hunk, limit * 3)
+        ]
+        counts = self.token_counter.count_tokens_batch(pieces)
+
+        chunks: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        for piece, tokens in zip(pieces, counts):
+            if tokens > limit:
+                # A single line that is too dense for the estimate above
+                piece = self.token_counter.truncate_to_token_limit(piece, limit - 1) + "\n"
+                tokens = limit
+            if current and current_tokens + tokens > limit:
+                chunks.append("".join(current))
+                current = []
+                current_tokens = 0
+            current.append(piece)
+            current_tokens += tokens
+        if current:
+            chunks.append("".join(current))
+
+        max_chunks = settings.OPENAI_MAX_CHUNKS_PER_FILE
+        return chunks[:max_chunks], max(len(chunks) - max_chunks, 0)
+
+    async def _summarize_file_in_chunks(
+        self, filepath: str, chunks: List[str], omitted: int
+    ) -> Optional[str]:
+        """
+        Summarize a large file's diff chunk by chunk, then merge.
+
+        Chunk summaries are cached by content like file summaries, so an
+        update to one part of a huge file only re-summarizes that part.
+
         Args:
             filepath: Path to file
-            diff: Unified diff content
+            chunks: Hunk-aligned diff chunks
+            omitted: Chunks left out beyond OPENAI_MAX_CHUNKS_PER_FILE
 
         Returns:
             File summary or None
         """
-        # Truncate diff if too large
-        max_diff_tokens = 10000
-        diff_token_count = self.token_counter.count_tokens(diff)
+        print(f"[INFO] Summarizing {filepath} in {len(chunks)} chunks")
+
+        keys = [
+            file_summary_service.compute_summary_key(
+                filepath, chunk, f"{self.FILE_SUMMARY_PROMPT_VERSION}-chunk", self.deployment
+            )
+            for chunk in chunks
+        ]
+        cached = await self._load_cached_file_summaries(keys)
+        semaphore = asyncio.Semaphore(settings.OPENAI_MAP_CONCURRENCY)
+
+        async def summarize(index: int) -> Optional[str]:
+            if keys[index] in cached:
+                return cached[keys[index]]
+            async with semaphore:
+                return await self._summarize_file_part(
+                    filepath, chunks[index], (index + 1, len(chunks))
+                )
+
+        summaries = await asyncio.gather(*(summarize(i) for i in range(len(chunks))))
+
+        await self._store_file_summaries({
+            key: summary
+            for key, summary in zip(keys, summaries)
+            if summary and key not in cached
+        })
+
+        parts = [summary for summary in summaries if summary]
+        if not parts:
+            return None
+
+        return await self._merge_chunk_summaries(filepath, parts, omitted)
+
+    async def _merge_chunk_summaries(
+        self, filepath: str, parts: List[str], omitted: int
+    ) -> Optional[str]:
+        """
+        Merge chunk summaries into one file summary.
+
+        Args:
+            filepath: Path to file
+            parts: Chunk summaries in diff order
+            omitted: Chunks that were left out
 
-        if diff_token_count > max_diff_tokens:
-            diff = self.token_counter.truncate_to_token_limit(diff, max_diff_tokens)
+        Returns:
+            File summary or None
+        """
+        parts_section = "\n\n".join(
+            f"Part {number}: {summary}" for number, summary in enumerate(parts, 1)
+        )
+        omitted_note = (
+            f"\n\n({omitted} further parts of this diff were not summarized.)"
+            if omitted else ""
+        )
 
         user_message = f"""File: {filepath}
 
+This file's diff is large, so it was summarized in {len(parts)} parts:
+
+{parts_section}{omitted_note}
+
+Combine these into one brief summary of the whole change."""
+
+        messages = [
+            {"role": "system", "content": self.get_file_summary_prompt()},
+            {"role": "user", "content": user_message},
+        ]
+
+        try:
+            return await self._create_completion(
+                messages=messages,
+                temperature=0.3,
+                max_tokens=500,  # Brief summaries
+            )
+
+        except Exception as e:
+            print(f"[ERROR] Failed to merge chunk summaries for {filepath}: {e}")
+            return None
+
+    async def _summarize_file_part(
+        self, filepath: str, diff: str, part: Optional[Tuple[int, int]] = None
+    ) -> Optional[str]:
+        """
+        Summarize one file diff (or one chunk of it) in a single call.
+
+        Args:
+            filepath: Path to file
+            diff: Unified diff content (at most OPENAI_FILE_CHUNK_TOKENS)
+            part: (number, total) if this is a chunk of a larger diff
+
+        Returns:
+            Summary or None
+        """
+        file_label = f"{filepath} (part {part[0]} of {part[1]})" if part else filepath
+
+        user_message = f"""File: {file_label}
+
 Changes:
 ```diff
 {diff}
@@ -253,19 +944,69 @@ Provide a brief summary of this change."""
         ]
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.deployment,
+            return await self._create_completion(
                 messages=messages,
                 temperature=0.3,
                 max_tokens=500,  # Brief summaries
             )
 
-            return response.choices[0].message.content
-
         except Exception as e:
             print(f"[ERROR] Failed to summarize file {filepath}: {e}")
             return None
 
+    async def _summarize_file_batch(
+        self, batch_files: List[FileDiff]
+    ) -> List[Optional[str]]:
+        """
+        Summarize several small file changes in one call (MAP phase).
+
+        The model answers in JSON mode with one summary per file number.
+
+        Args:
+            batch_files: Parsed file diffs
+
+        Returns:
+            Summaries in the order of `batch_files` (None for files missing
+            from the response, or for all of them if the call failed)
+        """
+        files_section = "".join(
+            f"\n### File {number}: {file_diff.path}\n```diff\n{file_diff.text}\n```\n"
+            for number, file_diff in enumerate(batch_files, 1)
+        )
+
+        user_message = f"""{files_section}
+Provide a brief summary of each change. Respond with a JSON object mapping each file number to its summary:
+{{"summaries": {{"1": "...", "2": "..."}}}}"""
+
+        messages = [
+            {"role": "system", "content": self.get_file_batch_summary_prompt()},
+            {"role": "user", "content": user_message},
+        ]
+
+        try:
+            content = await self._create_completion(
+                messages=messages,
+                temperature=0.3,
+                max_tokens=min(
+                    self.MAX_OUTPUT_TOKENS,
+                    self.MAP_BATCH_OUTPUT_TOKENS_PER_FILE * len(batch_files) + 100,
+                ),
+                response_format={"type": "json_object"},
+            )
+            summaries = json.loads(content)["summaries"]
+            if not isinstance(summaries, dict):
+                raise ValueError("'summaries' is not an object")
+
+        except Exception as e:
+            print(f"[ERROR] Failed to summarize batch of {len(batch_files)} files: {e}")
+            return [None] * len(batch_files)
+
+        results = []
+        for number in range(1, len(batch_files) + 1):
+            summary = summaries.get(str(number))
+            results.append(summary.strip() if isinstance(summary, str) and summary.strip() else None)
+        return results
+
     async def _generate_final_summary(
         self,
         title: str,
@@ -273,6 +1014,7 @@ Provide a brief summary of this change."""
         file_summaries: List[Dict],
         notes: List[Dict],
         commits: List[Dict],
+        on_token: Optional[TokenCallback] = None,
     ) -> Optional[str]:
         """
         Generate final summary from file summaries (REDUCE phase).
@@ -283,6 +1025,7 @@ Provide a brief summary of this change."""
             file_summaries: List of per-file summaries
             notes: Discussion notes
             commits: Commit messages
+            on_token: Optional callback receiving the summary as it streams
 
         Returns:
             Final summary or None
@@ -327,79 +1070,78 @@ Based on the above information, generate a comprehensive technical summary follo
         ]
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.deployment,
+            return await self._create_completion(
                 messages=messages,
                 temperature=0.3,
                 max_tokens=self.MAX_OUTPUT_TOKENS,
+                on_token=on_token,
             )
 
-            return response.choices[0].message.content
-
         except Exception as e:
             print(f"[ERROR] Failed to generate final summary: {e}")
             return None
 
-    def _build_full_context(
-        self,
-        title: str,
-        description: str,
-        changes: List[Dict],
-        notes: List[Dict],
-        commits: List[Dict],
-    ) -> str:
-        """
-        Build full context message for direct summarization.
 
-        Args:
-            title: MR title
-            description: MR description
-            changes: File changes
-            notes: Discussion notes
-            commits: Commits
+def _format_summary_entry(filepath: str, summary: str) -> str:
+    """Format one file or component summary as it appears in a REDUCE prompt."""
+    return f"**{filepath}**: {summary}\n\n"
 
-        Returns:
-            Formatted context string
-        """
-        # Build changes section
-        changes_section = ""
-        for change in changes[:50]:  # Limit to 50 files
-            filepath = change.get("new_path", change.get("old_path", "unknown"))
-            diff = change.get("diff", "")
 
-            # Truncate large diffs
-            if self.token_counter.count_tokens(diff) > 2000:
-                diff = self.token_counter.truncate_to_token_limit(diff, 2000)
+def _directory_parts(filepath: str) -> List[str]:
+    """
+    Split the directory a summary belongs to into path components.
 
-            changes_section += f"\n### {filepath}\n```diff\n{diff}\n```\n"
+    Component summaries are labelled with their directory and a trailing
+    "/" (the repository root is "./"), file summaries with their path.
 
-        # Build commits section
-        commits_section = "\n".join([
-            f"- {commit.get('title', '')}"
-            for commit in commits[:20]
-        ])
+    Args:
+        filepath: File path or component label
 
-        # Build notes section
-        notes_section = "\n".join([
-            f"- **{note.get('author', 'Unknown')}**: {note.get('body', '')[:300]}"
-            for note in notes[:10]
-        ])
-
-        return f"""# Merge Request: {title}
+    Returns:
+        Directory components, e.g. ["src", "api"]
+    """
+    if filepath.endswith("/"):
+        directory = filepath.rstrip("/")
+    else:
+        directory = posixpath.dirname(filepath)
+    return [part for part in directory.split("/") if part and part != "."]
 
-## Description
-{description if description else "No description provided"}
 
-## File Changes
-{changes_section}
+def _group_by_directory(
+    entries: List[Tuple[str, str, int]], depth: int, budget: int
+) -> List[Tuple[str, List[Tuple[str, str, int]]]]:
+    """
+    Group summaries by their directory truncated to `depth` components.
 
-## Commits
-{commits_section}
+    Groups keep first-seen order; a group whose summaries exceed `budget`
+    tokens is split into consecutive batches.
 
-## Discussion
-{notes_section if notes_section else "No discussions"}
+    Args:
+        entries: (filepath, summary, tokens) tuples
+        depth: Number of leading directory components to group by
+        budget: Maximum tokens per group
 
-Analyze this merge request and provide a comprehensive technical summary."""
+    Returns:
+        List of (component label, entries) pairs
+    """
+    by_directory: Dict[Tuple[str, ...], List[Tuple[str, str, int]]] = {}
+    for entry in entries:
+        key = tuple(_directory_parts(entry[0])[:depth])
+        by_directory.setdefault(key, []).append(entry)
+
+    groups = []
+    for key, members in by_directory.items():
+        label = "/".join(key) + "/" if key else "./"
+        batch, batch_tokens = [], 0
+        for entry in members:
+            if batch and batch_tokens + entry[2] > budget:
+                groups.append((label, batch))
+                batch, batch_tokens = [], 0
+            batch.append(entry)
+            batch_tokens += entry[2]
+        groups.append((label, batch))
+
+    return groups
 
 
 # Singleton instance
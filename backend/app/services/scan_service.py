@@ -2,13 +2,74 @@
 Scan service for database operations.
 Handles CRUD operations for Scan model and cache logic.
 """
+import base64
+import binascii
+import json
+import re
+import time
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, or_
-from typing import Optional, List
+from sqlalchemy import select, desc, or_, func, text, tuple_
+from sqlalchemy.orm import defer
+from typing import Any, Callable, Dict, Optional, List, Tuple
 from datetime import datetime
 
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.core.db_writer import run_write
+from app.core.migrations import scan_search_index_enabled
 from app.models.scan import Scan
 
+# History counts by search term: search -> (monotonic time, count)
+_count_cache: Dict[Optional[str], Tuple[float, int]] = {}
+_COUNT_CACHE_SIZE = 1024
+
+# bm25 column weights for search ranking: title, mr_url, summary_markdown
+_FTS_WEIGHTS = "10.0, 5.0, 1.0"
+
+# The same weights for PostgreSQL's ts_rank_cd, ordered {D, C, B, A}:
+# summary_markdown is C, mr_url B, title A
+_TS_RANK_WEIGHTS = "{0.1, 0.1, 0.5, 1.0}"
+
+# Highlight markers in search snippets (the rest of a snippet is plain text)
+SNIPPET_OPEN = "<mark>"
+SNIPPET_CLOSE = "</mark>"
+
+# Full-text search statements by dialect (indexes from app.core.migrations).
+# :match is the dialect's query syntax (see _search_match); "rank" scores
+# matches lower-is-better, like bm25().
+_SEARCH_SQL = {
+    "sqlite": {
+        "count": "SELECT count(*) FROM scans_fts WHERE scans_fts MATCH :match",
+        "rank": f"""
+            SELECT rowid AS id, bm25(scans_fts, {_FTS_WEIGHTS}) AS score
+            FROM scans_fts WHERE scans_fts MATCH :match
+        """,
+        "snippet": """
+            SELECT rowid AS id, snippet(scans_fts, -1, :open, :close, '…', 16) AS snippet
+            FROM scans_fts WHERE scans_fts MATCH :match AND rowid IN ({ids})
+        """,
+    },
+    "postgresql": {
+        "count": """
+            SELECT count(*) FROM scans
+            WHERE search_vector @@ to_tsquery('simple', :match)
+        """,
+        "rank": """
+            SELECT id, -CAST(ts_rank_cd('""" + _TS_RANK_WEIGHTS + """', search_vector,
+                                        to_tsquery('simple', :match)) AS FLOAT) AS score
+            FROM scans WHERE search_vector @@ to_tsquery('simple', :match)
+        """,
+        "snippet": """
+            SELECT id, ts_headline(
+                'simple', title || ' ' || summary_markdown, to_tsquery('simple', :match),
+                'StartSel="' || :open || '", StopSel="' || :close || '", '
+                || 'MaxWords=16, MinWords=8, MaxFragments=1'
+            ) AS snippet
+            FROM scans WHERE id IN ({ids})
+        """,
+    },
+}
+
 
 async def get_scan_by_mr(
     db: AsyncSession,
@@ -53,6 +114,7 @@ async def create_scan(
     db.add(scan)
     await db.commit()
     await db.refresh(scan)
+    _count_cache.clear()
     return scan
 
 
@@ -87,34 +149,42 @@ async def upsert_scan(
     title: str,
     last_commit_sha: str,
     summary_markdown: str,
+    incremental_updates: int = 0,
 ) -> Scan:
     """
     Create scan if doesn't exist, otherwise update.
     This is the main function used by the analysis endpoint.
+    incremental_updates counts the updates applied since the last full
+    summary (0 for a full summary).
+
+    One INSERT ... ON CONFLICT (project_id, mr_iid) DO UPDATE ... RETURNING
+    statement, so concurrent writers for the same MR can't create
+    duplicate rows. Committed through the database writer.
     """
-    scan = await get_scan_by_mr(db, project_id, mr_iid)
+    values = {
+        "mr_url": mr_url,
+        "title": title,
+        "last_commit_sha": last_commit_sha,
+        "summary_markdown": summary_markdown,
+        "incremental_updates": incremental_updates,
+        "scanned_at": datetime.utcnow(),
+    }
 
-    if scan:
-        # Update existing scan
-        scan.last_commit_sha = last_commit_sha
-        scan.summary_markdown = summary_markdown
-        scan.title = title
-        scan.mr_url = mr_url
-        scan.scanned_at = datetime.utcnow()
-        await db.commit()
-        await db.refresh(scan)
-    else:
-        # Create new scan
-        scan = await create_scan(
-            db=db,
-            project_id=project_id,
-            mr_iid=mr_iid,
-            mr_url=mr_url,
-            title=title,
-            last_commit_sha=last_commit_sha,
-            summary_markdown=summary_markdown,
+    async def write(session: AsyncSession) -> Scan:
+        insert = dialect_insert(session)
+        statement = insert(Scan).values(project_id=project_id, mr_iid=mr_iid, **values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Scan.project_id, Scan.mr_iid],
+            set_={name: statement.excluded[name] for name in values},
+        ).returning(Scan)
+
+        result = await session.execute(
+            statement, execution_options={"populate_existing": True}
         )
+        return result.scalar_one()
 
+    scan = await run_write(db, write)
+    _count_cache.clear()
     return scan
 
 
@@ -140,42 +210,226 @@ async def check_cache_validity(
     return (is_valid, scan)
 
 
+def encode_cursor(*values) -> str:
+    """Encode a keyset position (sort key values) as an opaque cursor."""
+    raw = json.dumps(list(values))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Tuple[Callable[[Any], Any], ...]) -> tuple:
+    """
+    Decode a cursor from encode_cursor().
+
+    Args:
+        cursor: Cursor string
+        types: Converter for each expected value
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("Wrong number of cursor values")
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def count_scans(db: AsyncSession, search: Optional[str] = None) -> int:
+    """
+    Count scans matching a search, with COUNT(*).
+
+    Counts are cached for HISTORY_COUNT_CACHE_SECONDS (per search term),
+    so paging through history doesn't recount every time.
+    """
+    now = time.monotonic()
+    cached = _count_cache.get(search)
+    if cached and now - cached[0] < settings.HISTORY_COUNT_CACHE_SECONDS:
+        return cached[1]
+
+    if search and scan_search_index_enabled():
+        dialect = db.get_bind().dialect.name
+        match = _search_match(search, dialect)
+        total = 0
+        if match:
+            total = (await db.execute(
+                text(_SEARCH_SQL[dialect]["count"]), {"match": match}
+            )).scalar_one()
+    else:
+        query = select(func.count()).select_from(Scan)
+        condition = _search_condition(search)
+        if condition is not None:
+            query = query.where(condition)
+        total = (await db.execute(query)).scalar_one()
+
+    if len(_count_cache) >= _COUNT_CACHE_SIZE:
+        _count_cache.clear()
+    _count_cache[search] = (now, total)
+    return total
+
+
 async def get_all_scans(
     db: AsyncSession,
     search: Optional[str] = None,
     limit: int = 50,
-    offset: int = 0
-) -> tuple[List[Scan], int]:
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> tuple[List[Scan], int, Optional[str], Dict[int, str]]:
     """
     Get all scans with optional search and pagination.
 
+    Without a search, scans are ordered by (scanned_at, id), most recent
+    first. A search uses the full-text index (title, URL and summary)
+    when available, ranked by relevance with highlighted snippets.
+    With a cursor (keyset pagination) each page costs the same
+    regardless of depth; offset is still accepted for old clients.
+    summary_markdown is not loaded.
+
+    Raises:
+        ValueError: If the cursor is malformed
+
     Returns:
-        (scans, total_count): List of scans and total count
-    """
-    # Base query
-    query = select(Scan)
-
-    # Add search filter if provided
-    if search:
-        search_pattern = f"%{search}%"
-        query = query.where(
-            or_(
-                Scan.title.ilike(search_pattern),
-                Scan.mr_url.ilike(search_pattern)
-            )
-        )
+        (scans, total_count, next_cursor, snippets): Page of scans, total
+        count, the cursor of the next page (None on the last page) and
+        search snippets by scan ID (empty without a full-text search)
+    """
+    if search and scan_search_index_enabled():
+        return await _search_scans(db, search, limit, offset, cursor)
 
-    # Get total count
-    count_result = await db.execute(
-        select(Scan).where(query.whereclause) if query.whereclause is not None else select(Scan)
-    )
-    total = len(count_result.all())
+    query = select(Scan).options(defer(Scan.summary_markdown))
+
+    condition = _search_condition(search)
+    if condition is not None:
+        query = query.where(condition)
 
-    # Apply ordering and pagination
-    query = query.order_by(desc(Scan.scanned_at)).limit(limit).offset(offset)
+    if cursor:
+        scanned_at, scan_id = decode_cursor(cursor, (datetime.fromisoformat, int))
+        query = query.where(tuple_(Scan.scanned_at, Scan.id) < tuple_(scanned_at, scan_id))
+    elif offset:
+        query = query.offset(offset)
+
+    # One extra row tells whether there is a next page
+    query = query.order_by(desc(Scan.scanned_at), desc(Scan.id)).limit(limit + 1)
 
-    # Execute query
     result = await db.execute(query)
-    scans = result.scalars().all()
+    scans = list(result.scalars().all())
+
+    next_cursor = None
+    if len(scans) > limit:
+        scans = scans[:limit]
+        next_cursor = encode_cursor(scans[-1].scanned_at.isoformat(), scans[-1].id)
+
+    total = await count_scans(db, search)
+
+    return (scans, total, next_cursor, {})
+
+
+async def _search_scans(
+    db: AsyncSession,
+    search: str,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+) -> tuple[List[Scan], int, Optional[str], Dict[int, str]]:
+    """
+    Full-text search over scans, best matches first (see get_all_scans).
+
+    Pages are keyset-paginated on (score, id).
+    """
+    dialect = db.get_bind().dialect.name
+    statements = _SEARCH_SQL[dialect]
+    match = _search_match(search, dialect)
+    if not match:
+        return ([], 0, None, {})
 
-    return (list(scans), total)
+    params = {"match": match, "limit": limit + 1}
+    after = ""
+    if cursor:
+        params["score"], params["id"] = decode_cursor(cursor, (float, int))
+        after = "WHERE (score, id) > (CAST(:score AS FLOAT), CAST(:id AS INTEGER))"
+    elif offset:
+        params["offset"] = offset
+
+    result = await db.execute(
+        text(f"""
+            SELECT id, score FROM ({statements["rank"]}) AS ranked {after}
+            ORDER BY score, id
+            LIMIT :limit{" OFFSET :offset" if "offset" in params else ""}
+        """),
+        params,
+    )
+    ranked = result.all()
+
+    next_cursor = None
+    if len(ranked) > limit:
+        ranked = ranked[:limit]
+        next_cursor = encode_cursor(ranked[-1].score, ranked[-1].id)
+
+    ids = [row.id for row in ranked]
+    if not ids:
+        return ([], await count_scans(db, search), None, {})
+
+    # Snippets only for the page, not every match
+    id_list = ", ".join(str(scan_id) for scan_id in ids)
+    snippet_rows = await db.execute(
+        text(statements["snippet"].format(ids=id_list)),
+        {"match": match, "open": SNIPPET_OPEN, "close": SNIPPET_CLOSE},
+    )
+    snippets = {row.id: row.snippet for row in snippet_rows}
+
+    result = await db.execute(
+        select(Scan).options(defer(Scan.summary_markdown)).where(Scan.id.in_(ids))
+    )
+    by_id = {scan.id: scan for scan in result.scalars()}
+    scans = [by_id[scan_id] for scan_id in ids if scan_id in by_id]
+
+    total = await count_scans(db, search)
+
+    return (scans, total, next_cursor, snippets)
+
+
+def _search_match(search: str, dialect: str) -> str:
+    """Turn user input into the full-text query syntax of a dialect."""
+    if dialect == "postgresql":
+        return _tsquery(search)
+    return _fts_query(search)
+
+
+def _fts_query(search: str) -> str:
+    """
+    Turn user input into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted, so FTS5 operators and punctuation in the input
+    (URLs, "!123") are matched literally instead of parsed.
+    """
+    words = [word for word in search.split() if any(char.isalnum() for char in word)]
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+def _tsquery(search: str) -> str:
+    """
+    Turn user input into a PostgreSQL tsquery with _fts_query's semantics.
+
+    Each word becomes a phrase of its alphanumeric runs ("foo.bar" ->
+    foo <-> bar), the last one a prefix; words are ANDed. Only
+    alphanumerics reach the query, so tsquery operators can't be injected.
+    """
+    phrases = []
+    for word in search.split():
+        tokens = re.findall(r"[^\W_]+", word.lower())
+        if tokens:
+            phrases.append("(" + " <-> ".join(tokens) + ":*)")
+    return " & ".join(phrases)
+
+
+def _search_condition(search: Optional[str]):
+    """WHERE clause for a LIKE history search, or None if there is no search."""
+    if not search:
+        return None
+    search_pattern = f"%{search}%"
+    return or_(
+        Scan.title.ilike(search_pattern),
+        Scan.mr_url.ilike(search_pattern)
+    )
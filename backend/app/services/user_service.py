@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional
 
+from app.core.db_writer import run_write
 from app.models.user import User
 
 
@@ -76,29 +77,32 @@ async def upsert_user(
     """
     Create user if doesn't exist, otherwise update tokens.
     This is useful for OAuth flow where user might already exist.
+    Committed through the database writer.
     """
-    user = await get_user_by_gitlab_id(db, gitlab_user_id)
+    async def write(session: AsyncSession) -> User:
+        user = await get_user_by_gitlab_id(session, gitlab_user_id)
 
-    if user:
-        # Update existing user
-        user.access_token = access_token
-        if refresh_token:
-            user.refresh_token = refresh_token
-        if username:
-            user.username = username
-        if email:
-            user.email = email
-        await db.commit()
-        await db.refresh(user)
-    else:
-        # Create new user
-        user = await create_user(
-            db=db,
-            gitlab_user_id=gitlab_user_id,
-            access_token=access_token,
-            refresh_token=refresh_token,
-            username=username,
-            email=email,
-        )
+        if user:
+            # Update existing user
+            user.access_token = access_token
+            if refresh_token:
+                user.refresh_token = refresh_token
+            if username:
+                user.username = username
+            if email:
+                user.email = email
+        else:
+            # Create new user
+            user = User(
+                gitlab_user_id=gitlab_user_id,
+                access_token=access_token,
+                refresh_token=refresh_token,
+                username=username,
+                email=email,
+            )
+            session.add(user)
 
-    return user
+        await session.flush()
+        return user
+
+    return await run_write(db, write)
@@ -0,0 +1,154 @@
+"""
+Test script for the context budget planner.
+Tests the water-filling diff cap and how plan() truncates and omits
+files to stay within the budget.
+"""
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.token_counter import get_token_counter
+from app.services.context_planner import ContextBudgetPlanner, _water_fill_cap
+
+ADDED_LINE = "+value = compute_something(item, factor=7)\n"
+
+
+def test_water_fill_cap():
+    """Test the per-file cap computation."""
+    print("\n" + "=" * 60)
+    print("Testing Water-Fill Cap")
+    print("=" * 60)
+
+    # Largest cap: one more token per capped file would overflow
+    sizes = [10, 500, 700, 900]
+    cap = _water_fill_cap(sizes, 1000)
+
+    test_cases = [
+        ("No cap when everything fits", _water_fill_cap([100, 200, 300], 600), None),
+        ("No cap without files", _water_fill_cap([], 0), None),
+        ("Small files whole, the rest share what's left", _water_fill_cap([100, 200, 1000, 5000], 1500), 600),
+        ("Capped sizes fit the budget", sum(min(size, cap) for size in sizes) <= 1000, True),
+        ("Cap is the largest that fits", sum(min(size, cap + 1) for size in sizes) > 1000, True),
+        ("Cap bottoms out at zero", _water_fill_cap([500, 500], 1), 0),
+        ("Negative budget gives zero cap", _water_fill_cap([500, 500], -10), 0),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+def test_plan():
+    """Test plan() truncation and omission decisions."""
+    print("=" * 60)
+    print("Testing Plan Decisions")
+    print("=" * 60)
+
+    counter = get_token_counter()
+    planner = ContextBudgetPlanner(counter)
+
+    small = {"old_path": "src/small.py", "new_path": "src/small.py",
+             "diff": "@@ -0,0 +1,5 @@\n" + ADDED_LINE * 5}
+    medium = {"old_path": "src/medium.py", "new_path": "src/medium.py",
+              "diff": "@@ -0,0 +1,40 @@\n" + ADDED_LINE * 40}
+    large = {"old_path": "src/large.py", "new_path": "src/large.py",
+             "diff": "@@ -0,0 +1,800 @@\n" + ADDED_LINE * 800}
+    changes = [small, medium, large]
+    commits = [{"title": "Add values"}]
+    notes = [{"author": "reviewer", "body": "Looks fine"}]
+
+    # Generous budget: everything whole
+    whole = planner.plan("Title", "Description", changes, notes, commits, 1_000_000)
+
+    # Tight budget: only the large file is truncated
+    large_tokens = counter.count_tokens(large["diff"])
+    tight_budget = whole["tokens"] - large_tokens // 2
+    tight = planner.plan("Title", "Description", changes, notes, commits, tight_budget)
+
+    # Budget too small for MIN_DIFF_TOKENS per file: trailing files omitted
+    # (100 tokens left for the file headings, less than a third file needs)
+    fixed = planner.plan("Title", "Description", [], notes, commits, 1_000_000)["tokens"]
+    short_budget = fixed + counter.count_tokens(small["diff"]) + ContextBudgetPlanner.MIN_DIFF_TOKENS + 100
+    short = planner.plan("Title", "Description", changes, notes, commits, short_budget)
+
+    test_cases = [
+        ("Large budget keeps every file whole", whole["decisions"]["complete"], True),
+        ("No cap with a large budget", whole["decisions"]["diff_token_cap"], None),
+        ("Every diff in the message",
+         all(change["diff"] in whole["message"] for change in changes), True),
+        ("Only the largest file truncated", tight["decisions"]["files_truncated"], ["src/large.py"]),
+        ("Nothing omitted with a tight budget", tight["decisions"]["files_omitted"], []),
+        ("Cap set below the largest diff", tight["decisions"]["diff_token_cap"] < large_tokens, True),
+        ("Smaller diffs sent whole",
+         small["diff"] in tight["message"] and medium["diff"] in tight["message"], True),
+        ("Tight plan stays within the budget", tight["tokens"] <= tight_budget, True),
+        ("Trailing file omitted when it can't get MIN_DIFF_TOKENS",
+         short["decisions"]["files_omitted"], ["src/large.py"]),
+        ("Leading files still included", short["decisions"]["files_included"], 2),
+        ("Omitted file left out of the message", "src/large.py" in short["message"], False),
+        ("Plan with omissions is not complete", short["decisions"]["complete"], False),
+        ("Plan with omissions stays within the budget", short["tokens"] <= short_budget, True),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+def main():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("DELTA Context Planner Tests")
+    print("=" * 60)
+
+    all_passed = True
+
+    # Test the water-fill cap
+    if not test_water_fill_cap():
+        all_passed = False
+
+    # Test plan decisions
+    if not test_plan():
+        all_passed = False
+
+    # Final summary
+    print("=" * 60)
+    if all_passed:
+        print("[OK] ALL TESTS PASSED!")
+    else:
+        print("[FAIL] Some tests failed")
+    print("=" * 60)
+    print()
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    result = main()
+    sys.exit(0 if result else 1)
@@ -163,13 +163,13 @@ async def test_database():
     async with AsyncSessionLocal() as db:
         try:
             # Get all scans
-            scans, total = await scan_service.get_all_scans(db=db)
+            scans, total, _, _ = await scan_service.get_all_scans(db=db)
             assert len(scans) == 2
             assert total == 2
             print(f"✓ Retrieved all scans: {total} total")
 
             # Test search
-            scans, total = await scan_service.get_all_scans(
+            scans, total, _, _ = await scan_service.get_all_scans(
                 db=db,
                 search="feature"
             )
@@ -178,7 +178,7 @@ async def test_database():
             print(f"✓ Search functionality works: found {len(scans)} match(es)")
 
             # Test pagination
-            scans, total = await scan_service.get_all_scans(
+            scans, total, _, _ = await scan_service.get_all_scans(
                 db=db,
                 limit=1,
                 offset=0
@@ -204,10 +204,12 @@ async def test_database():
                 mr_url="https://gitlab.com/project/repo/-/merge_requests/42",
                 title="Add new feature (updated)",
                 last_commit_sha="final_sha_999",
-                summary_markdown="# Final Summary\n\nFinal version."
+                summary_markdown="# Final Summary\n\nFinal version.",
+                incremental_updates=2,
             )
             assert scan.last_commit_sha == "final_sha_999"
             assert scan.title == "Add new feature (updated)"
+            assert scan.incremental_updates == 2
             print(f"✓ Upsert updated existing scan")
 
             # Upsert new scan (should create)
@@ -221,6 +223,7 @@ async def test_database():
                 summary_markdown="# Upsert Summary\n\nCreated via upsert."
             )
             assert scan.project_id == 300
+            assert scan.incremental_updates == 0
             print(f"✓ Upsert created new scan")
 
         except Exception as e:
@@ -0,0 +1,240 @@
+"""
+Test script for diff compression.
+Tests that whitespace-only, moved and repeated hunks are collapsed and
+that real changes are kept.
+"""
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.token_counter import get_token_counter
+from app.services.diff_compressor import DiffCompressor
+
+BLOCK = "".join(f"{{sign}}{line}\n" for line in [
+    "def helper(a, b):",
+    "    total = a + b",
+    "    return total * 2",
+])
+REMOVED_BLOCK = BLOCK.format(sign="-")
+ADDED_BLOCK = BLOCK.format(sign="+")
+
+
+def test_whitespace():
+    """Test whitespace-only hunk detection."""
+    print("\n" + "=" * 60)
+    print("Testing Whitespace Collapsing")
+    print("=" * 60)
+
+    compressor = DiffCompressor(get_token_counter(), context_lines=1, min_collapse_lines=3)
+    compressed, _ = compressor.compress([
+        # Re-indented JavaScript: whitespace doesn't matter
+        {"old_path": "reindent.js", "new_path": "reindent.js",
+         "diff": "@@ -1,3 +1,3 @@\n function f() {\n-  return  g(x);\n+    return g(x);\n }\n"},
+        {"old_path": "blank.js", "new_path": "blank.js",
+         "diff": "@@ -1,2 +1,3 @@\n a();\n+\n b();\n"},
+        # Whitespace inside a token removed: a real change
+        {"old_path": "joined.js", "new_path": "joined.js",
+         "diff": "@@ -1,3 +1,3 @@\n function f() {\n-  return x;\n+  returnx;\n }\n"},
+        # Dedent out of a Python loop changes what runs
+        {"old_path": "job.py", "new_path": "job.py",
+         "diff": "@@ -1,3 +1,3 @@\n for x in items:\n     prepare(x)\n-    do(x)\n+do(x)\n"},
+        {"old_path": "config.yml", "new_path": "config.yml",
+         "diff": "@@ -1,2 +1,2 @@\n server:\n-  port: 80\n+port: 80\n"},
+        {"old_path": "Makefile", "new_path": "Makefile",
+         "diff": "@@ -1,2 +1,2 @@\n build:\n-\tcc main.c\n+        cc main.c\n"},
+        # Trailing whitespace in Python is still whitespace-only
+        {"old_path": "trailing.py", "new_path": "trailing.py",
+         "diff": "@@ -1,2 +1,2 @@\n for x in items:\n-    do(x)   \n+    do(x)\n"},
+    ])
+    reindent, blank, joined, dedent, yaml, makefile, trailing = (
+        change["diff"] for change in compressed
+    )
+
+    test_cases = [
+        ("Re-indented line collapsed",
+         "whitespace-only change" in reindent and "return" not in reindent, True),
+        ("Added blank line collapsed", "whitespace-only change" in blank, True),
+        ("Joined words kept (return x -> returnx)",
+         "whitespace-only" not in joined and "+  returnx;" in joined, True),
+        ("Python dedent kept", "whitespace-only" not in dedent and "+do(x)" in dedent, True),
+        ("YAML indentation change kept", "whitespace-only" in yaml, False),
+        ("Makefile tab change kept", "whitespace-only" in makefile, False),
+        ("Python trailing whitespace collapsed", "whitespace-only change" in trailing, True),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+def test_moves_and_duplicates():
+    """Test collapsing of moved and repeated blocks."""
+    print("=" * 60)
+    print("Testing Move and Duplicate Collapsing")
+    print("=" * 60)
+
+    compressor = DiffCompressor(get_token_counter(), context_lines=1, min_collapse_lines=3)
+    removal = {"old_path": "src/old.py", "new_path": "src/old.py",
+               "diff": "@@ -10,3 +9,0 @@\n" + REMOVED_BLOCK}
+    addition = {"old_path": "src/new.py", "new_path": "src/new.py",
+                "diff": "@@ -4,0 +5,3 @@\n" + ADDED_BLOCK}
+
+    moved, _ = compressor.compress([removal, addition])
+    old_diff, new_diff = moved[0]["diff"], moved[1]["diff"]
+
+    # The same move with the other file shifted: the notes don't change
+    shifted, _ = compressor.compress([removal, {
+        "old_path": "src/new.py", "new_path": "src/new.py",
+        "diff": "@@ -40,0 +41,3 @@\n" + ADDED_BLOCK,
+    }])
+
+    # Within one file, notes point at the line
+    same_file, _ = compressor.compress([{
+        "old_path": "src/app.py", "new_path": "src/app.py",
+        "diff": "@@ -10,3 +9,0 @@\n" + REMOVED_BLOCK + "@@ -50,0 +48,3 @@\n" + ADDED_BLOCK,
+    }])
+
+    # Moved block edited on the way: not a move
+    edited, _ = compressor.compress([removal, {
+        "old_path": "src/new.py", "new_path": "src/new.py",
+        "diff": "@@ -4,0 +5,3 @@\n" + ADDED_BLOCK.replace("2", "3"),
+    }])
+
+    # Same hunk in two files
+    hunk = "@@ -1,1 +1,3 @@\n import os\n+import sys\n+import json\n+import re\n"
+    repeated, _ = compressor.compress([
+        {"old_path": "a.py", "new_path": "a.py", "diff": hunk},
+        {"old_path": "b.py", "new_path": "b.py", "diff": hunk},
+    ])
+
+    test_cases = [
+        ("Removed side of a move collapsed",
+         "3 lines moved to another file" in old_diff and "-def helper" not in old_diff, True),
+        ("Added side of a move collapsed",
+         "3 lines moved from another file" in new_diff and "+def helper" not in new_diff, True),
+        ("Move notes don't name other files", "src/" in old_diff + new_diff, False),
+        ("Note independent of the other file's line numbers", shifted[0]["diff"], old_diff),
+        ("Move within a file references lines",
+         "moved to line 48" in same_file[0]["diff"] and "moved from line 10" in same_file[0]["diff"], True),
+        ("Edited block not treated as a move",
+         "moved" in edited[0]["diff"] + edited[1]["diff"], False),
+        ("First occurrence kept", "+import sys" in repeated[0]["diff"], True),
+        ("Repeat collapsed without naming the other file",
+         "same change as in another file" in repeated[1]["diff"] and "a.py" not in repeated[1]["diff"], True),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+def test_standalone():
+    """Test the per-file diffs used when files are summarized on their own."""
+    print("=" * 60)
+    print("Testing Standalone Diffs")
+    print("=" * 60)
+
+    compressor = DiffCompressor(get_token_counter(), context_lines=1, min_collapse_lines=3)
+    hunk = "@@ -1,1 +1,3 @@\n import os\n+import sys\n+import json\n+import re\n"
+    compressed, _ = compressor.compress([
+        {"old_path": "src/old.py", "new_path": "src/old.py", "diff": "@@ -10,3 +9,0 @@\n" + REMOVED_BLOCK},
+        {"old_path": "src/new.py", "new_path": "src/new.py", "diff": "@@ -4,0 +5,3 @@\n" + ADDED_BLOCK},
+        {"old_path": "a.py", "new_path": "a.py", "diff": hunk},
+        {"old_path": "b.py", "new_path": "b.py", "diff": hunk},
+        {"old_path": "src/app.py", "new_path": "src/app.py",
+         "diff": "@@ -10,3 +9,0 @@\n" + REMOVED_BLOCK + "@@ -50,0 +48,3 @@\n" + ADDED_BLOCK},
+        {"old_path": "app.js", "new_path": "app.js",
+         "diff": "@@ -1,3 +1,3 @@\n function f() {\n-  return  g(x);\n+    return g(x);\n }\n"},
+    ])
+    old_file, new_file, first, repeat, same_file, whitespace = (
+        change["standalone"].text for change in compressed
+    )
+
+    test_cases = [
+        ("Removed side of a cross-file move kept", "-def helper" in old_file, True),
+        ("Added side of a cross-file move kept", "+def helper" in new_file, True),
+        ("Cross-file repeat kept", ("+import sys" in first, "+import sys" in repeat), (True, True)),
+        ("Move within a file still collapsed", "moved to line 48" in same_file, True),
+        ("Whitespace-only change still collapsed", "whitespace-only change" in whitespace, True),
+        ("Single-prompt diff still collapses across files",
+         "moved to another file" in compressed[0]["diff"], True),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+def main():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("DELTA Diff Compression Tests")
+    print("=" * 60)
+
+    all_passed = True
+
+    # Test whitespace collapsing
+    if not test_whitespace():
+        all_passed = False
+
+    # Test move and duplicate collapsing
+    if not test_moves_and_duplicates():
+        all_passed = False
+
+    # Test standalone (MAP phase) diffs
+    if not test_standalone():
+        all_passed = False
+
+    # Final summary
+    print("=" * 60)
+    if all_passed:
+        print("[OK] ALL TESTS PASSED!")
+    else:
+        print("[FAIL] Some tests failed")
+    print("=" * 60)
+    print()
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    result = main()
+    sys.exit(0 if result else 1)
@@ -0,0 +1,201 @@
+"""
+Test script for diff parsing.
+Tests hunk header parsing, added/removed line counts and splitting a
+diff back into its hunks.
+"""
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.diff_parser import (
+    ADDED,
+    CONTEXT,
+    HUNK_HEADER,
+    NO_NEWLINE,
+    REMOVED,
+    FileDiff,
+    get_file_diff,
+    split_by_lines,
+)
+
+DIFF = (
+    "@@ -1,4 +1,5 @@ def main():\n"
+    " import os\n"
+    "-import sys\n"
+    "+import json\n"
+    "+import re\n"
+    " \n"
+    "@@ -20 +21,2 @@\n"
+    " return x\n"
+    "+return y\n"
+    "\\ No newline at end of file\n"
+)
+
+
+def test_hunks():
+    """Test hunk header parsing and line kinds."""
+    print("\n" + "=" * 60)
+    print("Testing Hunk Parsing")
+    print("=" * 60)
+
+    file_diff = FileDiff(DIFF, old_path="app.py", new_path="app.py")
+    first, second = file_diff.hunks
+
+    test_cases = [
+        ("Two hunks found", len(file_diff.hunks), 2),
+        ("First hunk header ranges",
+         (first.old_start, first.old_count, first.new_start, first.new_count), (1, 4, 1, 5)),
+        ("Section text after @@ kept", first.section, "def main():"),
+        ("Omitted count defaults to 1", (second.old_count, second.new_count), (1, 2)),
+        ("Empty section without trailing @@ text", second.section, ""),
+        ("Every line recorded", file_diff.line_count, 10),
+        ("Line kinds", list(file_diff.line_kinds), [
+            HUNK_HEADER, CONTEXT, REMOVED, ADDED, ADDED, CONTEXT,
+            HUNK_HEADER, CONTEXT, ADDED, NO_NEWLINE,
+        ]),
+        ("Line text includes its ending", file_diff.line(2), "-import sys\n"),
+        ("Hunk line ranges",
+         (first.first_line, first.end_line, second.first_line, second.end_line), (0, 6, 6, 10)),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+def test_counts():
+    """Test added/removed line counts."""
+    print("=" * 60)
+    print("Testing Added/Removed Counts")
+    print("=" * 60)
+
+    file_diff = FileDiff(DIFF)
+    first, second = file_diff.hunks
+
+    # "+++"/"---" inside a hunk are content lines, not file headers
+    tricky = FileDiff("@@ -1,2 +1,2 @@\n--- old\n+++ new\n")
+    # Lines before the first hunk don't count
+    preamble = FileDiff("+not a hunk line\n@@ -1 +1 @@\n-a\n+b\n")
+    empty = FileDiff("")
+
+    # Parsed once and stored on the change
+    change = {"new_path": "a.py", "old_path": "a.py", "diff": DIFF}
+    parsed = get_file_diff(change)
+
+    test_cases = [
+        ("First hunk counts", (first.added, first.removed), (2, 1)),
+        ("Second hunk counts", (second.added, second.removed), (1, 0)),
+        ("File totals", (file_diff.added, file_diff.removed), (3, 1)),
+        ("Lines starting with +++/--- counted", (tricky.added, tricky.removed), (1, 1)),
+        ("Preamble lines not counted", (preamble.added, preamble.removed), (1, 1)),
+        ("Empty diff", (empty.hunks, empty.added, empty.removed, empty.line_count), ([], 0, 0, 0)),
+        ("get_file_diff caches the parse on the change", get_file_diff(change) is parsed, True),
+        ("Path taken from the change", parsed.path, "a.py"),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+def test_splitting():
+    """Test splitting diffs into hunks and pieces."""
+    print("=" * 60)
+    print("Testing Splitting")
+    print("=" * 60)
+
+    segments = FileDiff(DIFF).segments()
+    with_preamble = "Binary files differ\n" + DIFF
+    preamble_segments = FileDiff(with_preamble).segments()
+    no_newline = "@@ -1 +1 @@\n-a\n+b"
+
+    test_cases = [
+        ("Split at hunk headers", [segment[:15] for segment in segments],
+         ["@@ -1,4 +1,5 @@", "@@ -20 +21,2 @@"]),
+        ("Hunks join back to the diff", "".join(segments), DIFF),
+        ("Text before the first hunk is its own segment", len(preamble_segments), 3),
+        ("Segments with a preamble join back", "".join(preamble_segments), with_preamble),
+        ("Diff without a final newline", FileDiff(no_newline).segments(), [no_newline]),
+        ("Diff without hunk headers is one segment", FileDiff("binary\n").segments(), ["binary\n"]),
+        ("split_by_lines keeps lines whole",
+         split_by_lines("aaaa\nbb\ncccccccc\nd\n", 8), ["aaaa\nbb\n", "cccccccc\n", "d\n"]),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+def main():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("DELTA Diff Parser Tests")
+    print("=" * 60)
+
+    all_passed = True
+
+    # Test hunk parsing
+    if not test_hunks():
+        all_passed = False
+
+    # Test added/removed counts
+    if not test_counts():
+        all_passed = False
+
+    # Test splitting
+    if not test_splitting():
+        all_passed = False
+
+    # Final summary
+    print("=" * 60)
+    if all_passed:
+        print("[OK] ALL TESTS PASSED!")
+    else:
+        print("[FAIL] Some tests failed")
+    print("=" * 60)
+    print()
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    result = main()
+    sys.exit(0 if result else 1)
@@ -0,0 +1,218 @@
+"""
+Test script for the file filter engine.
+Tests rule precedence, gitignore-style pattern matching and
+.gitattributes parsing.
+"""
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.file_filter import FileFilter, get_file_filter, parse_gitattributes
+
+
+def test_precedence():
+    """Test that the last matching rule wins across skip/keep runs."""
+    print("\n" + "=" * 60)
+    print("Testing Rule Precedence")
+    print("=" * 60)
+
+    file_filter = FileFilter([
+        ("*.snap", "skip"),
+        ("generated/", "skip"),
+        ("generated/keep_*.ts", "keep"),
+        ("important.snap", "keep"),
+        ("generated/keep_secret.ts", "skip"),
+    ])
+
+    # Project rules override the defaults
+    project_filter = get_file_filter(project_rules=(("*.min.js", "keep"),))
+
+    # .gitattributes sits between the defaults and the project rules
+    layered = get_file_filter(
+        project_rules=(("docs/api.md", "keep"),),
+        gitattributes="docs/** linguist-generated\n*.lock -diff\n",
+    )
+
+    test_cases = [
+        ("Skip rule applies", file_filter.should_skip("ui/__snapshots__/a.snap"), True),
+        ("Later keep overrides an earlier skip", file_filter.should_skip("important.snap"), False),
+        ("Directory skip applies below it", file_filter.should_skip("generated/api.ts"), True),
+        ("Keep run overrides the directory skip", file_filter.should_skip("generated/keep_me.ts"), False),
+        ("Last skip overrides the keep before it",
+         file_filter.should_skip("generated/keep_secret.ts"), True),
+        ("Unmatched files are kept", file_filter.should_skip("src/app.py"), False),
+        ("Default rules skip minified files", get_file_filter().should_skip("dist/app.min.js"), True),
+        ("Project keep overrides a default", project_filter.should_skip("dist/app.min.js"), False),
+        (".gitattributes skip applies", layered.should_skip("docs/guide.md"), True),
+        ("Project keep overrides .gitattributes", layered.should_skip("docs/api.md"), False),
+        (".gitattributes -diff skips", layered.should_skip("deps/app.lock"), True),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+def test_patterns():
+    """Test gitignore-style pattern matching."""
+    print("=" * 60)
+    print("Testing Pattern Matching")
+    print("=" * 60)
+
+    def skips(pattern: str, path: str) -> bool:
+        return FileFilter([(pattern, "skip")]).should_skip(path)
+
+    test_cases = [
+        # "**/" crosses any number of directories, including none
+        ("**/ matches at the root", skips("**/fixtures/*.json", "fixtures/a.json"), True),
+        ("**/ matches at depth", skips("**/fixtures/*.json", "a/b/fixtures/c.json"), True),
+        ("* doesn't cross directories", skips("**/fixtures/*.json", "fixtures/sub/c.json"), False),
+        ("Trailing /** matches everything below", skips("docs/**", "docs/a/b.md"), True),
+        # Patterns with "/" are anchored at the repository root
+        ("Anchored pattern matches from the root", skips("src/gen/*.ts", "src/gen/a.ts"), True),
+        ("Anchored pattern doesn't match deeper", skips("src/gen/*.ts", "lib/src/gen/a.ts"), False),
+        ("Leading / anchors a name", skips("/build", "build"), True),
+        ("Leading / doesn't match deeper", skips("/build", "src/build"), False),
+        ("Name without / matches at any depth", skips("Makefile", "tools/Makefile"), True),
+        # Trailing "/" matches everything below a directory, at any depth
+        ("Trailing / matches files below", skips("vendor/", "vendor/lib/a.go"), True),
+        ("Trailing / matches nested directories", skips("vendor/", "src/vendor/a.go"), True),
+        ("Trailing / doesn't match a file of that name", skips("vendor/", "vendor"), False),
+        # Suffix lookup checks every dotted suffix of the name
+        ("Multi-dot suffix matches", skips("*.min.js", "static/a.min.js"), True),
+        ("Multi-dot suffix needs all its parts", skips("*.min.js", "static/admin.js"), False),
+        ("Single suffix matches a multi-dot name", skips("*.js", "static/a.min.js"), True),
+        ("Suffix is not a substring match", skips("*.js", "static/a.json"), False),
+        ("Character class", skips("*.[oa]", "lib/x.a"), True),
+        ("Negated character class", skips("*.[!oa]", "lib/x.a"), False),
+        # Matching is case-insensitive (see the module docstring)
+        ("Case-insensitive suffix", skips("*.png", "assets/Logo.PNG"), True),
+        ("Case-insensitive name", skips("Makefile", "makefile"), True),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+def test_gitattributes():
+    """Test .gitattributes parsing."""
+    print("=" * 60)
+    print("Testing .gitattributes Parsing")
+    print("=" * 60)
+
+    text = (
+        "# Generated code\n"
+        "*.pb.go linguist-generated\n"
+        "\n"
+        "api/*.ts linguist-generated=true\n"
+        "api/handwritten.ts -linguist-generated\n"
+        "*.bin binary\n"
+        "*.csv -diff\n"
+        "*.sh text eol=lf\n"
+        "  # indented comment binary\n"
+        "legacy.csv diff\n"
+        "docs/*.md linguist-generated=false\n"
+    )
+
+    test_cases = [
+        ("Rules in file order", parse_gitattributes(text), [
+            ("*.pb.go", "skip"),
+            ("api/*.ts", "skip"),
+            ("api/handwritten.ts", "keep"),
+            ("*.bin", "skip"),
+            ("*.csv", "skip"),
+            ("legacy.csv", "keep"),
+            ("docs/*.md", "keep"),
+        ]),
+        ("Empty file", parse_gitattributes(""), []),
+        ("Comments only", parse_gitattributes("# *.bin binary\n"), []),
+    ]
+
+    file_filter = get_file_filter(gitattributes=text)
+    test_cases += [
+        ("-linguist-generated keeps a generated match",
+         file_filter.should_skip("api/handwritten.ts"), False),
+        ("linguist-generated skips", file_filter.should_skip("api/client.ts"), True),
+        ("diff keeps a -diff match", file_filter.should_skip("legacy.csv"), False),
+        ("Unrelated attributes ignored", file_filter.should_skip("deploy.sh"), False),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+def main():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("DELTA File Filter Tests")
+    print("=" * 60)
+
+    all_passed = True
+
+    # Test rule precedence
+    if not test_precedence():
+        all_passed = False
+
+    # Test pattern matching
+    if not test_patterns():
+        all_passed = False
+
+    # Test .gitattributes parsing
+    if not test_gitattributes():
+        all_passed = False
+
+    # Final summary
+    print("=" * 60)
+    if all_passed:
+        print("[OK] ALL TESTS PASSED!")
+    else:
+        print("[FAIL] Some tests failed")
+    print("=" * 60)
+    print()
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    result = main()
+    sys.exit(0 if result else 1)
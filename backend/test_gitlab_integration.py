@@ -182,14 +182,18 @@ async def test_services():
             print("[OK] MRAnalysisService initialized")
 
             # Test file skipping logic
-            should_skip_lock = await analysis_service.should_skip_file("package-lock.json")
+            should_skip_lock = analysis_service.should_skip_file("package-lock.json")
             assert should_skip_lock == True
             print("[OK] Lock file detection works")
 
-            should_skip_code = await analysis_service.should_skip_file("main.py")
+            should_skip_code = analysis_service.should_skip_file("main.py")
             assert should_skip_code == False
             print("[OK] Code file detection works")
 
+            should_skip_docs = analysis_service.should_skip_file("docs/info.md")
+            assert should_skip_docs == False
+            print("[OK] Extension rules match suffixes only")
+
         print("\n[OK] All service tests passed!\n")
         return True
 
@@ -200,6 +204,74 @@ async def test_services():
         return False
 
 
+def test_mr_metadata_request():
+    """Test the conditional MR metadata request (no network)."""
+    print("=" * 60)
+    print("Testing MR Metadata Request")
+    print("=" * 60)
+
+    import json
+    from requests.adapters import BaseAdapter
+    from requests.models import Response
+    from app.services.gitlab_service import GitLabService
+
+    class RecordingAdapter(BaseAdapter):
+        """Records requests; answers 304 if If-None-Match is sent."""
+
+        def __init__(self):
+            super().__init__()
+            self.requests = []
+
+        def send(self, request, **kwargs):
+            self.requests.append(request)
+            response = Response()
+            response.request = request
+            response.url = request.url
+            if request.headers.get("If-None-Match") == '"v1"':
+                response.status_code = 304
+                response._content = b""
+            else:
+                response.status_code = 200
+                response.headers["ETag"] = '"v1"'
+                response._content = json.dumps({"iid": 7, "sha": "abc"}).encode()
+            return response
+
+        def close(self):
+            pass
+
+    passed = 0
+    failed = 0
+
+    def check(condition, description):
+        nonlocal passed, failed
+        if condition:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            failed += 1
+
+    service = GitLabService("test_token")
+    adapter = RecordingAdapter()
+    service.client.session.mount("https://", adapter)
+    service.client.session.mount("http://", adapter)
+
+    attrs, etag = service._fetch_mr_attrs("group/project", 7)
+    first = adapter.requests[-1]
+    check(first.headers.get("Authorization") == "Bearer test_token", "Authorization header sent")
+    check("group%2Fproject/merge_requests/7" in first.url, "Project path URL-encoded")
+    check(attrs == {"iid": 7, "sha": "abc"} and etag == '"v1"', "Attributes and ETag returned")
+
+    attrs, etag = service._fetch_mr_attrs("group/project", 7, etag)
+    second = adapter.requests[-1]
+    check(second.headers.get("Authorization") == "Bearer test_token", "Authorization header sent on revalidation")
+    check(second.headers.get("If-None-Match") == '"v1"', "If-None-Match sent")
+    check(attrs is None and etag == '"v1"', "304 Not Modified reported as unchanged")
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
 async def main():
     """Run all tests."""
     print("\n" + "=" * 60)
@@ -220,6 +292,10 @@ async def main():
     if not test_utilities():
         all_passed = False
 
+    # Test MR metadata request
+    if not test_mr_metadata_request():
+        all_passed = False
+
     # Test services
     if not await test_services():
         all_passed = False
@@ -0,0 +1,440 @@
+"""
+Test script for the Map-Reduce summary strategy.
+Tests MAP call packing, the retry of files missing from a shared call,
+hunk-aligned chunking of large diffs and the directory tree reduce, with
+the completion call and the file summary cache stubbed out.
+"""
+import asyncio
+import json
+import re
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.config import settings
+from app.core.diff_parser import FileDiff
+from app.services import file_summary_service
+from app.services.openai_service import OpenAIService
+
+ADDED_LINE = "+value = compute_something(item, factor=7)\n"
+
+
+def test_packing():
+    """Test grouping of pending files into MAP calls."""
+    print("\n" + "=" * 60)
+    print("Testing MAP Call Packing")
+    print("=" * 60)
+
+    service = OpenAIService()
+
+    test_cases = [
+        # Defaults: diffs above 1000 tokens alone, shared calls up to 6000 tokens
+        ("Large diff gets its own call, batches largest first",
+         service._pack_map_batches([0, 1, 2, 3, 4, 5, 6, 7], [5000] + [1000] * 7),
+         [[1, 2, 3, 4, 5, 6], [0], [7]]),
+        ("First-fit decreasing fills earlier bins first",
+         service._pack_map_batches(
+             [0, 1, 2, 3, 4, 5, 6, 7], [300, 1000, 1000, 800, 1000, 1000, 900, 1000]
+         ),
+         [[1, 2, 4, 5, 7, 6], [3, 0]]),
+        ("Shared calls hold at most MAX_FILES_PER_MAP_BATCH files",
+         [len(batch) for batch in service._pack_map_batches(list(range(25)), [10] * 25)],
+         [20, 5]),
+        ("Only pending files are packed",
+         service._pack_map_batches([1, 3], [100, 200, 300, 400]), [[3, 1]]),
+        ("Nothing pending", service._pack_map_batches([], [100]), []),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+async def test_batch_retry():
+    """Test that files missing from a shared call are retried on their own."""
+    print("=" * 60)
+    print("Testing Shared Call Retry")
+    print("=" * 60)
+
+    service = OpenAIService()
+    calls = []
+    stored = {}
+
+    async def fake_completion(messages, temperature, max_tokens, on_token=None, response_format=None):
+        prompt = messages[-1]["content"]
+        if response_format:
+            # Shared call: answer for every file but src/b.py
+            files = re.findall(r"### File (\d+): (\S+)", prompt)
+            calls.append(("batch", sorted(path for _, path in files)))
+            return json.dumps({"summaries": {
+                number: f"batch summary of {path}" for number, path in files if path != "src/b.py"
+            }})
+        if prompt.startswith("File: "):
+            path = prompt.split("\n", 1)[0][len("File: "):]
+            calls.append(("file", path))
+            return f"file summary of {path}"
+        calls.append(("final", prompt))
+        return "final summary"
+
+    async def fake_load(keys):
+        return {key: stored[key] for key in keys if key in stored}
+
+    async def fake_store(summaries):
+        stored.update(summaries)
+
+    service._create_completion = fake_completion
+    service._load_cached_file_summaries = fake_load
+    service._store_file_summaries = fake_store
+
+    changes = [
+        {"old_path": path, "new_path": path, "diff": "@@ -0,0 +1,3 @@\n" + ADDED_LINE * 3}
+        for path in ("src/a.py", "src/b.py", "src/c.py")
+    ]
+    version = service.FILE_SUMMARY_PROMPT_VERSION
+    summary = await service._generate_chunked_summary("Title", "Description", changes, [], [])
+    first_calls = list(calls)
+    final_prompt = first_calls[-1][1]
+    stored_after_first = dict(stored)
+
+    # Second run: everything comes from the cache, batch results included
+    calls.clear()
+    await service._generate_chunked_summary("Title", "Description", changes, [], [])
+
+    test_cases = [
+        ("Final summary returned", summary, "final summary"),
+        ("Small files share one call, the missing one is retried alone",
+         first_calls[:-1], [("batch", ["src/a.py", "src/b.py", "src/c.py"]), ("file", "src/b.py")]),
+        ("Every file summary reaches the REDUCE prompt",
+         all(text in final_prompt for text in (
+             "batch summary of src/a.py", "file summary of src/b.py", "batch summary of src/c.py"
+         )), True),
+        ("Shared call results cached under their own prompt version",
+         set(stored_after_first), {
+             file_summary_service.compute_summary_key(
+                 "src/a.py", changes[0]["diff"], f"{version}-batch", service.deployment
+             ),
+             file_summary_service.compute_summary_key(
+                 "src/b.py", changes[1]["diff"], version, service.deployment
+             ),
+             file_summary_service.compute_summary_key(
+                 "src/c.py", changes[2]["diff"], f"{version}-batch", service.deployment
+             ),
+         }),
+        ("Cached summaries reused on the next run", [kind for kind, _ in calls], ["final"]),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+def test_chunking():
+    """Test hunk-aligned splitting of large diffs."""
+    print("=" * 60)
+    print("Testing Diff Chunking")
+    print("=" * 60)
+
+    service = OpenAIService()
+    counter = service.token_counter
+    limit = 100
+
+    small_hunks = "@@ -1,0 +1,2 @@\n" + ADDED_LINE * 2 + "@@ -9,0 +11,2 @@\n" + ADDED_LINE * 2
+    medium_hunks = "@@ -1,0 +1,5 @@\n" + ADDED_LINE * 5 + "@@ -9,0 +14,5 @@\n" + ADDED_LINE * 5
+    large_hunk = "@@ -1,0 +1,40 @@\n" + ADDED_LINE * 40
+    no_headers = ADDED_LINE * 40
+
+    original_limit = settings.OPENAI_FILE_CHUNK_TOKENS
+    original_max_chunks = settings.OPENAI_MAX_CHUNKS_PER_FILE
+    settings.OPENAI_FILE_CHUNK_TOKENS = limit
+    try:
+        small_chunks, _ = service._split_diff_chunks(FileDiff(small_hunks))
+        medium_chunks, _ = service._split_diff_chunks(FileDiff(medium_hunks))
+        large_chunks, large_omitted = service._split_diff_chunks(FileDiff(large_hunk))
+        headerless_chunks, _ = service._split_diff_chunks(FileDiff(no_headers))
+
+        settings.OPENAI_MAX_CHUNKS_PER_FILE = 2
+        capped_chunks, capped_omitted = service._split_diff_chunks(FileDiff(large_hunk))
+    finally:
+        settings.OPENAI_FILE_CHUNK_TOKENS = original_limit
+        settings.OPENAI_MAX_CHUNKS_PER_FILE = original_max_chunks
+
+    test_cases = [
+        ("Hunks that fit together share a chunk", small_chunks, [small_hunks]),
+        ("Chunks split at hunk headers",
+         [chunk.startswith("@@") for chunk in medium_chunks], [True, True]),
+        ("Hunk chunks join back to the diff", "".join(medium_chunks), medium_hunks),
+        ("Hunk larger than a chunk is split", len(large_chunks) > 1, True),
+        ("Split hunk stays within the budget",
+         max(counter.count_tokens_batch(large_chunks)) <= limit, True),
+        ("Split hunk keeps lines whole",
+         all(chunk.endswith("\n") for chunk in large_chunks), True),
+        ("Split hunk joins back to the diff", "".join(large_chunks), large_hunk),
+        ("Nothing omitted below the chunk cap", large_omitted, 0),
+        ("Diff without hunk headers is split", len(headerless_chunks) > 1, True),
+        ("Headerless chunks stay within the budget",
+         max(counter.count_tokens_batch(headerless_chunks)) <= limit, True),
+        ("Headerless chunks join back to the diff", "".join(headerless_chunks), no_headers),
+        ("Chunks beyond OPENAI_MAX_CHUNKS_PER_FILE are left out",
+         (capped_chunks, capped_omitted), (large_chunks[:2], len(large_chunks) - 2)),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+async def test_chunked_summary():
+    """Test that a large diff is summarized chunk by chunk and merged."""
+    print("=" * 60)
+    print("Testing Chunked File Summary")
+    print("=" * 60)
+
+    service = OpenAIService()
+    calls = []
+    stored = {}
+
+    async def fake_completion(messages, temperature, max_tokens, on_token=None, response_format=None):
+        prompt = messages[-1]["content"]
+        label = prompt.split("\n", 1)[0]
+        if "(part " in label:
+            calls.append(("part", label))
+            return f"summary of {label[len('File: '):]}"
+        calls.append(("merge", prompt))
+        return "merged summary"
+
+    async def fake_load(keys):
+        return {key: stored[key] for key in keys if key in stored}
+
+    async def fake_store(summaries):
+        stored.update(summaries)
+
+    service._create_completion = fake_completion
+    service._load_cached_file_summaries = fake_load
+    service._store_file_summaries = fake_store
+
+    # Distinct lines, so every chunk has a cache key of its own
+    lines = "".join(f"+value_{n} = compute_something(item, factor={n})\n" for n in range(40))
+    file_diff = FileDiff(
+        "@@ -1,0 +1,40 @@\n" + lines,
+        old_path="src/big.py",
+        new_path="src/big.py",
+    )
+
+    original_limit = settings.OPENAI_FILE_CHUNK_TOKENS
+    settings.OPENAI_FILE_CHUNK_TOKENS = 100
+    try:
+        chunks, _ = service._split_diff_chunks(file_diff)
+        summary = await service._summarize_file(file_diff)
+        first_calls = list(calls)
+
+        # Second run: chunk summaries come from the cache, only the merge runs
+        calls.clear()
+        await service._summarize_file(file_diff)
+    finally:
+        settings.OPENAI_FILE_CHUNK_TOKENS = original_limit
+
+    total = len(chunks)
+    part_labels = [f"File: src/big.py (part {n} of {total})" for n in range(1, total + 1)]
+    merge_prompt = first_calls[-1][1]
+    part_positions = [
+        merge_prompt.find(f"Part {n}: summary of src/big.py (part {n} of {total})")
+        for n in range(1, total + 1)
+    ]
+
+    test_cases = [
+        ("Merged summary returned", summary, "merged summary"),
+        ("One call per chunk, labelled with its part",
+         sorted(label for kind, label in first_calls if kind == "part"), sorted(part_labels)),
+        ("Chunk summaries merged last", first_calls[-1][0], "merge"),
+        ("Merge prompt has every part in order",
+         -1 not in part_positions and part_positions == sorted(part_positions), True),
+        ("Chunk summaries cached", len(stored), total),
+        ("Cached chunk summaries reused", [kind for kind, _ in calls], ["merge"]),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+async def test_tree_reduce():
+    """Test reducing file summaries per directory until they fit."""
+    print("=" * 60)
+    print("Testing Directory Tree Reduce")
+    print("=" * 60)
+
+    service = OpenAIService()
+    labels = []
+    component_summary = "short summary"
+
+    async def fake_completion(messages, temperature, max_tokens, on_token=None, response_format=None):
+        label = messages[-1]["content"].split("\n", 1)[0][len("Directory: "):]
+        labels.append(label)
+        if component_summary is None:
+            raise RuntimeError("service unavailable")
+        return component_summary
+
+    service._create_completion = fake_completion
+
+    summary = "Changed the handler to validate its input before saving the record. " * 3
+    spread = [
+        {"filepath": f"{directory}/file_{n}.py", "summary": summary}
+        for directory in ("src/api", "src/db", "docs")
+        for n in range(3)
+    ]
+    one_directory = [{"filepath": f"src/huge/file_{n}.py", "summary": summary} for n in range(20)]
+
+    original_budget = settings.OPENAI_REDUCE_MAX_INPUT_TOKENS
+    try:
+        settings.OPENAI_REDUCE_MAX_INPUT_TOKENS = 1_000_000
+        unchanged = await service._reduce_by_directory(spread)
+        unchanged_calls = len(labels)
+
+        settings.OPENAI_REDUCE_MAX_INPUT_TOKENS = 200
+        labels.clear()
+        by_directory = await service._reduce_by_directory(spread)
+        spread_labels = sorted(set(labels))
+
+        labels.clear()
+        split = await asyncio.wait_for(service._reduce_by_directory(one_directory), 10)
+        split_calls = len(labels)
+        split_tokens = sum(
+            service._count_summary_tokens(entry["filepath"], entry["summary"]) for entry in split
+        )
+
+        # Component summaries that never get small enough
+        component_summary = "Reworked request validation across the whole component. " * 20
+        labels.clear()
+        oversized = await asyncio.wait_for(service._reduce_by_directory(one_directory), 10)
+        oversized_calls = len(labels)
+
+        # Every component call fails
+        component_summary = None
+        labels.clear()
+        failing = await asyncio.wait_for(service._reduce_by_directory(one_directory), 10)
+    finally:
+        settings.OPENAI_REDUCE_MAX_INPUT_TOKENS = original_budget
+
+    test_cases = [
+        ("Summaries within the budget left alone", (unchanged, unchanged_calls), (spread, 0)),
+        ("One component per directory", [entry["filepath"] for entry in by_directory],
+         ["src/api/", "src/db/", "docs/"]),
+        ("Components labelled with their directory", spread_labels, ["docs/", "src/api/", "src/db/"]),
+        ("Directory over the budget split into several calls", split_calls > 1, True),
+        ("Split directory reduced within the budget", split_tokens <= 200, True),
+        ("Split directory keeps its label",
+         {entry["filepath"] for entry in split}, {"src/huge/"}),
+        ("Terminates when components don't shrink", len(oversized) > 0 and oversized_calls < 40, True),
+        ("Terminates when every call fails, keeping the file summaries", failing, one_directory),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+async def main():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("DELTA Map-Reduce Tests")
+    print("=" * 60)
+
+    all_passed = True
+
+    # Test MAP call packing
+    if not test_packing():
+        all_passed = False
+
+    # Test retry of files missing from a shared call
+    if not await test_batch_retry():
+        all_passed = False
+
+    # Test hunk-aligned chunking
+    if not test_chunking():
+        all_passed = False
+
+    # Test chunk-by-chunk file summaries
+    if not await test_chunked_summary():
+        all_passed = False
+
+    # Test the directory tree reduce
+    if not await test_tree_reduce():
+        all_passed = False
+
+    # Final summary
+    print("=" * 60)
+    if all_passed:
+        print("[OK] ALL TESTS PASSED!")
+    else:
+        print("[FAIL] Some tests failed")
+    print("=" * 60)
+    print()
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    result = asyncio.run(main())
+    sys.exit(0 if result else 1)
@@ -0,0 +1,201 @@
+"""
+Test script for OpenAI rate limiting.
+Tests the token bucket budget and the adaptive (AIMD) concurrency limit.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.rate_limiter import (
+    AdaptiveConcurrencyLimiter,
+    OpenAIRateLimiter,
+    TokenBucket,
+    retry_after_seconds,
+)
+
+
+async def timed(coroutine) -> float:
+    """Await a coroutine and return how long it took in seconds."""
+    start = time.monotonic()
+    await coroutine
+    return time.monotonic() - start
+
+
+async def test_token_bucket():
+    """Test token bucket budgeting."""
+    print("\n" + "=" * 60)
+    print("Testing Token Bucket")
+    print("=" * 60)
+
+    # 600 per minute = 10 per second
+    bucket = TokenBucket(600)
+    burst = await timed(bucket.acquire(600))
+    refill_wait = await timed(bucket.acquire(3))
+
+    # Larger than the whole bucket: admitted once full instead of waiting forever
+    bucket = TokenBucket(6000)
+    bucket.available = 5990.0
+    oversized_wait = await timed(bucket.acquire(100000))
+    oversized_left = bucket.available
+
+    # Refill never exceeds capacity; server quota only lowers the budget
+    bucket = TokenBucket(600)
+    bucket.updated_at -= 3600
+    bucket._refill()
+    refilled = bucket.available
+    bucket.sync_remaining(100)
+    lowered = bucket.available
+    bucket.sync_remaining(10000)
+    not_raised = bucket.available
+
+    # Waiters are served in arrival order
+    bucket = TokenBucket(600)
+    bucket.available = 0.0
+    order = []
+
+    async def take(name: str, amount: int):
+        await bucket.acquire(amount)
+        order.append(name)
+
+    await asyncio.gather(take("first", 2), take("second", 1))
+
+    test_cases = [
+        ("Full bucket admits a burst immediately", burst < 0.05, True),
+        ("Empty bucket waits for the refill (3 units at 10/s)", 0.25 <= refill_wait < 0.6, True),
+        ("Oversized request admitted when the bucket is full",
+         0.05 <= oversized_wait < 0.5 and oversized_left < 1, True),
+        ("Refill capped at capacity", refilled, 600),
+        ("sync_remaining lowers the budget", lowered <= 100.1, True),
+        ("sync_remaining never raises the budget", not_raised <= 100.5, True),
+        ("Callers served in arrival order", order, ["first", "second"]),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+async def test_aimd():
+    """Test additive increase / multiplicative decrease of concurrency."""
+    print("=" * 60)
+    print("Testing Adaptive Concurrency (AIMD)")
+    print("=" * 60)
+
+    limiter = AdaptiveConcurrencyLimiter(initial=8, minimum=1, maximum=8)
+    limiter.on_throttle()
+    halved = limiter.limit
+    for _ in range(5):
+        limiter.on_throttle()
+    floored = limiter.limit
+
+    limiter.limit = 4.0
+    for _ in range(4):
+        limiter.on_success()
+    increased = limiter.limit
+    for _ in range(100):
+        limiter.on_success()
+    capped = limiter.limit
+
+    # Slots are limited to int(limit)
+    limiter = AdaptiveConcurrencyLimiter(initial=2, minimum=1, maximum=4)
+    await limiter.acquire()
+    await limiter.acquire()
+    third = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0.05)
+    blocked = not third.done()
+    await limiter.release()
+    await asyncio.sleep(0.01)
+    admitted = third.done()
+
+    # Shared limiter: 429 shrinks concurrency and pauses callers
+    rate_limiter = OpenAIRateLimiter(tokens_per_minute=60000, requests_per_minute=600, max_concurrency=4)
+    retry_after = rate_limiter.on_throttle({"retry-after-ms": "200"})
+    throttled_limit = rate_limiter.concurrency.limit
+
+    async def use_slot():
+        async with rate_limiter.slot(100):
+            pass
+
+    paused = await timed(use_slot())
+    rate_limiter.on_success({"x-ratelimit-remaining-tokens": "500", "x-ratelimit-remaining-requests": "bad"})
+
+    test_cases = [
+        ("Throttle halves the limit", halved, 4),
+        ("Limit never drops below the minimum", floored, 1),
+        ("About +1 after a limit's worth of successes", 4.9 < increased < 5.0, True),
+        ("Limit never exceeds the maximum", capped, 8),
+        ("Acquire blocks at the limit", blocked, True),
+        ("Release admits a waiter", (admitted, limiter.in_flight), (True, 2)),
+        ("429 reads retry-after-ms", retry_after, 0.2),
+        ("429 halves the shared concurrency limit", throttled_limit, 2),
+        ("Callers wait out the server's pause", 0.15 <= paused < 0.5, True),
+        ("Remaining-tokens header syncs the budget", rate_limiter.tokens.available <= 501, True),
+        ("retry-after in seconds", retry_after_seconds({"retry-after": "3"}), 3.0),
+        ("Invalid retry-after ignored", retry_after_seconds({"retry-after": "soon"}), None),
+        ("Missing retry-after", retry_after_seconds({}), None),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+async def main():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("DELTA Rate Limiter Tests")
+    print("=" * 60)
+
+    all_passed = True
+
+    # Test token bucket
+    if not await test_token_bucket():
+        all_passed = False
+
+    # Test AIMD concurrency
+    if not await test_aimd():
+        all_passed = False
+
+    # Final summary
+    print("=" * 60)
+    if all_passed:
+        print("[OK] ALL TESTS PASSED!")
+    else:
+        print("[FAIL] Some tests failed")
+    print("=" * 60)
+    print()
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    result = asyncio.run(main())
+    sys.exit(0 if result else 1)
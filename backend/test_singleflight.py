@@ -0,0 +1,170 @@
+"""
+Test script for request coalescing.
+Tests that concurrent calls share one run, that errors reach every
+caller and that a waiter takes over when the leader is cancelled.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add app directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.singleflight import SingleFlight
+
+
+async def test_coalescing():
+    """Test sharing of results and errors."""
+    print("\n" + "=" * 60)
+    print("Testing Coalescing")
+    print("=" * 60)
+
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "summary"
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise ValueError("GitLab unavailable")
+
+    outcomes = await asyncio.gather(*(flight.do("mr", work) for _ in range(5)))
+    same_key_runs = len(runs)
+
+    runs.clear()
+    await asyncio.gather(flight.do("a", work), flight.do("b", work))
+    other_key_runs = len(runs)
+
+    runs.clear()
+    await flight.do("mr", work)
+    later_runs = len(runs)
+
+    errors = await asyncio.gather(
+        *(flight.do("bad", failing) for _ in range(3)), return_exceptions=True
+    )
+
+    test_cases = [
+        ("Concurrent callers run the work once", same_key_runs, 1),
+        ("Every caller gets the result", [result for result, _ in outcomes], ["summary"] * 5),
+        ("Exactly one caller is the leader", [shared for _, shared in outcomes].count(False), 1),
+        ("Different keys run separately", other_key_runs, 2),
+        ("Later call runs again", later_runs, 1),
+        ("Key released once done", flight._inflight, {}),
+        ("Leader's exception raised in every caller",
+         [type(error).__name__ for error in errors], ["ValueError"] * 3),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+async def test_cancellation():
+    """Test cancellation of the leader and of followers."""
+    print("=" * 60)
+    print("Testing Cancellation")
+    print("=" * 60)
+
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.1)
+        return len(runs)
+
+    # Leader cancelled: a waiting follower takes over
+    leader = asyncio.create_task(flight.do("mr", work))
+    await asyncio.sleep(0.01)
+    followers = [asyncio.create_task(flight.do("mr", work)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    handover = await asyncio.gather(*followers)
+    handover_runs = len(runs)
+    leader_cancelled = leader.cancelled()
+
+    # Follower cancelled: the leader and the other follower carry on
+    runs.clear()
+    leader = asyncio.create_task(flight.do("mr", work))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(flight.do("mr", work))
+    other = asyncio.create_task(flight.do("mr", work))
+    await asyncio.sleep(0.01)
+    follower.cancel()
+    leader_outcome = await leader
+    other_outcome = await other
+
+    test_cases = [
+        ("Leader cancelled", leader_cancelled, True),
+        ("Work restarted once after the leader was cancelled", handover_runs, 2),
+        ("Followers get the new run's result", [result for result, _ in handover], [2, 2, 2]),
+        ("One follower became the new leader", [shared for _, shared in handover].count(False), 1),
+        ("Cancelled follower is cancelled", follower.cancelled(), True),
+        ("Leader unaffected by a cancelled follower", leader_outcome, (1, False)),
+        ("Other follower still shares the result", other_outcome, (1, True)),
+        ("Work ran once", len(runs), 1),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for description, result, expected in test_cases:
+        if result == expected:
+            print(f"[OK] {description}")
+            passed += 1
+        else:
+            print(f"[FAIL] {description}")
+            print(f"       Expected: {expected}")
+            print(f"       Got: {result}")
+            failed += 1
+
+    print(f"\nResults: {passed} passed, {failed} failed\n")
+    return failed == 0
+
+
+async def main():
+    """Run all tests."""
+    print("\n" + "=" * 60)
+    print("DELTA Single-Flight Tests")
+    print("=" * 60)
+
+    all_passed = True
+
+    # Test coalescing
+    if not await test_coalescing():
+        all_passed = False
+
+    # Test cancellation
+    if not await test_cancellation():
+        all_passed = False
+
+    # Final summary
+    print("=" * 60)
+    if all_passed:
+        print("[OK] ALL TESTS PASSED!")
+    else:
+        print("[FAIL] Some tests failed")
+    print("=" * 60)
+    print()
+
+    return all_passed
+
+
+if __name__ == "__main__":
+    result = asyncio.run(main())
+    sys.exit(0 if result else 1)
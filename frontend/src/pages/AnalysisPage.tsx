@@ -9,7 +9,7 @@ import { apiClient } from "@/services/api";
 import { toast } from "@/components/ui/sonner";
 import { Loader2, ExternalLink, CheckCircle2, Clock } from "lucide-react";
 import ReactMarkdown from "react-markdown";
-import type { AnalyzeResponse } from "@/types/api";
+import type { AnalyzeResponse, AnalyzeStreamProgress } from "@/types/api";
 import {
   Card,
   CardContent,
@@ -27,6 +27,7 @@ export default function AnalysisPage() {
   const [mrUrl, setMrUrl] = useState("");
   const [isAnalyzing, setIsAnalyzing] = useState(false);
   const [result, setResult] = useState<AnalyzeResponse | null>(null);
+  const [progress, setProgress] = useState<AnalyzeStreamProgress | null>(null);
   const [error, setError] = useState<string | null>(null);
 
   const handleAnalyze = async () => {
@@ -45,9 +46,33 @@ export default function AnalysisPage() {
     setIsAnalyzing(true);
     setError(null);
     setResult(null);
+    setProgress(null);
 
     try {
-      const response = await apiClient.analyzeMR({ url: mrUrl });
+      // Render the header, MAP progress and summary as they stream in
+      const response = await apiClient.analyzeMRStream(
+        { url: mrUrl },
+        {
+          onHeader: ({ mr_header, cached }) =>
+            setResult({
+              mr_header,
+              cached,
+              summary_markdown: "",
+              scanned_at: new Date().toISOString(),
+            }),
+          onProgress: setProgress,
+          onToken: (text) =>
+            setResult((current) =>
+              current
+                ? { ...current, summary_markdown: current.summary_markdown + text }
+                : current,
+            ),
+          onReset: () =>
+            setResult((current) =>
+              current ? { ...current, summary_markdown: "" } : current,
+            ),
+        },
+      );
       setResult(response);
 
       if (response.cached) {
@@ -120,8 +145,8 @@ export default function AnalysisPage() {
           </CardContent>
         </Card>
 
-        {/* Loading State */}
-        {isAnalyzing && (
+        {/* Loading State (until the MR header arrives) */}
+        {isAnalyzing && !result && (
           <Card>
             <CardContent className="p-6">
               <div className="space-y-4">
@@ -142,7 +167,7 @@ export default function AnalysisPage() {
         )}
 
         {/* Results */}
-        {result && !isAnalyzing && (
+        {result && (
           <div className="space-y-6">
             {/* MR Header Card */}
             <Card>
@@ -207,6 +232,22 @@ export default function AnalysisPage() {
                 <CardTitle>AI-Generated Summary</CardTitle>
               </CardHeader>
               <CardContent>
+                {/* Generation in progress: MAP progress, then skeleton until text streams in */}
+                {isAnalyzing && !result.summary_markdown && (
+                  <div className="space-y-4">
+                    {progress && (
+                      <p className="text-sm text-zinc-500 flex items-center gap-2">
+                        <Loader2 className="w-4 h-4 animate-spin" />
+                        <span>
+                          Summarizing files {progress.completed}/{progress.total}
+                          {progress.filepath && ` - ${progress.filepath}`}
+                        </span>
+                      </p>
+                    )}
+                    <Skeleton className="h-32 w-full" />
+                  </div>
+                )}
+
                 {/* Markdown content */}
                 <div className="prose prose-zinc max-w-none">
                   <ReactMarkdown
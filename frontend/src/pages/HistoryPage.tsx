@@ -21,14 +21,31 @@ import {
 } from "lucide-react";
 import type { ScanHistoryItem } from "@/types/api";
 
+/** Render a search snippet, turning its <mark> markers into highlights (never as HTML). */
+function renderSnippet(snippet: string) {
+  return snippet.split(/<mark>(.*?)<\/mark>/g).map((part, i) =>
+    i % 2 === 1 ? (
+      <mark key={i} className="bg-yellow-100 text-zinc-900 rounded-sm">
+        {part}
+      </mark>
+    ) : (
+      part
+    ),
+  );
+}
+
 export default function HistoryPage() {
   const [scans, setScans] = useState<ScanHistoryItem[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [searchQuery, setSearchQuery] = useState("");
   const [totalCount, setTotalCount] = useState(0);
   const [currentLimit] = useState(20);
-  const [currentOffset, setCurrentOffset] = useState(0);
-  const [hasMore, setHasMore] = useState(false);
+  // cursors[i] is the cursor of page i (page 0 has none)
+  const [cursors, setCursors] = useState<(string | undefined)[]>([undefined]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const pageIndex = cursors.length - 1;
+  const currentOffset = pageIndex * currentLimit;
+  const currentCursor = cursors[pageIndex];
 
   const fetchHistory = useCallback(async () => {
     setIsLoading(true);
@@ -36,19 +53,19 @@ export default function HistoryPage() {
       const response = await apiClient.getHistory({
         search: searchQuery || undefined,
         limit: currentLimit,
-        offset: currentOffset,
+        cursor: currentCursor,
       });
 
       setScans(response.scans);
       setTotalCount(response.total);
-      setHasMore(currentOffset + currentLimit < response.total);
+      setNextCursor(response.next_cursor);
     } catch (error: unknown) {
       toast.error("Failed to load history");
       console.error("Failed to fetch history:", error);
     } finally {
       setIsLoading(false);
     }
-  }, [searchQuery, currentLimit, currentOffset]);
+  }, [searchQuery, currentLimit, currentCursor]);
 
   useEffect(() => {
     fetchHistory();
@@ -56,15 +73,17 @@ export default function HistoryPage() {
 
   const handleSearch = (value: string) => {
     setSearchQuery(value);
-    setCurrentOffset(0); // Reset to first page on new search
+    setCursors([undefined]); // Reset to first page on new search
   };
 
   const handleLoadMore = () => {
-    setCurrentOffset((prev) => prev + currentLimit);
+    if (nextCursor) {
+      setCursors((prev) => [...prev, nextCursor]);
+    }
   };
 
   const handleLoadPrevious = () => {
-    setCurrentOffset((prev) => Math.max(0, prev - currentLimit));
+    setCursors((prev) => (prev.length > 1 ? prev.slice(0, -1) : prev));
   };
 
   const formatDate = (dateString: string) => {
@@ -112,7 +131,7 @@ export default function HistoryPage() {
               type="text"
               value={searchQuery}
               onChange={(e) => handleSearch(e.target.value)}
-              placeholder="Search by MR title or URL..."
+              placeholder="Search by MR title, URL or summary..."
               className="pl-11"
             />
           </div>
@@ -193,6 +212,12 @@ export default function HistoryPage() {
                           <p className="text-sm text-zinc-500 truncate">
                             {scan.mr_url}
                           </p>
+
+                          {scan.snippet && (
+                            <p className="text-sm text-zinc-600 mt-2 line-clamp-2">
+                              {renderSnippet(scan.snippet)}
+                            </p>
+                          )}
                         </div>
 
                         {/* Right side: Status and Icon */}
@@ -229,7 +254,7 @@ export default function HistoryPage() {
               <Button
                 variant="outline"
                 onClick={handleLoadPrevious}
-                disabled={currentOffset === 0}
+                disabled={pageIndex === 0}
               >
                 Previous
               </Button>
@@ -243,7 +268,7 @@ export default function HistoryPage() {
               <Button
                 variant="outline"
                 onClick={handleLoadMore}
-                disabled={!hasMore}
+                disabled={!nextCursor}
               >
                 Next
               </Button>
@@ -6,6 +6,7 @@ import type { AxiosInstance } from "axios";
 import type {
   AnalyzeRequest,
   AnalyzeResponse,
+  AnalyzeStreamHandlers,
   HistoryResponse,
   UserProfile,
 } from "@/types/api";
@@ -68,10 +69,84 @@ class APIClient {
     return response.data;
   }
 
+  /**
+   * Analyze an MR over Server-Sent Events. Handlers are called as the
+   * header, MAP progress and summary tokens arrive; resolves with the
+   * final response. Errors are thrown in the same shape as axios errors
+   * ({ response: { status, data: { detail } } }).
+   */
+  async analyzeMRStream(
+    request: AnalyzeRequest,
+    handlers: AnalyzeStreamHandlers = {},
+  ): Promise<AnalyzeResponse> {
+    const response = await fetch(`${API_BASE_URL}/api/analyze/stream`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Accept: "text/event-stream",
+      },
+      credentials: "include", // For cookie-based auth
+      body: JSON.stringify(request),
+    });
+
+    if (!response.ok || !response.body) {
+      if (response.status === 401) {
+        window.location.href = "/login";
+      }
+      const data = await response.json().catch(() => ({}));
+      throw streamError(response.status, data.detail);
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += value;
+
+      // Events are separated by a blank line
+      let boundary: number;
+      while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+        const frame = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = "message";
+        let data = "";
+        for (const line of frame.split("\n")) {
+          if (line.startsWith("event: ")) event = line.slice(7);
+          else if (line.startsWith("data: ")) data += line.slice(6);
+        }
+        const payload = data ? JSON.parse(data) : {};
+
+        switch (event) {
+          case "header":
+            handlers.onHeader?.(payload);
+            break;
+          case "progress":
+            handlers.onProgress?.(payload);
+            break;
+          case "token":
+            handlers.onToken?.(payload.text);
+            break;
+          case "reset":
+            handlers.onReset?.();
+            break;
+          case "done":
+            return payload as AnalyzeResponse;
+          case "error":
+            throw streamError(payload.status_code, payload.detail);
+        }
+      }
+    }
+
+    throw streamError(0, "Connection closed before the analysis finished");
+  }
+
   async getHistory(params?: {
     search?: string;
     limit?: number;
-    offset?: number;
+    cursor?: string;
   }): Promise<HistoryResponse> {
     const response = await this.client.get<HistoryResponse>("/api/history", {
       params,
@@ -86,5 +161,12 @@ class APIClient {
   }
 }
 
+function streamError(status: number, detail?: string): Error {
+  const message = detail || "Failed to analyze merge request";
+  return Object.assign(new Error(message), {
+    response: { status, data: { detail: message } },
+  });
+}
+
 // Export singleton instance
 export const apiClient = new APIClient();
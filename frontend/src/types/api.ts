@@ -35,6 +35,25 @@ export interface AnalyzeResponse {
   scanned_at: string;
 }
 
+// Streaming analysis events (POST /api/analyze/stream)
+export interface AnalyzeStreamHeader {
+  mr_header: MRHeader;
+  cached: boolean;
+}
+
+export interface AnalyzeStreamProgress {
+  completed: number;
+  total: number;
+  filepath: string | null;
+}
+
+export interface AnalyzeStreamHandlers {
+  onHeader?: (header: AnalyzeStreamHeader) => void;
+  onProgress?: (progress: AnalyzeStreamProgress) => void;
+  onToken?: (text: string) => void;
+  onReset?: () => void;
+}
+
 // History types
 export interface ScanHistoryItem {
   id: number;
@@ -44,9 +63,12 @@ export interface ScanHistoryItem {
   title: string;
   scanned_at: string;
   is_up_to_date: boolean;
+  /** Search match excerpt; matches are wrapped in <mark></mark>, the rest is plain text */
+  snippet?: string | null;
 }
 
 export interface HistoryResponse {
   scans: ScanHistoryItem[];
   total: number;
+  next_cursor: string | null;
 }